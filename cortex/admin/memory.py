@@ -0,0 +1,26 @@
+"""Memory pipeline endpoints for Admin UI."""
+
+from fastapi import APIRouter, Depends
+
+from cortex.middleware.auth import require_admin
+from cortex.memory.manager import memory_manager
+from cortex.memory.scheduler import summarization_scheduler
+
+router = APIRouter(prefix="/memory", tags=["memory"])
+
+
+@router.get("/summarization")
+async def summarization_stats(_: None = Depends(require_admin)):
+    """
+    Summarization scheduler counters since startup.
+    
+    Includes skip counts by gate reason, the skip rate, the average number
+    of turns per LLM call and LLM calls saved per 1,000 requests.
+    """
+    return summarization_scheduler.stats()
+
+
+@router.get("/hot-cache")
+async def hot_cache_stats(_: None = Depends(require_admin)):
+    """Hot memory cache size and hit rate on this replica since startup."""
+    return memory_manager.hot_cache_stats()
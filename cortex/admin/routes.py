@@ -10,7 +10,7 @@ import structlog
 from cortex.database.connection import get_db
 from cortex.admin.key_service import APIKeyService
 from cortex.middleware.auth import require_admin
-from cortex.admin import analytics, settings
+from cortex.admin import analytics, settings, traces, memory
 
 logger = structlog.get_logger()
 
@@ -22,6 +22,12 @@ router.include_router(analytics.router, prefix="", tags=["analytics"])
 # Include settings routes
 router.include_router(settings.router, prefix="", tags=["settings"])
 
+# Include agent trace routes
+router.include_router(traces.router, prefix="", tags=["traces"])
+
+# Include memory pipeline routes
+router.include_router(memory.router, prefix="", tags=["memory"])
+
 
 # Request/Response Models
 class CreateKeyRequest(BaseModel):
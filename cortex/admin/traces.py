@@ -0,0 +1,63 @@
+"""Agent trace endpoints for Admin UI."""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from cortex.middleware.auth import require_admin
+from cortex.observability.traces import trace_store
+
+router = APIRouter(prefix="/traces", tags=["traces"])
+
+
+@router.get("")
+async def list_traces(
+    request_id: Optional[str] = Query(None, description="Exact request ID (also searches spilled traces)"),
+    worker: Optional[str] = Query(None, description="Planned worker, e.g. worker_logic"),
+    strategy: Optional[str] = Query(None, description="Plan strategy, e.g. self_correcting_coder"),
+    min_percentile: Optional[float] = Query(None, ge=0, le=100, description="Only traces at or above this latency percentile"),
+    include_steps: bool = Query(True),
+    limit: int = Query(50, ge=1, le=500),
+    _: None = Depends(require_admin)
+):
+    """
+    Query recent agentic request traces.
+    
+    Filters combine; with min_percentile the slowest traces come first.
+    """
+    if request_id:
+        trace = await trace_store.get(request_id)
+        if trace is None or (worker and trace.worker != worker) or (strategy and trace.strategy != strategy):
+            return {"traces": [], "count": 0}
+        return {"traces": [trace.to_dict(include_steps)], "count": 1}
+    
+    traces = trace_store.query(
+        worker=worker,
+        strategy=strategy,
+        min_percentile=min_percentile,
+        limit=limit
+    )
+    return {
+        "traces": [trace.to_dict(include_steps) for trace in traces],
+        "count": len(traces)
+    }
+
+
+@router.get("/stats")
+async def trace_stats(
+    strategy: Optional[str] = Query(None),
+    _: None = Depends(require_admin)
+):
+    """Latency percentiles per strategy and per step action over in-memory traces."""
+    return trace_store.latency_stats(strategy=strategy)
+
+
+@router.get("/{request_id}")
+async def get_trace(
+    request_id: str,
+    _: None = Depends(require_admin)
+):
+    """Get one trace with its steps."""
+    trace = await trace_store.get(request_id)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found")
+    return trace.to_dict()
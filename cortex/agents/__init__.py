@@ -3,7 +3,7 @@ Cortex V2 Agentic System
 Orchestrator-Worker architecture with specialized agents and tool execution.
 """
 
-from .orchestrator import orchestrator, Orchestrator, TaskType, AgenticStep
+from .orchestrator import orchestrator, Orchestrator, TaskType, AgenticStep, StepLog
 from .workers import worker_manager, WorkerManager, WorkerAgent, WorkerCapabilities
 from .tools import tool_executor, tool_registry, ToolExecutor, ToolRegistry
 
@@ -12,6 +12,7 @@ __all__ = [
     "Orchestrator", 
     "TaskType",
     "AgenticStep",
+    "StepLog",
     "worker_manager",
     "WorkerManager",
     "WorkerAgent", 
@@ -0,0 +1,282 @@
+"""
+Cortex V2 Agentic System - Safe Calculator
+Whitelisted arithmetic expressions compiled once and evaluated many times.
+"""
+
+import ast
+import math
+from collections import OrderedDict
+from functools import reduce
+from typing import Dict, Any, Optional, Set
+import structlog
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = structlog.get_logger()
+
+# Integer powers may produce at most this many bits (about 30,000 digits);
+# bounding the result, not the exponent, also stops nested powers
+MAX_RESULT_BITS = 100000
+MAX_FACTORIAL = 1000
+MAX_SEQUENCE_LENGTH = 10000
+
+
+class UnsafeExpressionError(ValueError):
+    """Raised when an expression uses syntax outside the arithmetic whitelist."""
+
+
+def _safe_pow(base, exponent):
+    """pow() that refuses integer results larger than MAX_RESULT_BITS."""
+    if NUMPY_AVAILABLE and (isinstance(base, np.ndarray) or isinstance(exponent, np.ndarray)):
+        return np.power(np.asarray(base, dtype=float), exponent)
+    # Float powers overflow instead of growing; only int ** int is unbounded
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if exponent * math.log2(abs(base)) > MAX_RESULT_BITS:
+            raise ValueError(f"Result too large (limit {MAX_RESULT_BITS} bits)")
+    return pow(base, exponent)
+
+
+def _safe_mul(left, right):
+    """Multiplication that refuses to repeat lists and tuples into huge sequences."""
+    for sequence, count in ((left, right), (right, left)):
+        if isinstance(sequence, (list, tuple)) and isinstance(count, int) \
+                and len(sequence) * count > MAX_SEQUENCE_LENGTH:
+            raise ValueError(f"Sequence too long (limit {MAX_SEQUENCE_LENGTH} items)")
+    return left * right
+
+
+def _safe_factorial(n):
+    """math.factorial() with an upper bound on its argument."""
+    if n > MAX_FACTORIAL:
+        raise ValueError(f"Factorial argument too large (limit {MAX_FACTORIAL})")
+    return math.factorial(n)
+
+
+SCALAR_FUNCTIONS: Dict[str, Any] = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "pow": _safe_pow,
+    "sqrt": math.sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "log": math.log,
+    "log10": math.log10,
+    "exp": math.exp,
+    "factorial": _safe_factorial,
+    "ceil": math.ceil,
+    "floor": math.floor,
+}
+
+CONSTANTS: Dict[str, float] = {
+    "pi": math.pi,
+    "e": math.e,
+}
+
+if NUMPY_AVAILABLE:
+    def _batch_log(x, base=None):
+        return np.log(x) if base is None else np.log(x) / np.log(base)
+
+    def _batch_sum(values):
+        return reduce(np.add, values)
+
+    _vector_factorial = np.vectorize(lambda n: float(_safe_factorial(int(n))), otypes=[float])
+
+    BATCH_FUNCTIONS: Dict[str, Any] = {
+        "abs": np.abs,
+        "round": np.round,
+        "min": lambda *args: reduce(np.minimum, args[0] if len(args) == 1 else args),
+        "max": lambda *args: reduce(np.maximum, args[0] if len(args) == 1 else args),
+        "sum": _batch_sum,
+        "pow": _safe_pow,
+        "sqrt": np.sqrt,
+        "sin": np.sin,
+        "cos": np.cos,
+        "tan": np.tan,
+        "asin": np.arcsin,
+        "acos": np.arccos,
+        "atan": np.arctan,
+        "log": _batch_log,
+        "log10": np.log10,
+        "exp": np.exp,
+        "factorial": _vector_factorial,
+        "ceil": np.ceil,
+        "floor": np.floor,
+    }
+else:
+    BATCH_FUNCTIONS = {}
+
+
+class _OperatorRewriter(ast.NodeTransformer):
+    """Route ** through _safe_pow and * through _safe_mul so oversized results are rejected."""
+
+    # The "_" prefix keeps these names out of reach of the expressions themselves
+    GUARDED = {ast.Pow: "pow", ast.Mult: "_mul"}
+
+    def visit_BinOp(self, node: ast.BinOp):
+        self.generic_visit(node)
+        name = self.GUARDED.get(type(node.op))
+        if name is None:
+            return node
+        return ast.copy_location(
+            ast.Call(
+                func=ast.Name(id=name, ctx=ast.Load()),
+                args=[node.left, node.right],
+                keywords=[]
+            ),
+            node
+        )
+
+
+class CompiledExpression:
+    """A validated expression and its code object."""
+
+    __slots__ = ("expression", "code", "variables")
+
+    def __init__(self, expression: str, code, variables: Set[str]):
+        self.expression = expression
+        self.code = code
+        self.variables = variables
+
+    def __call__(self, variables: Optional[Dict[str, Any]] = None):
+        """Evaluate with scalar math functions."""
+        return self._eval(SCALAR_FUNCTIONS, variables)
+
+    def evaluate_batch(self, variables: Dict[str, Any]):
+        """Evaluate with NumPy functions; variables may be arrays and broadcast together."""
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("Batch evaluation requires numpy")
+        arrays = {name: np.asarray(value, dtype=float) for name, value in variables.items()}
+        return np.asarray(self._eval(BATCH_FUNCTIONS, arrays), dtype=float)
+
+    def _eval(self, functions: Dict[str, Any], variables: Optional[Dict[str, Any]]):
+        variables = variables or {}
+        missing = self.variables - variables.keys()
+        if missing:
+            raise NameError(f"Unbound variable(s): {', '.join(sorted(missing))}")
+
+        namespace = dict(functions)
+        namespace["_mul"] = _safe_mul
+        namespace.update(CONSTANTS)
+        namespace.update({name: variables[name] for name in self.variables})
+        return eval(self.code, {"__builtins__": {}}, namespace)
+
+
+class SafeExpressionCompiler:
+    """
+    Parses arithmetic expressions into a whitelisted AST and compiles them once.
+
+    Compiled expressions are cached by their text, so repeated evaluations
+    (and every row of a batch) skip parsing and validation entirely.
+    """
+
+    ALLOWED_NODES = (
+        ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call,
+        ast.Constant, ast.Name, ast.Load, ast.Tuple, ast.List,
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+        ast.UAdd, ast.USub,
+        ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+    )
+
+    def __init__(self, max_cache_entries: int = 1024):
+        self.max_cache_entries = max_cache_entries
+        self._cache: "OrderedDict[str, CompiledExpression]" = OrderedDict()
+
+    def compile(self, expression: str) -> CompiledExpression:
+        """
+        Validate and compile an expression, reusing the cached result.
+
+        Raises:
+            SyntaxError: If the expression does not parse
+            UnsafeExpressionError: If it uses anything outside the whitelist
+        """
+        expression = expression.strip()
+        compiled = self._cache.get(expression)
+        if compiled is not None:
+            self._cache.move_to_end(expression)
+            return compiled
+
+        tree = ast.parse(expression, mode="eval")
+        variables = self._validate(tree)
+        tree = ast.fix_missing_locations(_OperatorRewriter().visit(tree))
+        compiled = CompiledExpression(expression, compile(tree, "<calculate>", "eval"), variables)
+
+        self._cache[expression] = compiled
+        while len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+
+        return compiled
+
+    def _validate(self, tree: ast.AST) -> Set[str]:
+        """Check every node against the whitelist and collect free variable names."""
+        variables = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, self.ALLOWED_NODES):
+                raise UnsafeExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+            if isinstance(node, ast.Constant) and (
+                isinstance(node.value, bool) or not isinstance(node.value, (int, float))
+            ):
+                raise UnsafeExpressionError(f"Unsupported constant: {node.value!r}")
+
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in SCALAR_FUNCTIONS:
+                    raise UnsafeExpressionError("Only whitelisted math functions can be called")
+                if node.keywords:
+                    raise UnsafeExpressionError("Keyword arguments are not supported")
+
+            if isinstance(node, ast.Name) and node.id not in SCALAR_FUNCTIONS \
+                    and node.id not in CONSTANTS:
+                if node.id.startswith("_"):
+                    raise UnsafeExpressionError(f"Invalid variable name: {node.id}")
+                variables.add(node.id)
+
+        return variables
+
+    def evaluate(self, expression: str, variables: Optional[Dict[str, Any]] = None):
+        """Compile (cached) and evaluate an expression with scalar bindings."""
+        return self.compile(expression)(variables)
+
+    def evaluate_batch(
+        self,
+        expression: str,
+        variables: Dict[str, Any],
+        grid: bool = False
+    ):
+        """
+        Evaluate one expression across arrays of variable bindings.
+
+        Args:
+            expression: Arithmetic expression
+            variables: Variable name to scalar or 1-D array of values
+            grid: If True, evaluate over the cartesian product of the array
+                variables (one axis per array, in the given order); otherwise
+                the arrays are broadcast element-wise
+
+        Returns:
+            NumPy array of results
+        """
+        compiled = self.compile(expression)
+        if grid and variables:
+            # Array-valued variables become grid axes; scalars stay scalars
+            names = [name for name, value in variables.items() if np.ndim(value) > 0]
+            axes = np.meshgrid(
+                *(np.asarray(variables[name], dtype=float) for name in names),
+                indexing="ij"
+            )
+            variables = {**variables, **dict(zip(names, axes))}
+        return compiled.evaluate_batch(variables)
+
+
+# Global compiler instance
+expression_compiler = SafeExpressionCompiler()
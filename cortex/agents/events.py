@@ -0,0 +1,47 @@
+"""
+Cortex V2 Agentic System - Step Events
+Delivers agentic step start/finish events to whoever is listening for the current request.
+"""
+
+import json
+from contextvars import ContextVar, Token
+from typing import Dict, Any, Callable, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+StepListener = Callable[[Dict[str, Any]], None]
+
+# Set per request; tasks spawned by the orchestrator inherit it
+_step_listener: ContextVar[Optional[StepListener]] = ContextVar("agent_step_listener", default=None)
+
+
+def set_step_listener(listener: Optional[StepListener]) -> Token:
+    """
+    Route step events in the current context to `listener`.
+
+    Returns:
+        Token for reset_step_listener
+    """
+    return _step_listener.set(listener)
+
+
+def reset_step_listener(token: Token):
+    """Restore the listener that was active before set_step_listener."""
+    _step_listener.reset(token)
+
+
+def emit_step_event(event: Dict[str, Any]):
+    """Send an event to the current listener, if any. Never raises."""
+    listener = _step_listener.get()
+    if listener is None:
+        return
+    try:
+        listener(event)
+    except Exception as e:
+        logger.warning("step_event_listener_failed", error=str(e))
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
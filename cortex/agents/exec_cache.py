@@ -0,0 +1,160 @@
+"""
+Cortex V2 Agentic System - Execution Cache
+Content-addressed cache of sandbox execution results.
+"""
+
+import ast
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable
+import structlog
+
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+from cortex.storage.redis_client import redis_client
+
+logger = structlog.get_logger()
+
+# Builtins whose results differ between interpreter processes
+NONDETERMINISTIC_BUILTINS = {"hash", "id", "input"}
+
+# After a Redis error, serve from the in-process tier alone for this long
+REDIS_RETRY_SECONDS = 30.0
+
+
+class ExecutionCache:
+    """
+    Two-tier (in-process LRU + Redis) cache for execute_python results.
+
+    Keys are a hash of the normalized code (its AST dump, so comments and
+    formatting do not matter) plus the interpreter version. Code that imports
+    a non-deterministic module (time, random, ...) is never cached unless
+    explicitly allowed.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        use_redis: Optional[bool] = None,
+        nondeterministic_modules: Optional[Iterable[str]] = None,
+        allow_nondeterministic: Optional[bool] = None
+    ):
+        self.max_entries = max_entries or settings.sandbox_cache_max_entries
+        self.ttl = ttl or settings.sandbox_cache_ttl
+        self.use_redis = settings.sandbox_cache_redis if use_redis is None else use_redis
+        self.nondeterministic_modules = set(
+            nondeterministic_modules or settings.sandbox_cache_nondeterministic_modules
+        )
+        self.allow_nondeterministic = (
+            settings.sandbox_cache_allow_nondeterministic
+            if allow_nondeterministic is None else allow_nondeterministic
+        )
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._redis_retry_at = 0.0
+
+        logger.info(
+            "execution_cache_initialized",
+            max_entries=self.max_entries,
+            ttl=self.ttl,
+            redis=self.use_redis
+        )
+
+    def make_key(self, code: str) -> Optional[str]:
+        """
+        Cache key for code, or None if the code must not be cached.
+
+        Args:
+            code: Python source
+
+        Returns:
+            Hex digest key, or None for unparseable or non-deterministic code
+        """
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return None
+
+        if not self.allow_nondeterministic and not self._is_deterministic(tree):
+            return None
+
+        normalized = ast.dump(tree, annotate_fields=False)
+        digest = hashlib.sha256(f"{sys.version}\n{normalized}".encode("utf-8")).hexdigest()
+        return digest
+
+    def _is_deterministic(self, tree: ast.AST) -> bool:
+        """Check that the code imports no non-deterministic module."""
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                modules = [node.module or ""]
+            elif isinstance(node, ast.Name) and node.id in NONDETERMINISTIC_BUILTINS:
+                return False
+            else:
+                continue
+
+            if any(module.split(".")[0] in self.nondeterministic_modules for module in modules):
+                return False
+        return True
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a result in memory, then Redis."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                metrics_collector.record_cache_hit("sandbox_execution")
+                return dict(result)
+            del self._entries[key]
+
+        if self._redis_usable():
+            try:
+                result = await redis_client.get_exec_cache(key)
+            except Exception as e:
+                self._mark_redis_down(e)
+                result = None
+
+            if result is not None:
+                self._store_local(key, result)
+                metrics_collector.record_cache_hit("sandbox_execution")
+                return dict(result)
+
+        metrics_collector.record_cache_miss("sandbox_execution")
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        """Store a result in both tiers."""
+        self._store_local(key, result)
+
+        if self._redis_usable():
+            try:
+                await redis_client.set_exec_cache(key, result, self.ttl)
+            except Exception as e:
+                self._mark_redis_down(e)
+
+    def _redis_usable(self) -> bool:
+        return self.use_redis and time.monotonic() >= self._redis_retry_at
+
+    def _mark_redis_down(self, error: Exception):
+        """Skip Redis for the next retry interval instead of failing on every execution."""
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.debug("execution_cache_redis_unavailable", error=str(error), retry_in=REDIS_RETRY_SECONDS)
+
+    def _store_local(self, key: str, result: Dict[str, Any]):
+        """Insert into the in-process LRU, evicting the oldest entries."""
+        self._entries[key] = (time.time() + self.ttl, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all in-process entries."""
+        self._entries.clear()
+
+
+# Global execution cache (shared by every ToolExecutor in the process)
+execution_cache = ExecutionCache()
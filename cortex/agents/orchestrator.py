@@ -3,15 +3,24 @@ Cortex V2 Agentic System - Orchestrator
 The central coordinator that breaks down tasks and routes to specialized workers.
 """
 
+import ast
+import asyncio
+import builtins
 import json
 import re
+import time
 from typing import Dict, List, Any, Optional, Tuple
 from enum import Enum
 import structlog
 
+from cortex.config import settings
 from cortex.llm.executor import litellm_executor
 from cortex.agents.workers import WorkerManager
 from cortex.agents.tools import ToolExecutor
+from cortex.agents.events import emit_step_event
+from cortex.observability.metrics import metrics_collector
+from cortex.observability.traces import trace_store, TraceRecord
+from cortex.vision.preprocessor import image_preprocessor
 
 logger = structlog.get_logger()
 
@@ -28,13 +37,96 @@ class TaskType(str, Enum):
 
 class AgenticStep:
     """Represents a single step in the agentic loop."""
-    def __init__(self, step_number: int, action: str, input_data: Any, output_data: Any = None, error: str = None):
+    
+    SUMMARY_MAX_CHARS = 200
+    
+    def __init__(
+        self,
+        step_number: int,
+        action: str,
+        input_data: Any,
+        output_data: Any = None,
+        error: str = None,
+        start: bool = True
+    ):
         self.step_number = step_number
         self.action = action
         self.input_data = input_data
         self.output_data = output_data
         self.error = error
-        self.timestamp = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        if start:
+            self.start()
+    
+    @property
+    def worker(self) -> Optional[str]:
+        if isinstance(self.input_data, dict):
+            return self.input_data.get("worker")
+        return None
+    
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+    
+    def start(self):
+        """Mark the step as started and notify step listeners."""
+        self.started_at = time.time()
+        emit_step_event(self.to_event("step_started"))
+    
+    def finish(self):
+        """Mark the step as finished (once) and notify step listeners."""
+        if self.finished_at is not None:
+            return
+        if self.started_at is None:
+            self.started_at = time.time()
+        self.finished_at = time.time()
+        emit_step_event(self.to_event("step_finished"))
+    
+    def to_event(self, event_type: str) -> Dict[str, Any]:
+        """Compact, JSON-safe description of the step for clients."""
+        event = {
+            "type": event_type,
+            "step": self.step_number,
+            "action": self.action,
+            "worker": self.worker,
+            "started_at": self.started_at,
+            "input": self._summarize(self.input_data)
+        }
+        if event_type == "step_finished":
+            event.update({
+                "finished_at": self.finished_at,
+                "duration_ms": self.duration_ms,
+                "success": self.error is None,
+                "output": self._summarize(self.output_data),
+                "error": self.error[:self.SUMMARY_MAX_CHARS] if self.error else None
+            })
+        return event
+    
+    @classmethod
+    def _summarize(cls, data: Any) -> Any:
+        """Keep the scalar fields of step data, truncating long strings."""
+        if isinstance(data, dict):
+            return {
+                key: cls._summarize(value)
+                for key, value in data.items()
+                if isinstance(value, (str, int, float, bool, type(None), list))
+            }
+        if isinstance(data, list):
+            return [cls._summarize(item) for item in data[:10]]
+        if isinstance(data, str) and len(data) > cls.SUMMARY_MAX_CHARS:
+            return data[:cls.SUMMARY_MAX_CHARS] + "..."
+        return data
+
+
+class StepLog(list):
+    """List of AgenticSteps that finishes each step as it is recorded."""
+    
+    def append(self, step: AgenticStep):
+        step.finish()
+        super().append(step)
 
 
 class Orchestrator:
@@ -47,12 +139,64 @@ class Orchestrator:
     5. Consolidate final response
     """
     
+    # Tools the math agent may call locally
+    MATH_TOOLS = ["calculate", "calculate_batch"]
+    
+    CALC_PROTOCOL_PROMPT = (
+        "You have an exact local calculator. Never do arithmetic by hand. "
+        "Whenever a step needs a numeric result, write a line of the form\n"
+        "CALC: <expression>\n"
+        "using Python-style arithmetic (+ - * / // % **, sqrt, log, log10, exp, "
+        "pow, abs, round, min, max, sum, factorial, ceil, floor, sin, cos, tan, pi, e) "
+        "and stop. You will receive lines of the form 'RESULT: <expression> = <value>'. "
+        "When no more arithmetic is needed, give the final answer without CALC lines."
+    )
+    CALC_LINE_PATTERN = re.compile(r"^[ \t]*CALC:[ \t]*(.+?)[ \t]*$", re.MULTILINE)
+    
+    # Map-reduce reasoning prompts and latency priors (seconds, used until traces exist)
+    DECOMPOSITION_PROMPT = (
+        "Split the request below into at most {max_questions} independent sub-questions "
+        "that can be answered separately and combined into a complete answer. "
+        "Each sub-question must make sense on its own. Reply with only a JSON array "
+        "of strings. If the request cannot be split, reply with [].\n\nRequest:\n{request}"
+    )
+    SUB_QUESTION_PROMPT = (
+        "You are answering one part of a larger request.\n\nFull request:\n{request}\n\n"
+        "Answer only this part, thoroughly but without repeating the rest:\n{question}"
+    )
+    SYNTHESIS_PROMPT = (
+        "Specialists answered parts of my request separately. Combine their findings "
+        "into one coherent, complete answer to the request. Resolve any contradictions "
+        "and do not mention the sub-questions.\n\n{findings}"
+    )
+    DECOMPOSITION_PRIOR_SECONDS = {
+        "chain_of_thought": 90.0,
+        "decompose": 2.0,
+        "sub_question": 25.0,
+        "synthesize": 15.0
+    }
+    
+    # Cascade verifier
+    CASCADE_RATING_PROMPT = (
+        "Rate how completely and correctly the answer addresses the request, from 1 "
+        "(wrong or missing key parts) to 10 (complete and correct). Be strict. "
+        "Reply with only the number.\n\nRequest:\n{request}\n\nAnswer:\n{answer}"
+    )
+    CASCADE_REFUSAL_PHRASES = (
+        "i'm not sure", "i am not sure", "i don't know", "i do not know",
+        "i cannot", "i can't", "i'm unable", "i am unable", "as an ai",
+        "beyond my", "not enough information"
+    )
+    
     def __init__(self):
         self.worker_manager = WorkerManager()
         self.tool_executor = ToolExecutor()
         self.max_steps = 10
         self.max_retries = 3
         
+        # Moving average of tokens used by escalated cascade requests, per category
+        self._escalation_tokens: Dict[str, float] = {}
+        
         # Task classification patterns
         self.task_patterns = {
             TaskType.CODE_GENERATION: [
@@ -166,8 +310,12 @@ class Orchestrator:
             message_count=len(messages)
         )
         
-        steps = []
+        steps = StepLog()
         current_step = 1
+        started_at = time.time()
+        task_type = None
+        execution_plan = None
+        success = False
         
         try:
             # Step 1: Analyze the user request
@@ -193,13 +341,12 @@ class Orchestrator:
             )
             
             # Step 3: Plan execution strategy
+            step = AgenticStep(current_step, "create_plan", {"task_type": task_type})
             execution_plan = await self._create_execution_plan(
                 task_type, user_message, messages, request_id
             )
-            
-            steps.append(AgenticStep(
-                current_step, "create_plan", {"task_type": task_type}, execution_plan
-            ))
+            step.output_data = execution_plan
+            steps.append(step)
             current_step += 1
             
             # Step 4: Execute the agentic loop
@@ -214,6 +361,7 @@ class Orchestrator:
                 task_type=task_type
             )
             
+            success = True
             return final_response
             
         except Exception as e:
@@ -227,6 +375,11 @@ class Orchestrator:
             
             # Fallback to simple response
             return await self._fallback_response(messages, user_id, request_id, **kwargs)
+        
+        finally:
+            trace_store.record(TraceRecord.from_steps(
+                request_id, user_id, task_type, execution_plan, steps, started_at, success
+            ))
     
     async def _classify_task(self, user_message: str, has_image: bool) -> TaskType:
         """Classify the user's request into a task type with smart priority routing."""
@@ -343,9 +496,9 @@ class Orchestrator:
             plan.update({
                 "worker": "worker_math",
                 "requires_tools": True,
-                "max_iterations": 2,
+                "max_iterations": settings.math_agent_max_rounds,
                 "strategy": "mathematical_solver",
-                "tools": ["calculate"]
+                "tools": self.MATH_TOOLS
             })
             
         elif task_type == TaskType.IMAGE_ANALYSIS:
@@ -367,6 +520,14 @@ class Orchestrator:
                 "strategy": "chain_of_thought"
             })
             
+            # Large requests: split into sub-questions if that is expected to finish sooner
+            if settings.decomposition_enabled and len(user_message) >= settings.decomposition_min_chars:
+                estimate = self._estimate_decomposition_gain(user_message)
+                plan["decomposition_estimate"] = estimate
+                if estimate["single_call_observed"] \
+                        and estimate["gain_seconds"] >= settings.decomposition_min_gain_seconds:
+                    plan["strategy"] = "map_reduce_reasoning"
+            
         else:  # SIMPLE_CHAT
             # SPECIALIST: Simple Chat → Groq Llama 8B (Ultra-fast)
             plan.update({
@@ -376,6 +537,15 @@ class Orchestrator:
                 "strategy": "direct_response"
             })
         
+        # Cascade: try the cheap draft worker first for categories with a policy
+        min_confidence = settings.cascade_policy.get(task_type.value) if settings.cascade_enabled else None
+        if min_confidence is not None and plan["worker"] != settings.cascade_draft_worker:
+            plan.update({
+                "escalation_strategy": plan["strategy"],
+                "strategy": "cascade",
+                "cascade_min_confidence": min_confidence
+            })
+        
         logger.debug(
             "execution_plan_created",
             request_id=request_id,
@@ -436,6 +606,14 @@ class Orchestrator:
             return await self._run_reasoning_agent(
                 messages, worker, request_id, steps, current_step, max_iterations
             )
+        elif strategy == "cascade":
+            return await self._run_cascade(
+                execution_plan, messages, user_id, request_id, steps, current_step
+            )
+        elif strategy == "map_reduce_reasoning":
+            return await self._run_decomposed_reasoning(
+                messages, worker, request_id, steps, current_step, max_iterations
+            )
         else:  # direct_response
             return await self._run_direct_response(
                 messages, worker, request_id, steps, current_step
@@ -456,12 +634,13 @@ class Orchestrator:
         logger.info("coding_agent_started", request_id=request_id, worker=worker)
         
         current_messages = messages.copy()
+        semaphore = asyncio.Semaphore(settings.coding_agent_max_parallel_blocks)
         
         for iteration in range(max_iterations):
             # Step: Generate code
             step = AgenticStep(
                 current_step, f"generate_code_iteration_{iteration + 1}", 
-                {"messages": len(current_messages)}
+                {"worker": worker, "messages": len(current_messages)}
             )
             
             try:
@@ -477,44 +656,56 @@ class Orchestrator:
                 current_step += 1
                 
                 # Check if response contains code that needs execution
+                iteration_errors = []
                 if self._contains_code(response):
                     code_blocks = self._extract_code_blocks(response)
+                    block_groups = self._group_code_blocks(code_blocks)
                     
-                    for i, code_block in enumerate(code_blocks):
-                        # Step: Execute code
-                        exec_step = AgenticStep(
-                            current_step, f"execute_code_block_{i + 1}",
-                            {"code_length": len(code_block)}
+                    # Independent groups run concurrently; dependent blocks share a session
+                    exec_steps = [
+                        AgenticStep(
+                            current_step + offset,
+                            "execute_code_block_" + "_".join(str(i + 1) for i in group),
+                            {
+                                "code_length": sum(len(code_blocks[i]) for i in group),
+                                "blocks": [i + 1 for i in group]
+                            },
+                            start=False  # started once it gets a semaphore slot
                         )
-                        
-                        try:
-                            execution_result = await self.tool_executor.execute_python(code_block)
-                            exec_step.output_data = {
-                                "success": execution_result.get("success", False),
-                                "output_length": len(str(execution_result.get("output", "")))
-                            }
-                            
-                            # If execution failed, add error context for next iteration
-                            if not execution_result.get("success", False):
-                                error_message = execution_result.get("error", "Unknown error")
-                                current_messages.append({
-                                    "role": "user",
-                                    "content": f"The code execution failed with error: {error_message}. Please fix the code."
-                                })
-                                exec_step.error = error_message
-                                
-                        except Exception as e:
-                            exec_step.error = str(e)
-                            current_messages.append({
-                                "role": "user", 
-                                "content": f"Code execution failed: {str(e)}. Please provide a corrected version."
-                            })
-                        
+                        for offset, group in enumerate(block_groups)
+                    ]
+                    
+                    await asyncio.gather(*(
+                        self._execute_code_group(
+                            [code_blocks[i] for i in group], exec_step, semaphore
+                        )
+                        for group, exec_step in zip(block_groups, exec_steps)
+                    ))
+                    
+                    for exec_step in exec_steps:
                         steps.append(exec_step)
                         current_step += 1
+                        if exec_step.error:
+                            iteration_errors.append((exec_step.input_data["blocks"], exec_step.error))
+                    
+                    # Feed every failure back in a single correction message
+                    if iteration_errors:
+                        current_messages.append({
+                            "role": "user",
+                            "content": self._format_execution_errors(iteration_errors)
+                        })
+                    
+                    logger.info(
+                        "code_blocks_executed",
+                        request_id=request_id,
+                        iteration=iteration + 1,
+                        blocks=len(code_blocks),
+                        groups=len(block_groups),
+                        failed_groups=len(iteration_errors)
+                    )
                 
                 # If no errors or this is the last iteration, return response
-                if iteration == max_iterations - 1 or not any(step.error for step in steps[-2:]):
+                if iteration == max_iterations - 1 or not iteration_errors:
                     return response
                     
             except Exception as e:
@@ -528,6 +719,99 @@ class Orchestrator:
         # Should not reach here, but fallback
         return await self._fallback_response(messages, "", request_id)
     
+    async def _execute_code_group(
+        self,
+        code_blocks: List[str],
+        exec_step: AgenticStep,
+        semaphore: asyncio.Semaphore
+    ):
+        """Execute a group of dependent code blocks as one session and record the outcome."""
+        async with semaphore:
+            exec_step.start()
+            try:
+                execution_result = await self.tool_executor.execute_python("\n\n".join(code_blocks))
+                exec_step.output_data = {
+                    "success": execution_result.get("success", False),
+                    "output_length": len(str(execution_result.get("output", ""))),
+                    "output_preview": str(execution_result.get("output") or "")[:AgenticStep.SUMMARY_MAX_CHARS],
+                    "cached": execution_result.get("cached", False)
+                }
+                
+                if not execution_result.get("success", False):
+                    exec_step.error = execution_result.get("error") or "Unknown error"
+                    
+            except Exception as e:
+                exec_step.error = str(e)
+            finally:
+                exec_step.finish()
+    
+    def _group_code_blocks(self, code_blocks: List[str]) -> List[List[int]]:
+        """
+        Group code blocks by apparent dependency.
+        
+        A block depends on an earlier one when it reads a name the earlier block
+        defines. Dependent blocks are merged (in order) into one group; blocks
+        that cannot be parsed stay on their own.
+        
+        Returns:
+            Lists of block indices, ordered by their first block
+        """
+        parent = list(range(len(code_blocks)))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        defined_names = []
+        free_names = []
+        for code in code_blocks:
+            try:
+                tree = ast.parse(code)
+            except SyntaxError:
+                defined_names.append(set())
+                free_names.append(set())
+                continue
+            
+            defined, loaded = set(), set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Name):
+                    (defined if isinstance(node.ctx, ast.Store) else loaded).add(node.id)
+                elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    defined.add(node.name)
+                elif isinstance(node, ast.alias):
+                    defined.add(node.asname or node.name.split(".")[0])
+            
+            defined_names.append(defined)
+            free_names.append(loaded - defined - set(dir(builtins)))
+        
+        for j in range(len(code_blocks)):
+            for i in range(j):
+                if free_names[j] & defined_names[i]:
+                    parent[find(j)] = find(i)
+        
+        groups: Dict[int, List[int]] = {}
+        for index in range(len(code_blocks)):
+            groups.setdefault(find(index), []).append(index)
+        
+        return sorted(groups.values(), key=lambda group: group[0])
+    
+    def _format_execution_errors(self, errors: List[Tuple[List[int], str]]) -> str:
+        """Combine execution failures into one correction message."""
+        if len(errors) == 1:
+            return f"The code execution failed with error: {errors[0][1]}. Please fix the code."
+        
+        sections = [
+            f"Code block {', '.join(str(b) for b in blocks)} failed with error:\n{error}"
+            for blocks, error in errors
+        ]
+        return (
+            f"{len(errors)} code executions failed.\n\n"
+            + "\n\n".join(sections)
+            + "\n\nPlease fix all of these issues in one corrected version."
+        )
+    
     async def _run_math_agent(
         self,
         messages: List[Dict[str, Any]],
@@ -537,16 +821,57 @@ class Orchestrator:
         current_step: int,
         max_iterations: int
     ) -> Dict[str, Any]:
-        """Run the mathematical reasoning agent."""
+        """
+        Run the mathematical reasoning agent.
+        
+        Arithmetic sub-steps are offloaded to the local calculator through
+        provider function calling, or through the CALC: text protocol for
+        workers without function calling. Each iteration is one LLM round.
+        """
         logger.info("math_agent_started", request_id=request_id, worker=worker)
         
-        # For now, delegate to the math worker
-        step = AgenticStep(current_step, "math_calculation", {"worker": worker})
+        worker_info = self.worker_manager.get_worker_info(worker) or {}
+        use_function_calling = (
+            settings.math_agent_function_calling and worker_info.get("supports_tools", False)
+        )
+        mode = "function_calling" if use_function_calling else "calc_protocol"
+        
+        step = AgenticStep(current_step, "math_calculation", {"worker": worker, "mode": mode})
         
         try:
-            response = await self.worker_manager.call_worker(worker, messages, request_id)
-            step.output_data = {"success": True}
+            if use_function_calling:
+                try:
+                    response, stats = await self._math_function_calling_loop(
+                        messages, worker, request_id, max_iterations
+                    )
+                except Exception as e:
+                    logger.warning(
+                        "math_function_calling_failed",
+                        request_id=request_id,
+                        worker=worker,
+                        error=str(e),
+                        fallback="calc_protocol"
+                    )
+                    mode = "calc_protocol"
+                    response, stats = await self._math_calc_protocol_loop(
+                        messages, worker, request_id, max_iterations
+                    )
+            else:
+                response, stats = await self._math_calc_protocol_loop(
+                    messages, worker, request_id, max_iterations
+                )
+            
+            step.output_data = {"success": True, "mode": mode, **stats}
             steps.append(step)
+            
+            metrics_collector.record_math_agent(
+                mode=mode,
+                tool_calls=stats["tool_calls"],
+                completion_tokens=response["usage"]["completion_tokens"],
+                tokens_saved=stats["tokens_saved_estimate"]
+            )
+            logger.info("math_agent_completed", request_id=request_id, mode=mode, **stats)
+            
             return response
             
         except Exception as e:
@@ -554,6 +879,144 @@ class Orchestrator:
             steps.append(step)
             raise
     
+    async def _math_function_calling_loop(
+        self,
+        messages: List[Dict[str, Any]],
+        worker: str,
+        request_id: str,
+        max_rounds: int
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Bounded tool-calling loop using provider function calling."""
+        tools = self.tool_executor.get_tool_schemas(self.MATH_TOOLS)
+        conversation = list(messages)
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        stats = {"rounds": 0, "tool_calls": 0, "tokens_saved_estimate": 0}
+        
+        for round_index in range(max_rounds):
+            # On the last round the model must answer with what it has
+            tool_choice = "none" if round_index == max_rounds - 1 else "auto"
+            response = await self.worker_manager.call_worker(
+                worker, conversation, request_id, tools=tools, tool_choice=tool_choice
+            )
+            stats["rounds"] += 1
+            self._add_usage(usage, response)
+            
+            message = response["choices"][0]["message"]
+            tool_calls = message.get("tool_calls")
+            if not tool_calls:
+                break
+            
+            conversation.append({
+                "role": "assistant",
+                "content": message.get("content"),
+                "tool_calls": tool_calls
+            })
+            
+            for tool_call in tool_calls[:settings.math_agent_max_calls_per_round]:
+                output = await self._run_math_tool(
+                    tool_call["function"]["name"], tool_call["function"].get("arguments"), stats
+                )
+                conversation.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "content": output
+                })
+            
+            for tool_call in tool_calls[settings.math_agent_max_calls_per_round:]:
+                conversation.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "content": "Error: too many tool calls in one turn"
+                })
+        
+        response["usage"] = usage
+        return response, stats
+    
+    async def _math_calc_protocol_loop(
+        self,
+        messages: List[Dict[str, Any]],
+        worker: str,
+        request_id: str,
+        max_rounds: int
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Bounded tool loop using "CALC: <expression>" lines for models without function calling."""
+        conversation = [{"role": "system", "content": self.CALC_PROTOCOL_PROMPT}] + list(messages)
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        stats = {"rounds": 0, "tool_calls": 0, "tokens_saved_estimate": 0}
+        
+        for round_index in range(max_rounds):
+            response = await self.worker_manager.call_worker(worker, conversation, request_id)
+            stats["rounds"] += 1
+            self._add_usage(usage, response)
+            
+            content = response["choices"][0]["message"].get("content") or ""
+            expressions = self.CALC_LINE_PATTERN.findall(content)
+            if not expressions:
+                break
+            
+            results = {}
+            for expression in expressions[:settings.math_agent_max_calls_per_round]:
+                results[expression] = await self._run_math_tool(
+                    "calculate", json.dumps({"expression": expression}), stats
+                )
+            
+            if round_index == max_rounds - 1:
+                # Out of rounds: inline the results rather than leave CALC lines
+                response["choices"][0]["message"]["content"] = self.CALC_LINE_PATTERN.sub(
+                    lambda match: f"{match.group(1)} = {results.get(match.group(1), '?')}",
+                    content
+                )
+                break
+            
+            conversation.append({"role": "assistant", "content": content})
+            conversation.append({
+                "role": "user",
+                "content": "\n".join(
+                    f"RESULT: {expression} = {output}" for expression, output in results.items()
+                ) + "\nContinue. Use CALC: again if you need more arithmetic, otherwise give the final answer."
+            })
+        
+        response["usage"] = usage
+        return response, stats
+    
+    async def _run_math_tool(
+        self,
+        tool_name: str,
+        arguments: Optional[str],
+        stats: Dict[str, Any]
+    ) -> str:
+        """Run one calculator call locally and return its output as text."""
+        if tool_name not in self.MATH_TOOLS:
+            return f"Error: unknown tool '{tool_name}'"
+        
+        try:
+            kwargs = json.loads(arguments) if arguments else {}
+        except (TypeError, ValueError):
+            return "Error: tool arguments must be a JSON object"
+        if not isinstance(kwargs, dict):
+            return "Error: tool arguments must be a JSON object"
+        
+        result = await self.tool_executor.execute_tool(tool_name, **kwargs)
+        stats["tool_calls"] += 1
+        
+        if not result.get("success"):
+            return f"Error: {result.get('error')}"
+        
+        output = result["output"]
+        # Tokens the model would otherwise spend working this out by hand:
+        # roughly the written-out step (4 chars/token) times a hand-work factor
+        stats["tokens_saved_estimate"] += int(
+            len(f"{kwargs.get('expression', '')} = {output}") / 4
+            * settings.math_agent_handwork_factor
+        )
+        return output
+    
+    @staticmethod
+    def _add_usage(totals: Dict[str, int], response: Dict[str, Any]):
+        """Accumulate token usage across LLM rounds."""
+        for key in totals:
+            totals[key] += response.get("usage", {}).get(key, 0) or 0
+    
     async def _run_vision_agent(
         self,
         messages: List[Dict[str, Any]],
@@ -568,8 +1031,16 @@ class Orchestrator:
         step = AgenticStep(current_step, "vision_analysis", {"worker": worker})
         
         try:
-            response = await self.worker_manager.call_worker(worker, messages, request_id)
-            step.output_data = {"success": True}
+            worker_messages = messages
+            preprocess_stats = {}
+            if settings.vision_preprocess_enabled:
+                worker_info = self.worker_manager.get_worker_info(worker) or {}
+                worker_messages, preprocess_stats = await image_preprocessor.prepare_messages(
+                    messages, max_dimension=worker_info.get("max_image_dimension"), model=worker
+                )
+            
+            response = await self.worker_manager.call_worker(worker, worker_messages, request_id)
+            step.output_data = {"success": True, "preprocessing": preprocess_stats}
             steps.append(step)
             return response
             
@@ -610,6 +1081,333 @@ class Orchestrator:
             steps.append(step)
             raise
     
+    async def _run_cascade(
+        self,
+        execution_plan: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        user_id: str,
+        request_id: str,
+        steps: List[AgenticStep],
+        current_step: int
+    ) -> Dict[str, Any]:
+        """
+        Answer with the cheap draft worker; escalate to the planned strategy if the draft is rejected.
+        
+        The verifier combines a heuristic check (truncation, refusals, hedging,
+        length) with, when CASCADE_VERIFIER is "self_rating", a 1-10 rating of
+        the draft by the draft worker itself. The lower score is the confidence.
+        """
+        category = str(execution_plan["task_type"].value)
+        draft_worker = settings.cascade_draft_worker
+        min_confidence = execution_plan["cascade_min_confidence"]
+        started = time.time()
+        user_message = self._extract_user_message(messages)
+        
+        logger.info("cascade_started", request_id=request_id, category=category, draft_worker=draft_worker)
+        
+        draft = None
+        cascade_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        step = AgenticStep(current_step, "cascade_draft", {"worker": draft_worker})
+        try:
+            draft = await self.worker_manager.call_worker(draft_worker, messages, request_id)
+            self._add_usage(cascade_usage, draft)
+            step.output_data = {"tokens": draft["usage"]["total_tokens"]}
+        except Exception as e:
+            step.error = str(e)
+        steps.append(step)
+        current_step += 1
+        
+        confidence = 0.0
+        if draft is not None:
+            step = AgenticStep(current_step, "cascade_verify", {
+                "worker": draft_worker if settings.cascade_verifier == "self_rating" else None,
+                "verifier": settings.cascade_verifier,
+                "min_confidence": min_confidence
+            })
+            try:
+                confidence, reasons = self._heuristic_confidence(user_message, draft)
+                if settings.cascade_verifier == "self_rating" and confidence >= min_confidence:
+                    rating = await self._self_rating(draft_worker, user_message, draft, request_id, cascade_usage)
+                    if rating is not None:
+                        confidence = min(confidence, rating)
+                        reasons.append(f"self_rating={rating:.1f}")
+                step.output_data = {
+                    "confidence": round(confidence, 2),
+                    "accepted": confidence >= min_confidence,
+                    "reasons": reasons
+                }
+            except Exception as e:
+                step.error = str(e)
+                confidence = 0.0
+            steps.append(step)
+            current_step += 1
+        
+        if draft is not None and confidence >= min_confidence:
+            # Direct-routing cost estimate: what escalations in this category have used
+            direct_tokens = self._escalation_tokens.get(category, cascade_usage["total_tokens"])
+            metrics_collector.record_cascade(
+                category=category,
+                escalated=False,
+                duration_seconds=time.time() - started,
+                tokens_saved=direct_tokens - cascade_usage["total_tokens"]
+            )
+            logger.info("cascade_accepted", request_id=request_id, category=category, confidence=confidence)
+            draft["usage"] = cascade_usage
+            return draft
+        
+        logger.info("cascade_escalated", request_id=request_id, category=category, confidence=confidence)
+        
+        escalation_plan = {**execution_plan, "strategy": execution_plan["escalation_strategy"]}
+        response = await self._execute_agentic_loop(
+            escalation_plan, messages, user_id, request_id, steps, current_step
+        )
+        
+        escalation_tokens = response.get("usage", {}).get("total_tokens", 0)
+        previous = self._escalation_tokens.get(category)
+        self._escalation_tokens[category] = (
+            escalation_tokens if previous is None else 0.8 * previous + 0.2 * escalation_tokens
+        )
+        metrics_collector.record_cascade(
+            category=category,
+            escalated=True,
+            duration_seconds=time.time() - started,
+            tokens_saved=-cascade_usage["total_tokens"]  # the rejected draft is pure overhead
+        )
+        
+        for key, value in cascade_usage.items():
+            response.setdefault("usage", {})[key] = response["usage"].get(key, 0) + value
+        return response
+    
+    def _heuristic_confidence(self, user_message: str, draft: Dict[str, Any]) -> Tuple[float, List[str]]:
+        """Score a draft 0-1 from cheap signals; returns (confidence, reasons)."""
+        choice = draft["choices"][0]
+        content = (choice["message"].get("content") or "").strip()
+        confidence, reasons = 1.0, []
+        
+        if not content:
+            return 0.0, ["empty"]
+        if choice.get("finish_reason") == "length":
+            confidence -= 0.5
+            reasons.append("truncated")
+        lowered = content.lower()
+        if any(phrase in lowered for phrase in self.CASCADE_REFUSAL_PHRASES):
+            confidence -= 0.5
+            reasons.append("refusal_or_hedge")
+        # Long, detailed requests deserve more than a one-liner
+        if len(content) < min(len(user_message) * 0.5, 400):
+            confidence -= 0.3
+            reasons.append("too_short")
+        
+        return max(confidence, 0.0), reasons
+    
+    async def _self_rating(
+        self,
+        worker: str,
+        user_message: str,
+        draft: Dict[str, Any],
+        request_id: str,
+        usage: Dict[str, int]
+    ) -> Optional[float]:
+        """Ask the draft worker to rate its own answer 1-10; returns 0-1 or None if unparseable."""
+        response = await self.worker_manager.call_worker(
+            worker,
+            [{"role": "user", "content": self.CASCADE_RATING_PROMPT.format(
+                request=user_message,
+                answer=draft["choices"][0]["message"].get("content") or ""
+            )}],
+            request_id,
+            max_tokens=5,
+            temperature=0
+        )
+        self._add_usage(usage, response)
+        match = re.search(r"\b(10|[1-9])\b", response["choices"][0]["message"].get("content") or "")
+        return int(match.group(1)) / 10 if match else None
+    
+    def _estimate_decomposition_gain(self, user_message: str) -> Dict[str, Any]:
+        """
+        Estimate the wall-clock gain of map-reduce decomposition over one reasoning call.
+        
+        Phase latencies are the median of recent traces for each step action,
+        falling back to DECOMPOSITION_PRIOR_SECONDS until enough history exists.
+        The sub-question count is guessed from the request's list items and
+        question marks. The plan only trusts the estimate once the single
+        call's latency has been observed (`single_call_observed`); the priors
+        alone would favour decomposition for every large request.
+        """
+        def phase_seconds(action: str, worker: Optional[str] = None) -> float:
+            observed_ms = trace_store.step_latency(action, worker=worker)
+            if observed_ms is None:
+                return self.DECOMPOSITION_PRIOR_SECONDS[action]
+            return observed_ms / 1000
+        
+        items = len(re.findall(r"^\s*(?:[-*•]|\d+[.)])\s+", user_message, re.MULTILINE))
+        questions = user_message.count("?")
+        sub_questions = max(2, min(settings.decomposition_max_subquestions, max(items, questions)))
+        waves = -(-sub_questions // settings.decomposition_max_parallel)
+        
+        single_observed = trace_store.step_latency("chain_of_thought", worker="worker_logic") is not None
+        single = phase_seconds("chain_of_thought", "worker_logic")
+        decomposed = (
+            phase_seconds("decompose")
+            + waves * phase_seconds("sub_question")
+            + phase_seconds("synthesize")
+        )
+        
+        return {
+            "expected_sub_questions": sub_questions,
+            "single_call_seconds": round(single, 2),
+            "decomposed_seconds": round(decomposed, 2),
+            "gain_seconds": round(single - decomposed, 2),
+            "single_call_observed": single_observed
+        }
+    
+    async def _run_decomposed_reasoning(
+        self,
+        messages: List[Dict[str, Any]],
+        worker: str,
+        request_id: str,
+        steps: List[AgenticStep],
+        current_step: int,
+        max_iterations: int
+    ) -> Dict[str, Any]:
+        """
+        Map-reduce reasoning: decompose, answer sub-questions concurrently, synthesize.
+        
+        Falls back to a single chain-of-thought call when decomposition does
+        not yield at least two sub-questions or every sub-question fails.
+        """
+        logger.info("decomposed_reasoning_started", request_id=request_id)
+        
+        user_message = self._extract_user_message(messages)
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        
+        # Map phase 1: decompose with the fast planner
+        step = AgenticStep(current_step, "decompose", {"worker": "orchestrator"})
+        try:
+            response = await self.worker_manager.call_worker(
+                "orchestrator",
+                [{"role": "user", "content": self.DECOMPOSITION_PROMPT.format(
+                    max_questions=settings.decomposition_max_subquestions,
+                    request=user_message
+                )}],
+                request_id
+            )
+            self._add_usage(usage, response)
+            sub_questions = self._parse_sub_questions(
+                response["choices"][0]["message"].get("content") or ""
+            )[:settings.decomposition_max_subquestions]
+            step.output_data = {"sub_questions": len(sub_questions)}
+        except Exception as e:
+            step.error = str(e)
+            sub_questions = []
+        steps.append(step)
+        decompose_step = step
+        current_step += 1
+        
+        if len(sub_questions) < 2:
+            logger.info("decomposition_skipped", request_id=request_id, sub_questions=len(sub_questions))
+            return await self._run_reasoning_agent(
+                messages, worker, request_id, steps, current_step, max_iterations
+            )
+        
+        # Map phase 2: answer sub-questions concurrently across workers
+        context = [msg for msg in messages if msg.get("role") == "system"]
+        sub_workers = settings.decomposition_workers or [worker]
+        semaphore = asyncio.Semaphore(settings.decomposition_max_parallel)
+        sub_steps = [
+            AgenticStep(
+                current_step + index,
+                f"sub_question_{index + 1}",
+                {"worker": sub_workers[index % len(sub_workers)], "question": question},
+                start=False  # started once it gets a semaphore slot
+            )
+            for index, question in enumerate(sub_questions)
+        ]
+        
+        async def answer(sub_step: AgenticStep) -> Optional[str]:
+            async with semaphore:
+                sub_step.start()
+                try:
+                    sub_response = await self.worker_manager.call_worker(
+                        sub_step.worker,
+                        context + [{"role": "user", "content": self.SUB_QUESTION_PROMPT.format(
+                            request=user_message, question=sub_step.input_data["question"]
+                        )}],
+                        request_id
+                    )
+                    self._add_usage(usage, sub_response)
+                    content = sub_response["choices"][0]["message"].get("content") or ""
+                    sub_step.output_data = {"response_length": len(content)}
+                    return content
+                except Exception as e:
+                    sub_step.error = str(e)
+                    return None
+                finally:
+                    sub_step.finish()
+        
+        answers = await asyncio.gather(*(answer(sub_step) for sub_step in sub_steps))
+        for sub_step in sub_steps:
+            steps.append(sub_step)
+        current_step += len(sub_steps)
+        
+        answered = [
+            (sub_step.input_data["question"], content)
+            for sub_step, content in zip(sub_steps, answers) if content
+        ]
+        if not answered:
+            logger.warning("decomposition_sub_questions_failed", request_id=request_id)
+            return await self._run_reasoning_agent(
+                messages, worker, request_id, steps, current_step, max_iterations
+            )
+        
+        # Reduce: synthesize one answer
+        synthesis_worker = settings.decomposition_synthesis_worker
+        step = AgenticStep(current_step, "synthesize", {"worker": synthesis_worker, "answers": len(answered)})
+        try:
+            findings = "\n\n".join(
+                f"### Sub-question {index}: {question}\n{content}"
+                for index, (question, content) in enumerate(answered, 1)
+            )
+            response = await self.worker_manager.call_worker(
+                synthesis_worker,
+                messages + [{"role": "user", "content": self.SYNTHESIS_PROMPT.format(findings=findings)}],
+                request_id
+            )
+            self._add_usage(usage, response)
+            step.output_data = {"success": True}
+            steps.append(step)
+        except Exception as e:
+            step.error = str(e)
+            steps.append(step)
+            raise
+        
+        logger.info(
+            "decomposed_reasoning_completed",
+            request_id=request_id,
+            sub_questions=len(sub_steps),
+            answered=len(answered),
+            decompose_ms=round(decompose_step.duration_ms or 0, 1),
+            sub_question_ms={
+                sub_step.action: round(sub_step.duration_ms or 0, 1) for sub_step in sub_steps
+            },
+            synthesize_ms=round(step.duration_ms or 0, 1)
+        )
+        
+        response["usage"] = usage
+        return response
+    
+    @staticmethod
+    def _parse_sub_questions(content: str) -> List[str]:
+        """Extract the JSON array of sub-questions from the planner's reply."""
+        match = re.search(r"\[.*\]", content, re.DOTALL)
+        if not match:
+            return []
+        try:
+            parsed = json.loads(match.group(0))
+        except ValueError:
+            return []
+        return [str(item).strip() for item in parsed if isinstance(item, str) and item.strip()]
+    
     async def _run_direct_response(
         self,
         messages: List[Dict[str, Any]],
@@ -0,0 +1,304 @@
+"""
+Cortex V2 Agentic System - Sandbox Pool
+Pre-started Python interpreters that execute code snippets over a pipe.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from typing import Dict, Any, Optional
+import structlog
+
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+
+logger = structlog.get_logger()
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+
+class SandboxUnavailableError(Exception):
+    """Raised when the pool cannot provide a worker; callers fall back to spawn-per-run."""
+
+
+class SandboxWorker:
+    """Handle on one pre-started sandbox interpreter."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.runs = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def kill(self):
+        """Terminate the interpreter, and any run it forked, and reap it."""
+        if hasattr(os, "killpg"):
+            # The worker leads its own session; this includes a forked run it is waiting on
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        elif self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+        try:
+            await self.process.wait()
+        except Exception:
+            pass
+
+
+class SandboxPool:
+    """
+    Pool of warm sandbox workers.
+
+    Each worker runs with an address-space rlimit for its lifetime and a CPU
+    rlimit per run. Workers are recycled after `max_runs` executions or after
+    any violation (timeout, CPU/memory limit, output cap, crash).
+
+    Isolation between runs: on POSIX a worker forks a child per run (see
+    sandbox_worker), so patched modules or builtins, threads and open files
+    die with the run that created them and the warm interpreter itself only
+    ever parses requests. Without fork() (Windows) runs share the worker's
+    interpreter and only get a fresh namespace; state a run leaves behind
+    is visible to later runs until the worker is recycled after `max_runs`.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_runs: Optional[int] = None,
+        cpu_seconds: Optional[int] = None,
+        memory_mb: Optional[int] = None,
+        max_output_chars: Optional[int] = None
+    ):
+        self.size = size or settings.sandbox_pool_size
+        self.max_runs = max_runs or settings.sandbox_max_runs_per_worker
+        self.cpu_seconds = settings.sandbox_cpu_seconds if cpu_seconds is None else cpu_seconds
+        self.memory_mb = settings.sandbox_memory_mb if memory_mb is None else memory_mb
+        self.max_output_chars = max_output_chars or settings.sandbox_max_output_chars
+        self.start_timeout = 10  # seconds
+        self.acquire_timeout = settings.sandbox_acquire_timeout
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._spawned = 0
+        self._closed = False
+        self._replenish_tasks: set = set()
+
+        logger.info(
+            "sandbox_pool_initialized",
+            size=self.size,
+            max_runs=self.max_runs,
+            cpu_seconds=self.cpu_seconds,
+            memory_mb=self.memory_mb
+        )
+
+    async def start(self):
+        """Warm up the pool by starting all workers concurrently."""
+        missing = self.size - self._spawned
+        if missing <= 0:
+            return
+
+        results = await asyncio.gather(
+            *(self._add_worker() for _ in range(missing)), return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+
+        logger.info(
+            "sandbox_pool_warmed",
+            workers=self._spawned,
+            failures=len(failures)
+        )
+
+    async def close(self):
+        """Stop all idle workers; busy workers are killed when released."""
+        self._closed = True
+        for task in list(self._replenish_tasks):
+            task.cancel()
+        if self._replenish_tasks:
+            await asyncio.gather(*self._replenish_tasks, return_exceptions=True)
+        
+        while not self._idle.empty():
+            worker = self._idle.get_nowait()
+            self._spawned -= 1
+            await worker.kill()
+        logger.info("sandbox_pool_closed")
+
+    async def execute(self, code: str, timeout: float) -> Dict[str, Any]:
+        """
+        Run code on a pooled worker.
+
+        Args:
+            code: Python source to execute
+            timeout: Wall-clock limit in seconds
+
+        Returns:
+            Worker response with stdout, stderr, return_code, duration and violation
+
+        Raises:
+            asyncio.TimeoutError: If the run exceeds the wall-clock limit
+            SandboxUnavailableError: If no worker could be started
+        """
+        queued_at = time.perf_counter()
+        worker = await self._acquire()
+        metrics_collector.record_sandbox_queue_wait(time.perf_counter() - queued_at)
+
+        # Anything that interrupts the exchange (cancellation, bad reply) could
+        # leave an unread response in the pipe, so recycle unless it completes
+        recycle_reason = "aborted"
+        try:
+            request = json.dumps({
+                "code": code,
+                "cpu_seconds": self.cpu_seconds,
+                "max_output": self.max_output_chars
+            }) + "\n"
+
+            started = time.perf_counter()
+            try:
+                worker.process.stdin.write(request.encode("utf-8"))
+                await worker.process.stdin.drain()
+                line = await asyncio.wait_for(worker.process.stdout.readline(), timeout=timeout)
+            except asyncio.TimeoutError:
+                recycle_reason = "timeout"
+                raise
+            except (BrokenPipeError, ConnectionResetError) as e:
+                recycle_reason = "broken_pipe"
+                raise SandboxUnavailableError(f"Sandbox worker pipe closed: {e}")
+
+            worker.runs += 1
+
+            if not line:
+                # Worker died mid-run: SIGXCPU from the CPU rlimit or a hard crash
+                return_code = await worker.process.wait()
+                recycle_reason = "cpu_limit" if return_code == -24 else "crashed"  # -SIGXCPU
+                result = {
+                    "stdout": "",
+                    "stderr": f"Sandbox worker terminated ({recycle_reason}, exit code {return_code})",
+                    "return_code": return_code,
+                    "duration": time.perf_counter() - started,
+                    "violation": recycle_reason
+                }
+            else:
+                result = json.loads(line)
+                recycle_reason = None
+                if result.get("violation"):
+                    recycle_reason = result["violation"]
+                elif worker.runs >= self.max_runs:
+                    recycle_reason = "max_runs"
+
+            metrics_collector.record_sandbox_execution("pool", result.get("duration", 0.0))
+            return result
+
+        finally:
+            await self._release(worker, recycle_reason)
+
+    async def _acquire(self) -> SandboxWorker:
+        """Take an idle worker, starting a new one if the pool is not full."""
+        if self._closed:
+            raise SandboxUnavailableError("Sandbox pool is closed")
+
+        while True:
+            if self._idle.empty() and self._spawned < self.size:
+                await self._add_worker()
+
+            try:
+                worker = await asyncio.wait_for(self._idle.get(), timeout=self.acquire_timeout)
+            except asyncio.TimeoutError:
+                # Every worker is busy; let the caller overflow to spawn-per-run
+                raise SandboxUnavailableError("Timed out waiting for a sandbox worker")
+            if worker.alive:
+                return worker
+
+            # Died while idle (e.g. OOM-killed); replace it
+            self._spawned -= 1
+            metrics_collector.record_sandbox_recycle("died_idle")
+
+    async def _release(self, worker: SandboxWorker, recycle_reason: Optional[str]):
+        """Return a worker to the pool or recycle it."""
+        if recycle_reason is None and worker.alive and not self._closed:
+            self._idle.put_nowait(worker)
+            return
+
+        self._spawned -= 1
+        await worker.kill()
+
+        if recycle_reason:
+            metrics_collector.record_sandbox_recycle(recycle_reason)
+            logger.info("sandbox_worker_recycled", reason=recycle_reason, runs=worker.runs)
+
+        if not self._closed:
+            task = asyncio.create_task(self._replenish())
+            self._replenish_tasks.add(task)
+            task.add_done_callback(self._replenish_tasks.discard)
+
+    async def _replenish(self):
+        """Start a replacement worker in the background to keep the pool warm."""
+        try:
+            if self._spawned < self.size:
+                await self._add_worker()
+        except Exception as e:
+            logger.warning("sandbox_worker_replenish_failed", error=str(e))
+
+    async def _add_worker(self):
+        """Start one worker and put it on the idle queue."""
+        self._spawned += 1
+        try:
+            worker = await self._spawn_worker()
+        except BaseException:
+            self._spawned -= 1
+            raise
+        
+        if self._closed:
+            self._spawned -= 1
+            await worker.kill()
+            return
+        self._idle.put_nowait(worker)
+
+    async def _spawn_worker(self) -> SandboxWorker:
+        """Launch a worker interpreter and wait for its ready handshake."""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, WORKER_SCRIPT, str(self.memory_mb),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                # Own process group, so kill() also reaches a run in flight
+                start_new_session=True,
+                # Responses are single JSON lines; leave room for escaped output
+                limit=16 * self.max_output_chars + 65536
+            )
+        except Exception as e:
+            raise SandboxUnavailableError(f"Failed to start sandbox worker: {e}")
+
+        worker = SandboxWorker(process)
+        try:
+            line = await asyncio.wait_for(process.stdout.readline(), timeout=self.start_timeout)
+            if not line or not json.loads(line).get("ready"):
+                raise SandboxUnavailableError("Sandbox worker did not signal readiness")
+        except BaseException as e:
+            await worker.kill()
+            if isinstance(e, (SandboxUnavailableError, asyncio.CancelledError)):
+                raise
+            raise SandboxUnavailableError(f"Sandbox worker failed to start: {e}")
+
+        logger.debug("sandbox_worker_started", pid=process.pid)
+        return worker
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current pool occupancy."""
+        return {
+            "size": self.size,
+            "spawned": self._spawned,
+            "idle": self._idle.qsize(),
+            "closed": self._closed
+        }
+
+
+# Global sandbox pool (workers start lazily or at startup when warm-up is enabled)
+sandbox_pool = SandboxPool()
@@ -0,0 +1,216 @@
+"""
+Cortex V2 Agentic System - Sandbox Worker
+Long-lived interpreter that executes code snippets on behalf of SandboxPool.
+
+This file is launched as a standalone script (never imported through the
+cortex package) so worker start-up only pays for the interpreter itself.
+
+Protocol: one JSON request per line on stdin, one JSON response per line on
+the original stdout. File descriptors 1 and 2 are pointed at /dev/null so
+stray writes from user code cannot corrupt the protocol stream.
+
+Where fork() exists, the warm interpreter never runs user code itself: each
+request runs in a child forked from it, which inherits the imported modules
+for free and exits afterwards. Module and builtins patches, threads and
+open files of one run therefore never reach the next, and the child closes
+its copies of the protocol pipes before running anything. Without fork()
+snippets run in the worker itself and only the exec namespace is fresh.
+"""
+
+import io
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Non-POSIX platforms: run without rlimits
+    resource = None
+
+
+class _CappedBuffer(io.TextIOBase):
+    """Text sink that keeps at most `limit` characters."""
+
+    def __init__(self, limit: int):
+        self._parts = []
+        self._size = 0
+        self._limit = limit
+        self.truncated = False
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        remaining = self._limit - self._size
+        if remaining > 0:
+            chunk = s[:remaining]
+            self._parts.append(chunk)
+            self._size += len(chunk)
+        if len(s) > max(remaining, 0):
+            self.truncated = True
+        return len(s)
+
+    def getvalue(self) -> str:
+        return "".join(self._parts)
+
+
+def _apply_memory_limit(memory_mb: int):
+    """Cap the address space of this worker for its whole lifetime."""
+    if resource is None or memory_mb <= 0:
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _set_cpu_budget(seconds: int):
+    """
+    Allow `seconds` more CPU time from now.
+
+    RLIMIT_CPU counts cumulative CPU time for the process, so the soft limit
+    is moved forward before every run. Exceeding it raises SIGXCPU, which
+    terminates the worker and is reported by the pool as a violation.
+    """
+    if resource is None or seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + seconds + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+FORK_AVAILABLE = hasattr(os, "fork")
+
+
+def _run_forked(request: dict, protocol_fds: tuple) -> dict:
+    """
+    Execute one snippet in a child process and collect its response.
+
+    The child gets a pipe for its response and nothing else of the
+    protocol; whatever it leaves behind ends with os._exit().
+    """
+    read_fd, write_fd = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            for fd in protocol_fds:
+                os.close(fd)
+            # stdin was the request pipe
+            os.dup2(os.open(os.devnull, os.O_RDWR), 0)
+            payload = json.dumps(_run(request)).encode("utf-8")
+            with os.fdopen(write_fd, "wb") as response_out:
+                response_out.write(payload)
+            status = 0
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as response_in:
+        payload = response_in.read()
+    _, status = os.waitpid(pid, 0)
+
+    if payload and os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+        try:
+            return json.loads(payload)
+        except ValueError:
+            pass  # user code wrote to the response pipe; reported as a crash below
+
+    # Killed mid-run: SIGXCPU from the CPU rlimit, the OOM killer or a crash
+    signum = os.WTERMSIG(status) if os.WIFSIGNALED(status) else None
+    violation = "cpu_limit" if signum == getattr(signal, "SIGXCPU", None) else "crashed"
+    return_code = -signum if signum else os.WEXITSTATUS(status)
+    return {
+        "stdout": "",
+        "stderr": f"Sandbox run terminated ({violation}, exit code {return_code})",
+        "stdout_truncated": False,
+        "stderr_truncated": False,
+        "return_code": return_code,
+        "duration": time.perf_counter() - started,
+        "violation": violation,
+    }
+
+
+def _run(request: dict) -> dict:
+    """Execute one snippet in a fresh namespace and capture its output."""
+    stdout = _CappedBuffer(request.get("max_output", 10000))
+    stderr = _CappedBuffer(request.get("max_output", 10000))
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    return_code = 0
+    violation = None
+
+    _set_cpu_budget(request.get("cpu_seconds", 0))
+    started = time.perf_counter()
+
+    saved = sys.stdout, sys.stderr, sys.stdin
+    sys.stdout, sys.stderr, sys.stdin = stdout, stderr, io.StringIO("")
+    try:
+        code = compile(request["code"], "<sandbox>", "exec")
+        exec(code, namespace)
+    except SystemExit as e:
+        if e.code is None:
+            return_code = 0
+        elif isinstance(e.code, int):
+            return_code = e.code
+        else:
+            stderr.write(f"{e.code}\n")
+            return_code = 1
+    except BaseException as e:
+        if isinstance(e, MemoryError):
+            violation = "memory_limit"
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        # Drop this frame so the traceback starts at the user's code
+        stderr.write("".join(traceback.format_exception(
+            exc_type, exc_value, exc_tb.tb_next if exc_tb else None
+        )))
+        return_code = 1
+    finally:
+        sys.stdout, sys.stderr, sys.stdin = saved
+
+    if violation is None and (stdout.truncated or stderr.truncated):
+        violation = "output_limit"
+
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "stdout_truncated": stdout.truncated,
+        "stderr_truncated": stderr.truncated,
+        "return_code": return_code,
+        "duration": time.perf_counter() - started,
+        "violation": violation,
+    }
+
+
+def main():
+    memory_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+
+    # Keep a private handle on the real stdout for protocol replies
+    protocol_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    protocol_in = sys.stdin
+
+    _apply_memory_limit(memory_mb)
+
+    protocol_out.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+    protocol_out.flush()
+
+    protocol_fds = (protocol_out.fileno(), protocol_in.fileno())
+    for line in protocol_in:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        response = _run_forked(request, protocol_fds) if FORK_AVAILABLE else _run(request)
+        protocol_out.write(json.dumps(response) + "\n")
+        protocol_out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,19 @@ import tempfile
 import os
 import sys
 import ast
-import math
 import json
 from typing import Dict, Any, List, Optional
 import structlog
 import asyncio
+import time
 from datetime import datetime
 
+from cortex.agents.sandbox import sandbox_pool, SandboxUnavailableError
+from cortex.agents.exec_cache import execution_cache
+from cortex.agents.calculator import expression_compiler, NUMPY_AVAILABLE
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+
 logger = structlog.get_logger()
 
 
@@ -27,10 +33,13 @@ class ToolExecutor:
         self.enabled_tools = {
             "execute_python": True,
             "calculate": True,
+            "calculate_batch": True,
             "web_search": False  # Placeholder for future
         }
         self.timeout = 30  # seconds
-        self.max_output_length = 10000  # characters
+        self.max_output_length = settings.sandbox_max_output_chars  # characters
+        self.sandbox_pool = sandbox_pool if settings.sandbox_pool_enabled else None
+        self.execution_cache = execution_cache if settings.sandbox_cache_enabled else None
         
         logger.info("tool_executor_initialized", enabled_tools=list(self.enabled_tools.keys()))
     
@@ -50,7 +59,13 @@ class ToolExecutor:
             if tool_name == "execute_python":
                 return await self.execute_python(kwargs.get("code", ""))
             elif tool_name == "calculate":
-                return await self.calculate(kwargs.get("expression", ""))
+                return await self.calculate(kwargs.get("expression", ""), kwargs.get("variables"))
+            elif tool_name == "calculate_batch":
+                return await self.calculate_batch(
+                    kwargs.get("expression", ""),
+                    kwargs.get("variables", {}),
+                    kwargs.get("grid", False)
+                )
             elif tool_name == "web_search":
                 return await self.web_search(kwargs.get("query", ""))
             else:
@@ -91,66 +106,39 @@ class ToolExecutor:
                     "output": None
                 }
             
-            # Create a temporary file for the code
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-                f.write(code)
-                temp_file = f.name
-            
-            try:
-                # Execute the code with timeout
-                process = await asyncio.create_subprocess_exec(
-                    sys.executable, temp_file,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                
-                try:
-                    stdout, stderr = await asyncio.wait_for(
-                        process.communicate(), timeout=self.timeout
-                    )
-                    
-                    stdout_text = stdout.decode('utf-8')
-                    stderr_text = stderr.decode('utf-8')
-                    
-                    # Limit output length
-                    if len(stdout_text) > self.max_output_length:
-                        stdout_text = stdout_text[:self.max_output_length] + "\n... (output truncated)"
-                    
-                    if len(stderr_text) > self.max_output_length:
-                        stderr_text = stderr_text[:self.max_output_length] + "\n... (error truncated)"
-                    
-                    success = process.returncode == 0
-                    output = stdout_text if success else stderr_text
-                    
+            cache_key = self.execution_cache.make_key(code) if self.execution_cache else None
+            if cache_key:
+                cached = await self.execution_cache.get(cache_key)
+                if cached is not None:
                     logger.info(
-                        "python_execution_completed",
-                        success=success,
-                        return_code=process.returncode,
-                        output_length=len(output)
+                        "python_execution_cache_hit",
+                        success=cached.get("success"),
+                        saved_seconds=cached.get("duration")
                     )
-                    
-                    return {
-                        "success": success,
-                        "output": output,
-                        "error": stderr_text if not success else None,
-                        "return_code": process.returncode
-                    }
-                    
-                except asyncio.TimeoutError:
-                    process.kill()
-                    await process.wait()
-                    return {
-                        "success": False,
-                        "error": f"Code execution timed out after {self.timeout} seconds",
-                        "output": None
-                    }
-                    
-            finally:
-                # Clean up temporary file
+                    cached["cached"] = True
+                    return cached
+            
+            started = time.perf_counter()
+            result = None
+            if self.sandbox_pool is not None:
                 try:
-                    os.unlink(temp_file)
-                except:
-                    pass
+                    result = await self._execute_in_pool(code)
+                except SandboxUnavailableError as e:
+                    logger.warning(
+                        "sandbox_pool_unavailable",
+                        error=str(e),
+                        fallback="spawn_per_run"
+                    )
+            
+            if result is None:
+                result = await self._execute_in_subprocess(code)
+            result["duration"] = time.perf_counter() - started
+            
+            # Only completed runs are cached; timeouts and limit violations are not
+            if cache_key and "return_code" in result and not result.get("violation"):
+                await self.execution_cache.set(cache_key, result)
+            
+            return result
                     
         except Exception as e:
             logger.error("python_execution_error", error=str(e))
@@ -160,6 +148,113 @@ class ToolExecutor:
                 "output": None
             }
     
+    async def _execute_in_pool(self, code: str) -> Dict[str, Any]:
+        """Run code on a warm sandbox worker."""
+        try:
+            result = await self.sandbox_pool.execute(code, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "error": f"Code execution timed out after {self.timeout} seconds",
+                "output": None
+            }
+        
+        stdout_text = result.get("stdout", "")
+        stderr_text = result.get("stderr", "")
+        
+        if result.get("stdout_truncated"):
+            stdout_text += "\n... (output truncated)"
+        if result.get("stderr_truncated"):
+            stderr_text += "\n... (error truncated)"
+        
+        return_code = result.get("return_code", 1)
+        success = return_code == 0
+        output = stdout_text if success else stderr_text
+        
+        logger.info(
+            "python_execution_completed",
+            success=success,
+            return_code=return_code,
+            output_length=len(output),
+            mode="pool",
+            violation=result.get("violation")
+        )
+        
+        return {
+            "success": success,
+            "output": output,
+            "error": stderr_text if not success else None,
+            "return_code": return_code,
+            "violation": result.get("violation")
+        }
+    
+    async def _execute_in_subprocess(self, code: str) -> Dict[str, Any]:
+        """Run code in a freshly spawned interpreter (fallback path)."""
+        # Create a temporary file for the code
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+            f.write(code)
+            temp_file = f.name
+        
+        started = time.perf_counter()
+        try:
+            # Execute the code with timeout
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, temp_file,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(), timeout=self.timeout
+                )
+                
+                stdout_text = stdout.decode('utf-8')
+                stderr_text = stderr.decode('utf-8')
+                
+                # Limit output length
+                if len(stdout_text) > self.max_output_length:
+                    stdout_text = stdout_text[:self.max_output_length] + "\n... (output truncated)"
+                
+                if len(stderr_text) > self.max_output_length:
+                    stderr_text = stderr_text[:self.max_output_length] + "\n... (error truncated)"
+                
+                success = process.returncode == 0
+                output = stdout_text if success else stderr_text
+                
+                metrics_collector.record_sandbox_execution("spawn", time.perf_counter() - started)
+                
+                logger.info(
+                    "python_execution_completed",
+                    success=success,
+                    return_code=process.returncode,
+                    output_length=len(output),
+                    mode="spawn"
+                )
+                
+                return {
+                    "success": success,
+                    "output": output,
+                    "error": stderr_text if not success else None,
+                    "return_code": process.returncode
+                }
+                
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return {
+                    "success": False,
+                    "error": f"Code execution timed out after {self.timeout} seconds",
+                    "output": None
+                }
+                
+        finally:
+            # Clean up temporary file
+            try:
+                os.unlink(temp_file)
+            except:
+                pass
+    
     def _is_code_safe(self, code: str) -> bool:
         """
         Basic safety check for Python code.
@@ -205,9 +300,16 @@ class ToolExecutor:
         
         return True
     
-    async def calculate(self, expression: str) -> Dict[str, Any]:
+    async def calculate(
+        self,
+        expression: str,
+        variables: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
         """
         Safely evaluate mathematical expressions.
+        
+        Expressions are parsed once into a whitelisted AST and the compiled
+        form is cached by expression text.
         """
         if not expression.strip():
             return {
@@ -219,34 +321,11 @@ class ToolExecutor:
         logger.info("calculation_started", expression=expression)
         
         try:
-            # Create a safe environment for evaluation
-            safe_dict = {
-                "__builtins__": {},
-                "abs": abs,
-                "round": round,
-                "min": min,
-                "max": max,
-                "sum": sum,
-                "pow": pow,
-                "sqrt": math.sqrt,
-                "sin": math.sin,
-                "cos": math.cos,
-                "tan": math.tan,
-                "asin": math.asin,
-                "acos": math.acos,
-                "atan": math.atan,
-                "log": math.log,
-                "log10": math.log10,
-                "exp": math.exp,
-                "pi": math.pi,
-                "e": math.e,
-                "factorial": math.factorial,
-                "ceil": math.ceil,
-                "floor": math.floor,
-            }
-            
-            # Evaluate the expression
-            result = eval(expression, safe_dict, {})
+            # Off the event loop and bounded in time; size limits live in the compiler
+            result = await asyncio.wait_for(
+                asyncio.to_thread(expression_compiler.evaluate, expression, variables),
+                timeout=settings.calculator_timeout
+            )
             
             logger.info("calculation_completed", result=result)
             
@@ -257,6 +336,14 @@ class ToolExecutor:
                 "error": None
             }
             
+        except asyncio.TimeoutError:
+            logger.error("calculation_error", expression=expression, error="timeout")
+            return {
+                "success": False,
+                "error": f"Calculation timed out after {settings.calculator_timeout:g}s",
+                "output": None
+            }
+            
         except Exception as e:
             logger.error("calculation_error", expression=expression, error=str(e))
             return {
@@ -265,6 +352,72 @@ class ToolExecutor:
                 "output": None
             }
     
+    async def calculate_batch(
+        self,
+        expression: str,
+        variables: Dict[str, Any],
+        grid: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Evaluate one expression across arrays of variable bindings.
+        
+        With grid=True the result is a table over the cartesian product of the
+        variables (e.g. a sensitivity table); otherwise arrays are broadcast.
+        """
+        if not expression.strip():
+            return {
+                "success": False,
+                "error": "No expression provided",
+                "output": None
+            }
+        
+        if not NUMPY_AVAILABLE:
+            return {
+                "success": False,
+                "error": "Batch calculation requires numpy",
+                "output": None
+            }
+        
+        logger.info(
+            "batch_calculation_started",
+            expression=expression,
+            variables=list((variables or {}).keys()),
+            grid=grid
+        )
+        
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(expression_compiler.evaluate_batch, expression, variables or {}, grid=grid),
+                timeout=settings.calculator_timeout
+            )
+            values = result.tolist()
+            
+            logger.info("batch_calculation_completed", shape=list(result.shape))
+            
+            return {
+                "success": True,
+                "output": json.dumps(values),
+                "result": values,
+                "shape": list(result.shape),
+                "error": None
+            }
+            
+        except asyncio.TimeoutError:
+            logger.error("batch_calculation_error", expression=expression, error="timeout")
+            return {
+                "success": False,
+                "error": f"Calculation timed out after {settings.calculator_timeout:g}s",
+                "output": None
+            }
+            
+        except Exception as e:
+            logger.error("batch_calculation_error", expression=expression, error=str(e))
+            return {
+                "success": False,
+                "error": f"Calculation error: {str(e)}",
+                "output": None
+            }
+    
     async def web_search(self, query: str) -> Dict[str, Any]:
         """
         Placeholder for web search functionality.
@@ -279,6 +432,78 @@ class ToolExecutor:
             "message": "This feature is planned for a future release"
         }
     
+    def get_tool_schemas(self, tool_names: List[str]) -> List[Dict[str, Any]]:
+        """
+        OpenAI-style function schemas for provider function calling.
+        
+        Only enabled tools with a schema are returned.
+        """
+        schemas = {
+            "calculate": {
+                "type": "function",
+                "function": {
+                    "name": "calculate",
+                    "description": (
+                        "Evaluate an arithmetic expression exactly. Use this for every "
+                        "numeric step instead of computing by hand. Supports + - * / // % **, "
+                        "abs, round, min, max, sum, pow, sqrt, sin, cos, tan, asin, acos, atan, "
+                        "log, log10, exp, factorial, ceil, floor, pi and e."
+                    ),
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "expression": {
+                                "type": "string",
+                                "description": "Expression to evaluate, e.g. '1200 * (1 - 0.035) / 8'"
+                            },
+                            "variables": {
+                                "type": "object",
+                                "description": "Optional numeric values for names used in the expression",
+                                "additionalProperties": {"type": "number"}
+                            }
+                        },
+                        "required": ["expression"]
+                    }
+                }
+            },
+            "calculate_batch": {
+                "type": "function",
+                "function": {
+                    "name": "calculate_batch",
+                    "description": (
+                        "Evaluate one expression for many values at once, e.g. a sensitivity "
+                        "table or scenario grid. Returns a (nested) list of results."
+                    ),
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "expression": {"type": "string"},
+                            "variables": {
+                                "type": "object",
+                                "description": "Variable name to a number or list of numbers",
+                                "additionalProperties": {
+                                    "anyOf": [
+                                        {"type": "number"},
+                                        {"type": "array", "items": {"type": "number"}}
+                                    ]
+                                }
+                            },
+                            "grid": {
+                                "type": "boolean",
+                                "description": "Evaluate over every combination of the list values"
+                            }
+                        },
+                        "required": ["expression", "variables"]
+                    }
+                }
+            }
+        }
+        
+        return [
+            schemas[name] for name in tool_names
+            if name in schemas and self.enabled_tools.get(name, False)
+        ]
+    
     def get_available_tools(self) -> Dict[str, Dict[str, Any]]:
         """Get information about all available tools."""
         return {
@@ -289,13 +514,15 @@ class ToolExecutor:
                     "code": "Python code to execute"
                 },
                 "timeout": self.timeout,
-                "safety": "Basic safety checks applied"
+                "safety": "Basic safety checks applied",
+                "sandbox": "warm_pool" if self.sandbox_pool is not None else "spawn_per_run"
             },
             "calculate": {
                 "enabled": self.enabled_tools.get("calculate", False),
                 "description": "Safely evaluate mathematical expressions",
                 "parameters": {
-                    "expression": "Mathematical expression to evaluate"
+                    "expression": "Mathematical expression to evaluate",
+                    "variables": "Optional mapping of variable names to numbers"
                 },
                 "supported_functions": [
                     "abs", "round", "min", "max", "sum", "pow", "sqrt",
@@ -304,6 +531,15 @@ class ToolExecutor:
                     "pi", "e"
                 ]
             },
+            "calculate_batch": {
+                "enabled": self.enabled_tools.get("calculate_batch", False) and NUMPY_AVAILABLE,
+                "description": "Evaluate one expression across arrays of variable values",
+                "parameters": {
+                    "expression": "Mathematical expression to evaluate",
+                    "variables": "Mapping of variable names to lists of values",
+                    "grid": "Evaluate over the cartesian product of the variables"
+                }
+            },
             "web_search": {
                 "enabled": self.enabled_tools.get("web_search", False),
                 "description": "Search the web for information (planned feature)",
@@ -339,6 +575,12 @@ class ToolRegistry:
                 "category": "mathematics",
                 "requires_sandbox": False
             },
+            "calculate_batch": {
+                "name": "calculate_batch",
+                "description": "Evaluate expressions over scenario grids",
+                "category": "mathematics",
+                "requires_sandbox": False
+            },
             "web_search": {
                 "name": "web_search",
                 "description": "Search the web",
@@ -108,6 +108,7 @@ class WorkerAgent:
         self.temperature = config.get("temperature", 0.7)
         self.supports_tools = config.get("supports_tools", False)
         self.supports_vision = config.get("supports_vision", False)
+        self.max_image_dimension = config.get("max_image_dimension")
         
         # Create specialized system prompts based on role
         self.system_prompt = self._create_system_prompt()
@@ -246,7 +247,7 @@ You are a helpful AI assistant. Provide accurate, helpful responses while stayin
                 "worker_request_completed",
                 worker=self.name,
                 request_id=request_id,
-                response_length=len(response.get("choices", [{}])[0].get("message", {}).get("content", ""))
+                response_length=len(response.get("choices", [{}])[0].get("message", {}).get("content") or "")
             )
             
             return response
@@ -273,6 +274,7 @@ You are a helpful AI assistant. Provide accurate, helpful responses while stayin
             "temperature": self.temperature,
             "supports_tools": self.supports_tools,
             "supports_vision": self.supports_vision,
+            "max_image_dimension": self.max_image_dimension,
             "description": self.config.get("description", "")
         }
 
@@ -1,7 +1,7 @@
 """Configuration management for Cortex."""
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -28,6 +28,17 @@ class Settings(BaseSettings):
     qdrant_url: str = "http://localhost:6333"
     qdrant_collection: str = "cortex_memory"
     qdrant_api_key: str = ""
+    qdrant_prefer_grpc: bool = False
+    qdrant_pool_size: int = 10  # pooled HTTP connections
+    qdrant_call_timeout: float = 5.0  # seconds per Qdrant call
+    qdrant_local_threads: int = 1  # thread pool for local mode (":memory:" / "path:<dir>")
+    qdrant_hnsw_m: int = 16  # graph degree (new collections)
+    qdrant_hnsw_ef_construct: int = 100  # build-time beam width (new collections)
+    qdrant_search_ef: int = 0  # query-time beam width; 0 uses ef_construct
+    qdrant_quantization: str = "none"  # none, int8 (scalar, new collections)
+    qdrant_quantization_always_ram: bool = True
+    qdrant_quantization_rescore: bool = True  # re-rank quantized candidates with the original vectors
+    qdrant_quantization_oversampling: float = 2.0  # candidates fetched per result before rescoring
     
     # Model configuration
     litellm_config_path: str = "config.yaml"
@@ -37,6 +48,130 @@ class Settings(BaseSettings):
     
     # Memory configuration
     memory_top_k: int = 3
+    memory_store: str = "qdrant"  # qdrant, local (embedded per-user matrices on disk)
+    memory_local_path: str = ".cache/memory_store"
+    memory_local_fallback: bool = True  # qdrant store: keep local copies of hot users for outages
+    memory_local_fallback_path: str = ".cache/memory_fallback"  # never the primary's MEMORY_LOCAL_PATH: the cache evicts files
+    memory_local_fallback_max_users: int = 1000
+    memory_local_fallback_ttl: float = 3600.0  # seconds before a hot user's local copy is refreshed
+    memory_local_ivf_threshold: int = 4096  # memories per user before IVF replaces brute force
+    memory_local_ivf_nprobe: int = 8
+    memory_qdrant_retry_interval: float = 30.0  # seconds retrieval stays on the fallback after a Qdrant failure
+    memory_hot_cache: bool = True  # search active users' memories in process (qdrant store)
+    memory_hot_cache_max_users: int = 10000
+    memory_hot_cache_max_bytes: int = 268435456  # 256 MB of vectors and summaries
+    memory_hot_cache_max_points: int = 2000  # users with more memories are searched in Qdrant
+    memory_hot_cache_ttl: float = 300.0  # seconds before an entry is reloaded
+    memory_hot_cache_pubsub: bool = True  # Redis invalidation across replicas
+    memory_hot_cache_channel: str = "cortex:memory:invalidate"
+    memory_snippet_store: str = "sqlite"  # sqlite, redis, none; conversation snippets kept outside the vector payload
+    memory_snippet_path: str = ".cache/memory_snippets.db"
+    memory_snippet_level: int = 3  # zstd level (zlib, capped at 9, without zstandard)
+    memory_dedup_enabled: bool = True  # refresh near-duplicate memories instead of inserting
+    memory_dedup_threshold: float = 0.95  # cosine similarity
+    memory_compact_consolidate_threshold: float = 0.85  # cosine similarity of related memories
+    memory_decay_half_life_days: float = 90.0
+    memory_decay_min_score: float = 0.1  # (1 + ln hits) * 0.5^(age / half-life) below this is deleted
+    memory_retention_max_days: int = 365  # hard limit since last seen; 0 disables
+    memory_max_per_user: int = 500
+    memory_compact_batch_size: int = 256  # points per upsert/delete
+    memory_compact_pause_ms: float = 50.0  # between batches
+    memory_summarizer_mode: str = "hybrid"  # llm, local (extractive), hybrid (llm, local fallback); per user via User DNA preferences["memory_summarizer"]
+    memory_summarizer_model: str = "groq/llama-3.1-8b-instant"
+    memory_summarizer_llm_cooldown: float = 60.0  # seconds hybrid mode stays local after an LLM failure
+    memory_summary_batching: bool = True  # gate turns and summarize several per LLM call
+    memory_summary_batch_turns: int = 5
+    memory_summary_max_wait: float = 300.0  # seconds before a partial batch is summarized
+    memory_summary_daily_token_budget: int = 20000  # per user
+    memory_summary_min_words: int = 4
+    memory_summary_novelty_threshold: float = 0.8  # word overlap with a recent turn that counts as a repeat
+    memory_summary_recent_ttl: float = 3600.0  # seconds an idle user's recent turns are kept for that check
+    memory_summary_require_personal: bool = True  # skip turns that say nothing about the user
+    memory_summary_concurrency: int = 4  # concurrent summarization calls
+    memory_write_behind: bool = True  # batch memory upserts in the background
+    memory_write_batch_size: int = 64
+    memory_write_flush_interval: float = 1.0  # seconds
+    memory_write_max_pending: int = 10000
+    memory_write_overflow_policy: str = "spill"  # drop_oldest, drop_newest, spill
+    memory_write_spill_path: str = ".cache/memory_write_spill.jsonl"  # collection name is inserted; shared by worker processes (flock-guarded)
+    memory_write_shutdown_timeout: float = 10.0  # seconds to flush on shutdown
+    
+    # Embeddings (shared by semantic routing and memory)
+    embedding_backend: str = "litellm"  # litellm (hosted model), hashing (local CPU)
+    embedding_model: str = "gemini/text-embedding-004"  # litellm backend
+    embedding_dimension: int = 768  # must match the model and the Qdrant collection
+    embedding_hashing_features: int = 131072  # hashing backend: feature buckets
+    embedding_hashing_seed: int = 0  # hashing backend: projection seed (changing it invalidates stored vectors)
+    embedding_cache_max_entries: int = 4096
+    embedding_cache_redis: bool = True  # packed float16 vectors
+    embedding_cache_ttl: int = 604800  # 7 days
+    embedding_batch_enabled: bool = True  # coalesce concurrent calls
+    embedding_batch_max_size: int = 64
+    embedding_batch_max_wait_ms: float = 5.0
+    embedding_batch_fallback_direct: bool = True  # retry callers individually if a batch fails
+    
+    # Semantic router (legacy-auto)
+    router_embedding_cache_dir: str = ".cache/router_embeddings"  # empty disables persistence
+    router_knn_top_k: int = 5
+    
+    # Python sandbox (execute_python tool)
+    sandbox_pool_enabled: bool = True
+    sandbox_pool_size: int = 2
+    sandbox_pool_warmup: bool = True  # start workers at startup instead of first use
+    sandbox_max_runs_per_worker: int = 50
+    sandbox_cpu_seconds: int = 10
+    sandbox_memory_mb: int = 512
+    sandbox_max_output_chars: int = 10000
+    sandbox_acquire_timeout: float = 5.0  # seconds before overflowing to spawn-per-run
+    
+    # Sandbox execution result cache
+    sandbox_cache_enabled: bool = True
+    sandbox_cache_ttl: int = 3600  # 1 hour
+    sandbox_cache_max_entries: int = 1024
+    sandbox_cache_redis: bool = True
+    sandbox_cache_allow_nondeterministic: bool = False
+    sandbox_cache_nondeterministic_modules: List[str] = [
+        "time", "random", "datetime", "uuid", "secrets", "os", "sys",
+        "socket", "urllib", "http", "requests", "threading", "asyncio",
+        "multiprocessing", "subprocess", "tempfile", "numpy"
+    ]
+    
+    # Coding agent
+    coding_agent_max_parallel_blocks: int = 4
+    
+    # Math agent (local calculator offloading)
+    math_agent_function_calling: bool = True  # else CALC: text protocol
+    math_agent_max_rounds: int = 4
+    math_agent_max_calls_per_round: int = 8
+    math_agent_handwork_factor: float = 3.0  # tokens-saved estimate multiplier
+    calculator_timeout: float = 5.0  # seconds per calculate / calculate_batch call
+    
+    # Map-reduce decomposition for large complex-reasoning requests
+    decomposition_enabled: bool = False  # opt-in: multiplies LLM calls per request
+    decomposition_min_chars: int = 600  # shorter requests always use one reasoning call
+    decomposition_min_gain_seconds: float = 15.0  # estimated wall-clock saving required
+    decomposition_max_subquestions: int = 5
+    decomposition_max_parallel: int = 3
+    decomposition_workers: List[str] = ["worker_logic", "worker_analyst"]  # round-robin
+    decomposition_synthesis_worker: str = "worker_analyst"
+    
+    # Cascade routing: draft with a cheap worker, escalate when the verifier rejects it
+    cascade_enabled: bool = True
+    cascade_draft_worker: str = "worker_reflex"
+    cascade_verifier: str = "self_rating"  # heuristic or self_rating (heuristic + self-rating)
+    cascade_policy: Dict[str, float] = {"complex_reasoning": 0.7}  # task type -> min confidence
+    
+    # Agent trace store
+    trace_store_capacity: int = 2000  # traces kept in memory
+    trace_spill_backend: str = "none"  # none, database (DATABASE_URL, SQLite by default), redis
+    trace_spill_ttl: int = 604800  # 7 days (redis backend)
+    
+    # Vision image preprocessing (per-worker limits: max_image_dimension in config.yaml)
+    vision_preprocess_enabled: bool = True
+    vision_max_dimension: int = 1536  # longest side, pixels
+    vision_output_format: str = "jpeg"  # jpeg or webp
+    vision_quality: int = 85
+    vision_cache_max_entries: int = 128
     
     # CORS
     allowed_origins: List[str] = ["*"]
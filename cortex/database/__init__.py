@@ -1,6 +1,6 @@
 """Database module for Cortex."""
 
-from cortex.database.models import APIKey, Base
+from cortex.database.models import APIKey, AgentTrace, Base
 from cortex.database.connection import get_db, init_db
 
-__all__ = ["APIKey", "Base", "get_db", "init_db"]
+__all__ = ["APIKey", "AgentTrace", "Base", "get_db", "init_db"]
@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import String, Boolean, DateTime, Integer, JSON
+from sqlalchemy import String, Boolean, DateTime, Integer, Float, JSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -55,3 +55,23 @@ class APIKey(Base):
                 return False
         
         return True
+
+
+class AgentTrace(Base):
+    """Agentic request trace spilled from the in-memory trace store."""
+    
+    __tablename__ = "agent_traces"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    request_id: Mapped[str] = mapped_column(String(64), unique=True, index=True, nullable=False)
+    user_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    task_type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    strategy: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)
+    worker: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    success: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    steps: Mapped[list] = mapped_column(JSON, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<AgentTrace(request_id={self.request_id}, strategy={self.strategy})>"
@@ -0,0 +1,16 @@
+"""Embedding components shared by routing and memory."""
+
+from cortex.embeddings.backends import EmbeddingBackend, LiteLLMBackend, HashingBackend, create_backend
+from cortex.embeddings.batcher import EmbeddingBatcher
+from cortex.embeddings.service import EmbeddingService, EmbeddingError, embedding_service
+
+__all__ = [
+    "EmbeddingBackend",
+    "LiteLLMBackend",
+    "HashingBackend",
+    "create_backend",
+    "EmbeddingBatcher",
+    "EmbeddingService",
+    "EmbeddingError",
+    "embedding_service",
+]
@@ -0,0 +1,219 @@
+"""
+Embedding backends.
+
+A backend turns a list of texts into fixed-size float32 vectors.
+EmbeddingService adds caching and batching on top; the backend only
+decides where the vectors come from:
+
+- "litellm": a hosted embedding model (default gemini/text-embedding-004)
+- "hashing": feature hashing plus a sparse random projection, computed
+  on the local CPU with NumPy. No model download and no network hop, at
+  some cost in retrieval quality (see python -m cortex.embeddings.benchmark).
+"""
+
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+import structlog
+
+from cortex.config import settings
+
+logger = structlog.get_logger()
+
+try:
+    from litellm import aembedding
+    LITELLM_AVAILABLE = True
+except ImportError:
+    logger.warning("litellm_not_available", message="Hosted embedding backend disabled")
+    LITELLM_AVAILABLE = False
+
+
+class EmbeddingBackend:
+    """Base class for embedding backends."""
+
+    #: Identifies the vector space; part of every cache key
+    model: str = "unknown"
+    #: Output vector size
+    dimension: int = 0
+    #: Computed in-process (caching in Redis or batching calls would not pay off)
+    local: bool = False
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 vectors in input order
+        """
+        raise NotImplementedError
+
+
+class LiteLLMBackend(EmbeddingBackend):
+    """Hosted embedding model called through litellm."""
+
+    def __init__(self, model: Optional[str] = None, dimension: Optional[int] = None):
+        self.model = model or settings.embedding_model
+        self.dimension = dimension or settings.embedding_dimension
+
+    @property
+    def available(self) -> bool:
+        return LITELLM_AVAILABLE
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        if not LITELLM_AVAILABLE:
+            raise RuntimeError("litellm is not installed")
+
+        response = await aembedding(
+            model=self.model,
+            input=texts,
+            api_key=self._api_key()
+        )
+        data = sorted(response["data"], key=lambda item: item.get("index", 0))
+        return [np.asarray(item["embedding"], dtype=np.float32) for item in data]
+
+    def _api_key(self) -> Optional[str]:
+        """Provider key for models litellm cannot resolve from its own environment variables."""
+        if self.model.startswith("gemini/"):
+            return os.getenv("GOOGLE_API_KEY")
+        return None
+
+
+# Function words carry little topical signal; they are kept at a low weight
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being
+below between both but by can did do does doing down during each few for from further
+had has have having he her here hers him his how i if in into is it its itself just me
+more most my no nor not now of off on once only or other our ours out over own same she
+should so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who whom why
+will with you your yours
+""".split())
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    Local embeddings from hashed text features and a random projection.
+
+    Each text is broken into words, word bigrams and character 3/4-grams
+    (which tolerate inflections and typos), weighted by sublinear term
+    frequency, and hashed into `n_features` buckets. Every bucket owns
+    `density` fixed output coordinates with random signs, so the sparse
+    feature vector is projected to `dimension` dense floats with one
+    bincount; cosine similarity is approximately preserved. The projection
+    is derived from `seed`, so vectors are stable across processes.
+    """
+
+    local = True
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        n_features: Optional[int] = None,
+        seed: Optional[int] = None,
+        density: int = 4
+    ):
+        self.dimension = dimension or settings.embedding_dimension
+        self.n_features = n_features or settings.embedding_hashing_features
+        self.seed = settings.embedding_hashing_seed if seed is None else seed
+        self.model = f"local/hashing-{self.n_features}-{self.seed}"
+
+        rng = np.random.default_rng(self.seed)
+        index_dtype = np.int16 if self.dimension <= np.iinfo(np.int16).max else np.int32
+        self._projection_index = rng.integers(
+            0, self.dimension, size=(self.n_features, density)
+        ).astype(index_dtype)
+        self._projection_sign = (
+            rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=(self.n_features, density))
+            / math.sqrt(density)
+        ).astype(np.float32)
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        # Microseconds per text; not worth a thread hop
+        return [self.embed_one(text) for text in texts]
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed one text synchronously."""
+        features = self._features(text)
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        if not features:
+            return vector
+
+        buckets = np.fromiter(
+            (zlib.crc32(feature.encode("utf-8")) % self.n_features for feature in features),
+            dtype=np.int64,
+            count=len(features)
+        )
+        weights = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+
+        vector = np.bincount(
+            self._projection_index[buckets].ravel(),
+            weights=(self._projection_sign[buckets] * weights[:, None]).ravel(),
+            minlength=self.dimension
+        ).astype(np.float32)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @staticmethod
+    def _features(text: str) -> Dict[str, float]:
+        """Weighted word, bigram and character n-gram features."""
+        words = _WORD_PATTERN.findall(text.lower())
+        counts: Counter = Counter()
+
+        for word in words:
+            counts["w:" + word] += 1
+        for first, second in zip(words, words[1:]):
+            counts[f"b:{first} {second}"] += 1
+        for word in words:
+            if word in STOPWORDS:
+                continue
+            padded = f"<{word}>"
+            for n in (3, 4):
+                for i in range(len(padded) - n + 1):
+                    counts[f"c:{padded[i:i + n]}"] += 1
+
+        weighted = {}
+        for feature, count in counts.items():
+            weight = 1.0 + math.log(count)
+            kind = feature[0]
+            if kind == "w":
+                weight *= 0.2 if feature[2:] in STOPWORDS else 2.0
+            elif kind == "c":
+                weight *= 0.5
+            weighted[feature] = weight
+        return weighted
+
+
+BACKENDS = {
+    "litellm": LiteLLMBackend,
+    "hashing": HashingBackend,
+}
+
+
+def create_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    """
+    Build the embedding backend selected by EMBEDDING_BACKEND.
+
+    Args:
+        name: Backend name (defaults to settings)
+
+    Returns:
+        EmbeddingBackend instance
+    """
+    name = (name or settings.embedding_backend).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {name} (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
@@ -0,0 +1,158 @@
+"""Micro-batching of embedding calls across concurrent callers."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Set
+import numpy as np
+import structlog
+
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+
+logger = structlog.get_logger()
+
+EmbedCall = Callable[[List[str]], Awaitable[List[np.ndarray]]]
+
+
+class _PendingRequest:
+    """Texts from one caller waiting for the next batch."""
+
+    __slots__ = ("texts", "future", "enqueued_at")
+
+    def __init__(self, texts: List[str], future: asyncio.Future):
+        self.texts = texts
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into one provider call.
+
+    The first request to arrive opens a batch; the batch is sent when it
+    holds `max_batch_size` texts or `max_wait_ms` has passed, whichever
+    comes first, and the vectors are handed back to each waiting caller.
+    Requests that are already a full batch bypass the queue.
+    """
+
+    def __init__(
+        self,
+        call: EmbedCall,
+        model: str,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        fallback_direct: Optional[bool] = None
+    ):
+        """
+        Args:
+            call: Coroutine embedding a list of texts with one provider call
+            model: Embedding model (metrics label)
+            max_batch_size: Maximum texts per batched call
+            max_wait_ms: Longest a request waits for the batch to fill
+            fallback_direct: Retry each caller with its own call when a batch fails
+        """
+        self._call = call
+        self.model = model
+        self.max_batch_size = max(max_batch_size or settings.embedding_batch_max_size, 1)
+        self.max_wait = (settings.embedding_batch_max_wait_ms if max_wait_ms is None else max_wait_ms) / 1000
+        self.fallback_direct = settings.embedding_batch_fallback_direct if fallback_direct is None else fallback_direct
+
+        self._pending: List[_PendingRequest] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embed texts as part of the next batch.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Vectors in input order
+        """
+        if not texts:
+            return []
+        if len(texts) >= self.max_batch_size:
+            return await self._call(texts)
+
+        if self._pending_texts + len(texts) > self.max_batch_size:
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        request = _PendingRequest(texts, loop.create_future())
+        self._pending.append(request)
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await request.future
+
+    def _flush(self):
+        """Send everything queued so far as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[_PendingRequest]):
+        """Run one batched call and fan the vectors back out."""
+        # Callers that gave up while queued do not need their texts embedded
+        batch = [request for request in batch if not request.future.done()]
+        if not batch:
+            return
+
+        sent_at = time.perf_counter()
+        texts = [text for request in batch for text in request.texts]
+        metrics_collector.record_embedding_batch(
+            self.model,
+            len(texts),
+            [sent_at - request.enqueued_at for request in batch]
+        )
+
+        try:
+            vectors = await self._call(texts)
+        except Exception as e:
+            if not self.fallback_direct or len(batch) == 1:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                return
+
+            logger.warning(
+                "embedding_batch_failed_falling_back",
+                model=self.model,
+                requests=len(batch),
+                texts=len(texts),
+                error=str(e)
+            )
+            await asyncio.gather(*(self._send_direct(request) for request in batch))
+            return
+
+        offset = 0
+        for request in batch:
+            count = len(request.texts)
+            if not request.future.done():
+                request.future.set_result(vectors[offset:offset + count])
+            offset += count
+
+    async def _send_direct(self, request: _PendingRequest):
+        """Embed one caller's texts on their own."""
+        try:
+            vectors = await self._call(request.texts)
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+            return
+        if not request.future.done():
+            request.future.set_result(vectors)
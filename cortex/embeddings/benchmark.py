@@ -0,0 +1,146 @@
+"""
+Embedding backend benchmark.
+
+Compares per-call latency and retrieval quality of the embedding backends
+on a fixture corpus of memory-style summaries and paraphrased queries.
+Backends are called directly, without the EmbeddingService cache.
+
+Usage:
+    python -m cortex.embeddings.benchmark                      # hashing and litellm
+    python -m cortex.embeddings.benchmark --backends hashing --dimension 384
+    python -m cortex.embeddings.benchmark --corpus my_corpus.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from cortex.embeddings.backends import BACKENDS, EmbeddingBackend, HashingBackend
+
+DEFAULT_CORPUS = Path(__file__).parent / "fixtures" / "retrieval_corpus.json"
+
+
+def load_corpus(path: Path) -> Dict[str, Any]:
+    """Load a corpus of {"documents": [{id, text}], "queries": [{text, relevant}]}."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _normalize(vectors: List[np.ndarray]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+async def measure_latency(backend: EmbeddingBackend, texts: List[str], repeat: int) -> Dict[str, float]:
+    """Time single-text calls, the pattern on the request hot path."""
+    timings = []
+    for _ in range(repeat):
+        for text in texts:
+            started = time.perf_counter()
+            await backend.embed([text])
+            timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[min(int(len(timings) * 0.99), len(timings) - 1)],
+    }
+
+
+async def measure_quality(backend: EmbeddingBackend, corpus: Dict[str, Any]) -> Dict[str, float]:
+    """Rank every document for every query by cosine similarity."""
+    documents = corpus["documents"]
+    queries = corpus["queries"]
+    doc_ids = [doc["id"] for doc in documents]
+
+    doc_matrix = _normalize(await backend.embed([doc["text"] for doc in documents]))
+    query_matrix = _normalize(await backend.embed([query["text"] for query in queries]))
+    scores = query_matrix @ doc_matrix.T
+
+    hits_at_1 = hits_at_3 = 0
+    reciprocal_ranks = []
+    for query, row in zip(queries, scores):
+        ranking = [doc_ids[i] for i in np.argsort(-row)]
+        relevant = set(query["relevant"])
+        first = next(rank for rank, doc_id in enumerate(ranking, 1) if doc_id in relevant)
+        hits_at_1 += first == 1
+        hits_at_3 += first <= 3
+        reciprocal_ranks.append(1.0 / first)
+
+    return {
+        "recall_at_1": hits_at_1 / len(queries),
+        "recall_at_3": hits_at_3 / len(queries),
+        "mrr": sum(reciprocal_ranks) / len(queries),
+    }
+
+
+async def run_benchmark(
+    backends: List[str],
+    corpus_path: Path,
+    repeat: int,
+    dimension: int = 0
+) -> List[Dict[str, Any]]:
+    """Benchmark each named backend; unavailable backends are reported, not raised."""
+    corpus = load_corpus(corpus_path)
+    latency_texts = [query["text"] for query in corpus["queries"]]
+    results = []
+
+    for name in backends:
+        if name == "hashing" and dimension:
+            backend = HashingBackend(dimension=dimension)
+        else:
+            backend = BACKENDS[name]()
+
+        row: Dict[str, Any] = {"backend": name, "model": backend.model, "dimension": backend.dimension}
+        if not backend.available:
+            results.append({**row, "error": "backend not available"})
+            continue
+
+        try:
+            await backend.embed(["warm up"])
+            row.update(await measure_latency(backend, latency_texts, repeat))
+            row.update(await measure_quality(backend, corpus))
+        except Exception as e:
+            row["error"] = str(e)[:120]
+        results.append(row)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends on latency and retrieval quality")
+    parser.add_argument("--backends", default="hashing,litellm", help="Comma-separated backend names")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=3, help="Latency passes over the query set")
+    parser.add_argument("--dimension", type=int, default=0, help="Hashing backend dimension (default: settings)")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(unknown)}")
+
+    results = asyncio.run(run_benchmark(names, args.corpus, args.repeat, args.dimension))
+
+    print(f"{'backend':<10} {'model':<32} {'dim':>5} {'p50':>9} {'p99':>9} {'R@1':>6} {'R@3':>6} {'MRR':>6}")
+    for row in results:
+        prefix = f"{row['backend']:<10} {row['model']:<32} {row['dimension']:>5}"
+        if "error" in row:
+            print(f"{prefix}  skipped: {row['error']}")
+            continue
+        print(
+            f"{prefix} {row['p50_ms']:>7.2f}ms {row['p99_ms']:>7.2f}ms "
+            f"{row['recall_at_1']:>6.2f} {row['recall_at_3']:>6.2f} {row['mrr']:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
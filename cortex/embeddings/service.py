@@ -0,0 +1,250 @@
+"""Shared embedding service with content-hash caching."""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+import structlog
+
+from cortex.config import settings
+from cortex.embeddings.backends import EmbeddingBackend, create_backend
+from cortex.embeddings.batcher import EmbeddingBatcher
+from cortex.observability.metrics import metrics_collector
+from cortex.storage.redis_client import redis_client
+
+logger = structlog.get_logger()
+
+
+class EmbeddingError(Exception):
+    """Raised when text cannot be embedded."""
+
+
+class EmbeddingService:
+    """
+    Embeds text for semantic routing and memory, once per distinct text.
+
+    Vectors are cached under a hash of (model, dimension, text): first in an
+    in-process LRU, then in Redis as packed float16 bytes. Concurrent
+    requests for the same text share one in-flight call, so the router and
+    the memory manager embedding the same prompt cost a single API call.
+    Misses from concurrent requests are coalesced into batched provider
+    calls by an EmbeddingBatcher (EMBEDDING_BATCH_ENABLED).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[EmbeddingBackend] = None,
+        max_entries: Optional[int] = None,
+        use_redis: Optional[bool] = None,
+        ttl: Optional[int] = None,
+        batching: Optional[bool] = None
+    ):
+        """
+        Args:
+            backend: Where vectors come from (defaults to EMBEDDING_BACKEND)
+            max_entries: In-process LRU size
+            use_redis: Cache vectors in Redis (off for local backends)
+            ttl: Redis entry lifetime in seconds
+            batching: Coalesce concurrent provider calls (off for local backends)
+        """
+        self.backend = backend or create_backend()
+        self.model = self.backend.model
+        self.dimension = self.backend.dimension
+        self.max_entries = max_entries or settings.embedding_cache_max_entries
+        self.ttl = ttl or settings.embedding_cache_ttl
+
+        # A Redis round trip or a batching delay costs more than computing a local vector
+        self.use_redis = not self.backend.local and (
+            settings.embedding_cache_redis if use_redis is None else use_redis
+        )
+        batching = not self.backend.local and (
+            settings.embedding_batch_enabled if batching is None else batching
+        )
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self._batcher = EmbeddingBatcher(self._call_provider, self.model) if batching else None
+
+        logger.info(
+            "embedding_service_initialized",
+            backend=type(self.backend).__name__,
+            model=self.model,
+            dimension=self.dimension,
+            max_entries=self.max_entries,
+            redis=self.use_redis,
+            batching=batching
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether the backend can embed at all (e.g. litellm installed)."""
+        return self.backend.available
+
+    def cache_key(self, text: str) -> str:
+        """Content hash identifying a text under this model and dimension."""
+        return hashlib.sha256(f"{self.model}\n{self.dimension}\n{text}".encode("utf-8")).hexdigest()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Embed one text.
+
+        Returns:
+            float32 vector of length `dimension`
+
+        Raises:
+            EmbeddingError: If the provider call fails
+        """
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embed several texts, calling the provider once for all cache misses.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 vectors in input order
+
+        Raises:
+            EmbeddingError: If the provider call fails
+        """
+        keys = [self.cache_key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        # Tier 1: in-process LRU
+        for key in keys:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                vectors[key] = vector
+                metrics_collector.record_cache_hit("embedding_memory")
+
+        # Texts another caller is already embedding
+        waiting = {key: self._in_flight[key] for key in keys if key not in vectors and key in self._in_flight}
+
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors and key not in waiting]
+        if missing:
+            for key in missing:
+                metrics_collector.record_cache_miss("embedding_memory")
+
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in missing}
+            self._in_flight.update(futures)
+            try:
+                texts_by_key = dict(zip(keys, texts))
+                fetched = await self._fetch(missing, texts_by_key)
+                for key, vector in fetched.items():
+                    futures[key].set_result(vector)
+                    vectors[key] = vector
+            except BaseException as e:
+                # Waiters always see an EmbeddingError; cancellation and exit
+                # propagate unchanged to this caller
+                if isinstance(e, EmbeddingError):
+                    error = e
+                elif isinstance(e, Exception):
+                    error = EmbeddingError(str(e))
+                else:
+                    error = EmbeddingError(f"Embedding interrupted: {type(e).__name__}")
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(error)
+                        future.exception()  # mark retrieved; waiters re-raise it
+                if not isinstance(e, Exception):
+                    raise
+                raise error
+            finally:
+                for key in missing:
+                    self._in_flight.pop(key, None)
+
+        for key, future in waiting.items():
+            vectors[key] = await asyncio.shield(future)
+
+        return [vectors[key] for key in keys]
+
+    async def _fetch(self, keys: List[str], texts_by_key: Dict[str, str]) -> Dict[str, np.ndarray]:
+        """Resolve cache misses from Redis, then the provider."""
+        result: Dict[str, np.ndarray] = {}
+
+        # Tier 2: Redis (packed float16)
+        if self.use_redis:
+            try:
+                packed = await redis_client.get_embeddings(keys)
+            except Exception as e:
+                logger.debug("embedding_cache_redis_unavailable", error=str(e))
+                packed = [None] * len(keys)
+
+            for key, value in zip(keys, packed):
+                if value is not None and len(value) == self.dimension * 2:
+                    vector = np.frombuffer(value, dtype=np.float16).astype(np.float32)
+                    result[key] = vector
+                    self._store_local(key, vector)
+                    metrics_collector.record_cache_hit("embedding_redis")
+                else:
+                    metrics_collector.record_cache_miss("embedding_redis")
+
+        remaining = [key for key in keys if key not in result]
+        if not remaining:
+            return result
+
+        # Tier 3: provider, batched with other callers' misses
+        missing_texts = [texts_by_key[key] for key in remaining]
+        if self._batcher is not None:
+            computed = await self._batcher.embed(missing_texts)
+        else:
+            computed = await self._call_provider(missing_texts)
+        for key, vector in zip(remaining, computed):
+            result[key] = vector
+            self._store_local(key, vector)
+
+        if self.use_redis:
+            packed_items = {key: result[key].astype(np.float16).tobytes() for key in remaining}
+            try:
+                await redis_client.set_embeddings(packed_items, self.ttl)
+                # Versus caching the same vectors as JSON float lists
+                json_bytes = sum(len(json.dumps(result[key].tolist())) for key in remaining)
+                metrics_collector.record_embedding_cache_bytes_saved(
+                    json_bytes - sum(len(value) for value in packed_items.values())
+                )
+            except Exception as e:
+                logger.debug("embedding_cache_redis_unavailable", error=str(e))
+
+        return result
+
+    async def _call_provider(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts with one backend call and validate the dimension."""
+        started = time.perf_counter()
+        try:
+            vectors = await self.backend.embed(texts)
+        except Exception as e:
+            raise EmbeddingError(f"Embedding call failed for {self.model}: {e}") from e
+
+        if len(vectors) != len(texts):
+            raise EmbeddingError(f"{self.model} returned {len(vectors)} vectors for {len(texts)} texts")
+        for vector in vectors:
+            if vector.shape[0] != self.dimension:
+                raise EmbeddingError(
+                    f"{self.model} returned {vector.shape[0]} dimensions, expected {self.dimension}"
+                )
+
+        metrics_collector.record_embedding_call(self.model, len(texts), time.perf_counter() - started)
+        return vectors
+
+    def _store_local(self, key: str, vector: np.ndarray):
+        """Insert into the in-process LRU, evicting the oldest entries."""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all in-process entries."""
+        self._entries.clear()
+
+
+# Global embedding service (shared by the semantic router and the memory manager)
+embedding_service = EmbeddingService()
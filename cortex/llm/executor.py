@@ -165,10 +165,7 @@ class LiteLLMExecutor:
                 "model": response.model,
                 "choices": [
                     {
-                        "message": {
-                            "role": choice.message.role,
-                            "content": choice.message.content
-                        },
+                        "message": self._message_to_dict(choice.message),
                         "finish_reason": choice.finish_reason
                     }
                     for choice in response.choices
@@ -225,6 +222,34 @@ class LiteLLMExecutor:
             
             raise
     
+    @staticmethod
+    def _message_to_dict(message) -> Dict[str, Any]:
+        """
+        Convert a LiteLLM message into a plain dictionary.
+        
+        Tool calls are included only when the model requested any.
+        """
+        message_dict = {
+            "role": message.role,
+            "content": message.content
+        }
+        
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            message_dict["tool_calls"] = [
+                {
+                    "id": tool_call.id,
+                    "type": "function",
+                    "function": {
+                        "name": tool_call.function.name,
+                        "arguments": tool_call.function.arguments
+                    }
+                }
+                for tool_call in tool_calls
+            ]
+        
+        return message_dict
+    
     async def _get_api_key_for_model(self, model: str) -> Optional[str]:
         """
         Extract provider from model name and get API key.
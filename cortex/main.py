@@ -1,6 +1,7 @@
 """Main FastAPI application for Cortex AI Router."""
 
 import os
+import asyncio
 from pathlib import Path
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -29,12 +30,28 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("cortex_starting")
     await init_db()
+    
+    from cortex.agents.sandbox import sandbox_pool
+    if settings.sandbox_pool_enabled and settings.sandbox_pool_warmup:
+        await sandbox_pool.start()
+    
     logger.info("cortex_ready")
     
     yield
     
     # Shutdown
     logger.info("cortex_shutting_down")
+    await sandbox_pool.close()
+    
+    from cortex.observability.traces import trace_store
+    await trace_store.close()
+    
+    # Summarize buffered turns before the memory write buffer is flushed
+    from cortex.memory.scheduler import summarization_scheduler
+    await summarization_scheduler.close()
+    
+    from cortex.memory.manager import memory_manager
+    await memory_manager.disconnect()
 
 
 app = FastAPI(
@@ -67,7 +84,8 @@ from cortex.errors import (
 )
 from cortex.admin.routes import router as admin_router
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from cortex.agents.events import set_step_listener, reset_step_listener, format_sse
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 # Add exception handlers
@@ -105,6 +123,57 @@ async def chat_completions(request: ChatCompletionRequest):
     return response
 
 
+@app.post("/v1/agent/stream")
+async def agent_stream(request: ChatCompletionRequest):
+    """
+    Chat completion with live agentic step events (Server-Sent Events).
+    
+    Emits a `step` event as each agentic step starts and finishes (timing,
+    worker, tool result summary), then one `result` event carrying the
+    completion, or an `error` event if the request failed.
+    """
+    user_id = request.user or "anonymous"
+    messages = [msg.model_dump() for msg in request.messages]
+    events: asyncio.Queue = asyncio.Queue()
+    
+    # The pipeline task inherits the listener through its context
+    token = set_step_listener(events.put_nowait)
+    try:
+        task = asyncio.create_task(request_pipeline.process_request(
+            messages=messages,
+            user_id=user_id,
+            model=request.model,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens
+        ))
+    finally:
+        reset_step_listener(token)
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    
+    async def event_stream():
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield format_sse("step", event)
+            
+            try:
+                yield format_sse("result", task.result())
+            except Exception as e:
+                yield format_sse("error", {"error": str(e), "type": type(e).__name__})
+        finally:
+            # Client went away: stop working on its behalf
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Cloud Run."""
@@ -0,0 +1,162 @@
+"""
+Memory I/O concurrency benchmark.
+
+Measures event-loop latency while many memory retrievals run in parallel,
+comparing the old pattern (synchronous QdrantClient calls inside async
+code) with the current MemoryManager client. Embeddings are replaced by
+random vectors so only vector-store I/O is measured.
+
+Usage:
+    python -m cortex.memory.benchmark                       # Qdrant in-memory mode
+    python -m cortex.memory.benchmark --url http://localhost:6333
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+
+from cortex.memory.manager import MemoryManager
+
+BENCHMARK_COLLECTION = "cortex_memory_benchmark"
+
+
+async def _monitor_loop_lag(stop: asyncio.Event, interval: float, lags: List[float]):
+    """Sleep in short intervals and record how late the loop wakes us up."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(time.perf_counter() - started - interval, 0.0))
+
+
+async def _run_phase(name: str, search, queries: List[List[float]], concurrency: int) -> Dict[str, float]:
+    """Run all queries with bounded concurrency while monitoring loop lag."""
+    lags: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor_loop_lag(stop, 0.001, lags))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(vector):
+        async with semaphore:
+            await search(vector)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(vector) for vector in queries))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "mode": name,
+        "queries": len(queries),
+        "seconds": elapsed,
+        "qps": len(queries) / elapsed if elapsed else 0.0,
+        "lag_p50_ms": statistics.median(lags_ms),
+        "lag_p99_ms": lags_ms[min(int(len(lags_ms) * 0.99), len(lags_ms) - 1)],
+        "lag_max_ms": lags_ms[-1],
+    }
+
+
+def _points(rng: np.random.Generator, count: int, dim: int, users: int) -> List[PointStruct]:
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return [
+        PointStruct(
+            id=str(uuid.uuid4()),
+            vector=vectors[i].tolist(),
+            payload={"user_id": f"user-{i % users}", "summary": f"memory {i}"}
+        )
+        for i in range(count)
+    ]
+
+
+async def run_benchmark(
+    url: str,
+    points: int,
+    queries: int,
+    concurrency: int,
+    dim: int,
+    users: int
+) -> List[Dict[str, float]]:
+    """Seed a collection, then time blocking vs non-blocking retrieval."""
+    rng = np.random.default_rng(0)
+    seed_points = _points(rng, points, dim, users)
+    query_vectors = rng.standard_normal((queries, dim)).astype(np.float32).tolist()
+
+    # Before: synchronous client called directly from async code
+    sync_client = QdrantClient(location=url) if url == ":memory:" else QdrantClient(url=url)
+    if sync_client.collection_exists(BENCHMARK_COLLECTION):
+        sync_client.delete_collection(BENCHMARK_COLLECTION)
+    sync_client.create_collection(
+        BENCHMARK_COLLECTION, vectors_config=VectorParams(size=dim, distance=Distance.COSINE)
+    )
+    sync_client.upsert(BENCHMARK_COLLECTION, points=seed_points)
+    user_filter = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value="user-0"))])
+
+    async def blocking_search(vector):
+        sync_client.query_points(BENCHMARK_COLLECTION, query=vector, query_filter=user_filter, limit=3)
+
+    results = [await _run_phase("blocking (sync client)", blocking_search, query_vectors, concurrency)]
+
+    # After: MemoryManager (AsyncQdrantClient, or thread pool in local mode)
+    if url == ":memory:":
+        sync_client.close()
+
+    manager = MemoryManager(qdrant_url=url, collection_name=BENCHMARK_COLLECTION, service=False)
+    manager._embedding_dim = dim
+    await manager.connect()
+    if url == ":memory:":
+        # The in-memory store is per client; seed the manager's own instance
+        await manager._client.upsert(BENCHMARK_COLLECTION, points=seed_points)
+
+    vectors = iter(query_vectors)
+
+    async def random_embedding(text: str) -> List[float]:
+        return next(vectors)
+
+    manager._embed_text = random_embedding
+
+    async def manager_search(vector):
+        await manager.retrieve_context("user-0", "benchmark query", top_k=3)
+
+    results.append(await _run_phase(
+        "non-blocking (MemoryManager)", manager_search, query_vectors, concurrency
+    ))
+
+    if url != ":memory:":
+        await manager._client.delete_collection(BENCHMARK_COLLECTION)
+        sync_client.close()
+    await manager.disconnect()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event-loop latency under parallel memory retrieval")
+    parser.add_argument("--url", default=":memory:", help="Qdrant URL, or :memory: for local mode")
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(
+        args.url, args.points, args.queries, args.concurrency, args.dim, args.users
+    ))
+
+    print(f"{'mode':<30} {'qps':>8} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for row in results:
+        print(
+            f"{row['mode']:<30} {row['qps']:>8.1f} {row['lag_p50_ms']:>7.2f}ms "
+            f"{row['lag_p99_ms']:>7.2f}ms {row['lag_max_ms']:>7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Memory consolidation and decay job.
+
+For every user: deletes memories that have decayed below the retention
+score, merges clusters of related memories into one consolidated memory,
+and enforces the per-user cap, writing changes in throttled batches.
+Memories older than MEMORY_RETENTION_MAX_DAYS are first removed with one
+server-side delete against the indexed `timestamp` payload field.
+
+Run it from cron, or keep it running with --every:
+
+    python -m cortex.memory.compact --dry-run
+    python -m cortex.memory.compact --user user-123
+    python -m cortex.memory.compact --every 86400
+"""
+
+import argparse
+import asyncio
+import math
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from qdrant_client.models import (
+    DatetimeRange, FieldCondition, Filter, FilterSelector, PayloadSchemaType, PointIdsList, PointStruct
+)
+
+from cortex.config import settings
+from cortex.embeddings.service import embedding_service
+from cortex.memory.dedup import load_points, plan_merges
+from cortex.memory.manager import MemoryManager
+from cortex.memory.snippets import snippet_store
+
+CONSOLIDATED_MAX_CHARS = 500
+
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+_FILLER = frozenset("a an and are as at be by for from has have in is it of on or the their to user user's was with".split())
+
+
+def retention_score(payload: Dict[str, Any], now: datetime, half_life_days: float) -> float:
+    """
+    Usage-weighted recency: (1 + ln hits) halved every half_life_days since last seen.
+
+    A memory seen once scores 1.0 today and 0.5 after one half-life; each
+    time it is seen again (see store_memory's duplicate refresh) its
+    timestamp resets and its weight grows.
+    """
+    hits = max(int(payload.get("hit_count", 1) or 1), 1)
+    seen = _last_seen(payload)
+    age_days = max((now - seen).total_seconds() / 86400, 0.0) if seen is not None else 0.0
+    return (1 + math.log(hits)) * 0.5 ** (age_days / half_life_days)
+
+
+def _last_seen(payload: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        seen = datetime.fromisoformat(str(payload.get("timestamp") or ""))
+    except ValueError:
+        return None
+    return seen if seen.tzinfo is not None else seen.replace(tzinfo=timezone.utc)
+
+
+def consolidate_text(summaries: List[str]) -> str:
+    """
+    Merge related summaries into one, most important first.
+
+    A summary is kept only if it adds at least two content words the
+    earlier ones do not already cover.
+    """
+    parts: List[str] = []
+    covered: Set[str] = set()
+    for summary in summaries:
+        words = set(_WORD_PATTERN.findall(summary.lower())) - _FILLER
+        if parts and len(words - covered) < 2:
+            continue
+        parts.append(summary.strip().rstrip("."))
+        covered |= words
+        if sum(len(part) + 2 for part in parts) > CONSOLIDATED_MAX_CHARS:
+            parts.pop()
+            break
+    return ". ".join(parts) + "."
+
+
+async def ensure_retention_index(manager: MemoryManager):
+    """Index the timestamp field so retention filters do not scan payloads."""
+    await manager._call(manager._client.create_payload_index(
+        collection_name=manager.collection_name,
+        field_name="timestamp",
+        field_schema=PayloadSchemaType.DATETIME
+    ))
+
+
+async def expire_by_age(
+    manager: MemoryManager,
+    max_days: int,
+    dry_run: bool,
+    cutoff: Optional[datetime] = None
+) -> int:
+    """Delete every memory not seen for max_days (or since cutoff), server side."""
+    cutoff = cutoff or datetime.now(timezone.utc) - timedelta(days=max_days)
+    expired = Filter(must=[FieldCondition(key="timestamp", range=DatetimeRange(lt=cutoff))])
+
+    count = (await manager._call(manager._client.count(
+        collection_name=manager.collection_name,
+        count_filter=expired,
+        exact=True
+    ))).count
+    if count and not dry_run:
+        if snippet_store.enabled:
+            await _delete_snippets(manager, expired)
+        await manager._call(manager._client.delete(
+            collection_name=manager.collection_name,
+            points_selector=FilterSelector(filter=expired)
+        ))
+    return count
+
+
+async def _delete_snippets(manager: MemoryManager, expired: Filter):
+    """Drop the snippets of the memories about to expire (ids only, no payloads)."""
+    offset = None
+    while True:
+        points, offset = await manager._call(manager._client.scroll(
+            collection_name=manager.collection_name,
+            scroll_filter=expired,
+            limit=1024,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False
+        ))
+        await snippet_store.delete([point.id for point in points])
+        if offset is None:
+            return
+
+
+async def list_users(manager: MemoryManager) -> List[str]:
+    """Distinct user_ids in the collection (payload only, no vectors)."""
+    users: Set[str] = set()
+    offset = None
+    while True:
+        points, offset = await manager._call(manager._client.scroll(
+            collection_name=manager.collection_name,
+            limit=1024,
+            offset=offset,
+            with_payload=["user_id"],
+            with_vectors=False
+        ))
+        users.update((point.payload or {}).get("user_id", "") for point in points)
+        if offset is None:
+            return sorted(users)
+
+
+class CompactionJob:
+    """Plans and applies decay, consolidation and caps one user at a time."""
+
+    def __init__(
+        self,
+        manager: MemoryManager,
+        consolidate_threshold: Optional[float] = None,
+        half_life_days: Optional[float] = None,
+        min_score: Optional[float] = None,
+        max_per_user: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        pause_ms: Optional[float] = None,
+        dry_run: bool = False,
+        expired_before: Optional[datetime] = None
+    ):
+        self.manager = manager
+        self.consolidate_threshold = consolidate_threshold or settings.memory_compact_consolidate_threshold
+        self.half_life_days = half_life_days or settings.memory_decay_half_life_days
+        self.min_score = settings.memory_decay_min_score if min_score is None else min_score
+        self.max_per_user = max_per_user or settings.memory_max_per_user
+        self.batch_size = batch_size or settings.memory_compact_batch_size
+        self.pause = (settings.memory_compact_pause_ms if pause_ms is None else pause_ms) / 1000
+        self.dry_run = dry_run
+        # Memories last seen before this are skipped (a dry run's expire_by_age leaves them in place)
+        self.expired_before = expired_before
+        self.totals: Dict[str, int] = {
+            "users": 0, "points_before": 0, "decayed": 0, "consolidated": 0, "merged": 0, "capped": 0
+        }
+
+    async def compact_user(self, user_id: str):
+        """Compact one user's memories."""
+        points = (await load_points(self.manager, user_id)).get(user_id, [])
+        if self.expired_before is not None:
+            points = [
+                point for point in points
+                if (_last_seen(point.payload or {}) or self.expired_before) >= self.expired_before
+            ]
+        if not points:
+            return
+        self.totals["users"] += 1
+        self.totals["points_before"] += len(points)
+
+        now = datetime.now(timezone.utc)
+        scores = {point.id: retention_score(point.payload or {}, now, self.half_life_days) for point in points}
+
+        # 1. Decay
+        deletes = [point.id for point in points if scores[point.id] < self.min_score]
+        self.totals["decayed"] += len(deletes)
+        alive = [point for point in points if scores[point.id] >= self.min_score]
+
+        # 2. Consolidation of related memories
+        upserts = []
+        merges = plan_merges(alive, self.consolidate_threshold) if len(alive) > 1 else []
+        if merges:
+            texts = []
+            for merge in merges:
+                members = sorted(
+                    [merge["keep"]] + merge["merge"],
+                    key=lambda point: scores[point.id],
+                    reverse=True
+                )
+                texts.append(consolidate_text([(point.payload or {}).get("summary", "") for point in members]))
+
+            vectors = await embedding_service.embed_many(texts)
+            merged_ids = set()
+            for merge, text, vector in zip(merges, texts, vectors):
+                keep = merge["keep"]
+                upserts.append(PointStruct(
+                    id=keep.id,
+                    vector=vector.tolist(),
+                    payload={
+                        **(keep.payload or {}),
+                        "summary": text,
+                        "timestamp": merge["timestamp"],
+                        "hit_count": merge["hit_count"],
+                        "consolidated_from": len(merge["merge"]) + 1,
+                    }
+                ))
+                scores[keep.id] = retention_score(upserts[-1].payload, now, self.half_life_days)
+                merged_ids.update(point.id for point in merge["merge"])
+
+            deletes.extend(merged_ids)
+            alive = [point for point in alive if point.id not in merged_ids]
+            self.totals["consolidated"] += len(merges)
+            self.totals["merged"] += len(merged_ids)
+
+        # 3. Per-user cap: drop the lowest-scoring memories
+        if len(alive) > self.max_per_user:
+            ranked = sorted(alive, key=lambda point: scores[point.id], reverse=True)
+            capped = [point.id for point in ranked[self.max_per_user:]]
+            capped_set = set(capped)
+            upserts = [point for point in upserts if point.id not in capped_set]
+            deletes.extend(capped)
+            self.totals["capped"] += len(capped)
+
+        if not self.dry_run:
+            await self._apply(upserts, deletes)
+
+    async def _apply(self, upserts: List[PointStruct], deletes: List[Any]):
+        """Write in batches, pausing between them to leave room for live traffic."""
+        for start in range(0, len(upserts), self.batch_size):
+            await self.manager._call(self.manager._client.upsert(
+                collection_name=self.manager.collection_name,
+                points=upserts[start:start + self.batch_size]
+            ))
+            await asyncio.sleep(self.pause)
+
+        for start in range(0, len(deletes), self.batch_size):
+            await self.manager._call(self.manager._client.delete(
+                collection_name=self.manager.collection_name,
+                points_selector=PointIdsList(points=deletes[start:start + self.batch_size])
+            ))
+            await snippet_store.delete(deletes[start:start + self.batch_size])
+            await asyncio.sleep(self.pause)
+
+
+async def run_compaction(
+    url: Optional[str],
+    collection: Optional[str],
+    user_id: Optional[str],
+    dry_run: bool,
+    max_age_days: Optional[int] = None
+) -> Dict[str, Any]:
+    """Run one compaction pass and report what changed."""
+    manager = MemoryManager(qdrant_url=url, collection_name=collection, service=False)
+    await manager.connect()
+    try:
+        started = time.perf_counter()
+        max_age_days = settings.memory_retention_max_days if max_age_days is None else max_age_days
+
+        expired = 0
+        cutoff = None
+        if max_age_days:
+            if not dry_run and not manager._is_local():
+                await ensure_retention_index(manager)
+            cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+            expired = await expire_by_age(manager, max_age_days, dry_run, cutoff)
+
+        # A real run has already deleted the expired memories; a dry run must not count them twice
+        job = CompactionJob(manager, dry_run=dry_run, expired_before=cutoff if dry_run else None)
+        for user in [user_id] if user_id else await list_users(manager):
+            await job.compact_user(user)
+
+        elapsed = time.perf_counter() - started
+        removed = job.totals["decayed"] + job.totals["merged"] + job.totals["capped"]
+        return {
+            "collection": manager.collection_name,
+            "expired_by_age": expired,
+            **job.totals,
+            "points_after": job.totals["points_before"] - removed,
+            "seconds": elapsed,
+            "points_per_second": job.totals["points_before"] / elapsed if elapsed else 0.0,
+            "dry_run": dry_run,
+        }
+    finally:
+        await manager.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidate, decay and cap stored memories")
+    parser.add_argument("--url", default=None, help="Qdrant URL or path:<dir> (default: QDRANT_URL)")
+    parser.add_argument("--collection", default=None, help="Collection (default: QDRANT_COLLECTION)")
+    parser.add_argument("--user", default=None, help="Only compact this user's memories")
+    parser.add_argument("--max-age-days", type=int, default=None,
+                        help="Delete memories not seen for this long (default: MEMORY_RETENTION_MAX_DAYS, 0 disables)")
+    parser.add_argument("--dry-run", action="store_true", help="Report without changing the collection")
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N seconds instead of running once")
+    args = parser.parse_args()
+
+    while True:
+        report = asyncio.run(run_compaction(args.url, args.collection, args.user, args.dry_run, args.max_age_days))
+        prefix = "would " if report["dry_run"] else ""
+        print(
+            f"{report['collection']}: {report['users']} users, {report['points_before']} points -> "
+            f"{report['points_after']} ({prefix}expire {report['expired_by_age']} by age, "
+            f"decay {report['decayed']}, merge {report['merged']} into {report['consolidated']}, "
+            f"cap {report['capped']}) in {report['seconds']:.1f}s "
+            f"({report['points_per_second']:.0f} points/s)"
+        )
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
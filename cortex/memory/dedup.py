@@ -0,0 +1,174 @@
+"""
+Batch near-duplicate removal for an existing memory collection.
+
+Applies the same check store_memory now runs on insert to memories that
+were stored before it existed: within each user's memories, points whose
+cosine similarity to an earlier kept point is at or above the threshold
+are merged into it (latest timestamp, summed hit counts) and deleted.
+
+Usage:
+    python -m cortex.memory.dedup --dry-run
+    python -m cortex.memory.dedup --threshold 0.93 --user user-123
+    python -m cortex.memory.dedup --url path:/data/qdrant --collection cortex_memory
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from qdrant_client.models import Filter, FieldCondition, MatchValue, PointIdsList
+
+from cortex.config import settings
+from cortex.memory.manager import MemoryManager
+from cortex.memory.snippets import snippet_store
+
+SCROLL_PAGE_SIZE = 256
+DELETE_BATCH_SIZE = 256
+
+
+async def load_points(manager: MemoryManager, user_id: Optional[str] = None) -> Dict[str, List[Any]]:
+    """Scroll the collection (vectors included) and group points by user."""
+    scroll_filter = None
+    if user_id:
+        scroll_filter = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+
+    by_user: Dict[str, List[Any]] = {}
+    offset = None
+    while True:
+        points, offset = await manager._call(manager._client.scroll(
+            collection_name=manager.collection_name,
+            scroll_filter=scroll_filter,
+            limit=SCROLL_PAGE_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        ))
+        for point in points:
+            by_user.setdefault((point.payload or {}).get("user_id", ""), []).append(point)
+        if offset is None:
+            return by_user
+
+
+def plan_merges(points: List[Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Greedy clustering of one user's points, oldest first.
+
+    Returns:
+        One entry per kept point that absorbs duplicates:
+        {"keep": point, "merge": [points], "timestamp": str, "hit_count": int}
+    """
+    points = sorted(points, key=lambda point: (point.payload or {}).get("timestamp", ""))
+    matrix = np.asarray([point.vector for point in points], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    kept: List[int] = []
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(points)):
+        if kept:
+            scores = matrix[kept] @ matrix[index]
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                groups.setdefault(kept[best], []).append(index)
+                continue
+        kept.append(index)
+
+    merges = []
+    for keep_index, merged in groups.items():
+        members = [points[keep_index]] + [points[i] for i in merged]
+        merges.append({
+            "keep": points[keep_index],
+            "merge": [points[i] for i in merged],
+            "timestamp": max((point.payload or {}).get("timestamp", "") for point in members),
+            "hit_count": sum((point.payload or {}).get("hit_count", 1) for point in members),
+        })
+    return merges
+
+
+async def apply_merges(manager: MemoryManager, merges: List[Dict[str, Any]]):
+    """Refresh each kept point, then delete the points merged into it."""
+    for merge in merges:
+        await manager._call(manager._client.set_payload(
+            collection_name=manager.collection_name,
+            payload={"timestamp": merge["timestamp"], "hit_count": merge["hit_count"]},
+            points=[merge["keep"].id]
+        ))
+
+    doomed = [point.id for merge in merges for point in merge["merge"]]
+    for start in range(0, len(doomed), DELETE_BATCH_SIZE):
+        await manager._call(manager._client.delete(
+            collection_name=manager.collection_name,
+            points_selector=PointIdsList(points=doomed[start:start + DELETE_BATCH_SIZE])
+        ))
+        await snippet_store.delete(doomed[start:start + DELETE_BATCH_SIZE])
+
+
+async def run_dedup(
+    url: Optional[str],
+    collection: Optional[str],
+    threshold: float,
+    user_id: Optional[str],
+    dry_run: bool
+) -> Dict[str, Any]:
+    """Deduplicate a collection and report what changed."""
+    manager = MemoryManager(qdrant_url=url, collection_name=collection, service=False)
+    await manager.connect()
+    try:
+        started = time.perf_counter()
+        by_user = await load_points(manager, user_id)
+        before = sum(len(points) for points in by_user.values())
+
+        merges = []
+        for points in by_user.values():
+            merges.extend(plan_merges(points, threshold))
+        removed = sum(len(merge["merge"]) for merge in merges)
+
+        if not dry_run and merges:
+            await apply_merges(manager, merges)
+
+        return {
+            "collection": manager.collection_name,
+            "users": len(by_user),
+            "points_before": before,
+            "points_removed": removed,
+            "points_after": before - removed,
+            "clusters": len(merges),
+            "examples": [
+                (merge["keep"].payload.get("summary", ""), [p.payload.get("summary", "") for p in merge["merge"]])
+                for merge in merges[:5]
+            ],
+            "seconds": time.perf_counter() - started,
+            "dry_run": dry_run,
+        }
+    finally:
+        await manager.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge near-duplicate memories in a Qdrant collection")
+    parser.add_argument("--url", default=None, help="Qdrant URL or path:<dir> (default: QDRANT_URL)")
+    parser.add_argument("--collection", default=None, help="Collection (default: QDRANT_COLLECTION)")
+    parser.add_argument("--threshold", type=float, default=settings.memory_dedup_threshold,
+                        help="Cosine similarity at which memories count as duplicates")
+    parser.add_argument("--user", default=None, help="Only deduplicate this user's memories")
+    parser.add_argument("--dry-run", action="store_true", help="Report without changing the collection")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_dedup(args.url, args.collection, args.threshold, args.user, args.dry_run))
+
+    action = "would remove" if report["dry_run"] else "removed"
+    print(
+        f"{report['collection']}: {report['points_before']} points across {report['users']} users, "
+        f"{action} {report['points_removed']} duplicates in {report['clusters']} clusters "
+        f"({report['points_after']} left, {report['seconds']:.1f}s)"
+    )
+    for kept, merged in report["examples"]:
+        print(f"  keep: {kept}")
+        for summary in merged:
+            print(f"    dup: {summary}")
+
+
+if __name__ == "__main__":
+    main()
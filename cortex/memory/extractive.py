@@ -0,0 +1,250 @@
+"""
+Local extractive summarizer.
+
+Picks the most fact-like sentences the user wrote about themselves and
+rewrites them in the third person, without any network call. Used by the
+"local" and "hybrid" memory summarizer modes.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import structlog
+
+from cortex.pii.redactor import PIIRedactor
+
+logger = structlog.get_logger()
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Statements that usually carry durable context about the user
+FACT_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r"\b(i am|i'm|im)\b",
+        r"\bi (work|live|use|prefer|like|love|hate|need|want|have|own|study|teach|run|build|manage|speak|play)\w*\b",
+        r"\bi've been\b",
+        r"\bmy (name|job|team|company|wife|husband|partner|son|daughter|kids?|dog|cat|project|stack|role|goal|favorite|favourite)\b",
+        r"\bwe (use|run|build|deploy|are|have|work)\w*\b",
+        r"\b(our|my) \w+ (is|are|uses?|runs?)\b",
+        r"\ballergic\b|\bvegetarian\b|\bvegan\b|\bbased in\b|\bborn\b",
+    )
+]
+
+# Requests and questions describe the task, not the user
+REQUEST_PATTERN = re.compile(
+    r"^(please |can you|could you|would you|help me|write|create|make|generate|explain|show|tell me|give me|fix|how|what|why|when|where|which)\b",
+    re.IGNORECASE
+)
+
+STOPWORDS = frozenset("""
+a about an and are as at be been but by can do for from had has have how i if in into is it
+its just me my of on or our so than that the their them then there these this to too up us
+was we were what when which who will with would you your i'm i've im
+""".split())
+
+# Nouns that already name the user's group: "our team" -> "their team", not "their team's team"
+_GROUP_NOUNS = r"(team|company|org|organization|startup|group|department|lab)"
+
+# First-person phrasing -> third person ("I'm" -> "User is", "we're" -> "User's team is")
+THIRD_PERSON_REWRITES = [
+    (re.compile(rf"^our {_GROUP_NOUNS}\b", re.IGNORECASE), r"User's \1"),
+    (re.compile(r"^(my|our)\b", re.IGNORECASE), "User's"),
+    (re.compile(r"\b(i am|i'm|im)\b", re.IGNORECASE), "User is"),
+    (re.compile(r"\b(i have|i've)\b", re.IGNORECASE), "User has"),
+    (re.compile(r"\bi was\b", re.IGNORECASE), "User was"),
+    (re.compile(r"\b(i'd|i would)\b", re.IGNORECASE), "User would"),
+    (re.compile(r"\b(i'll|i will)\b", re.IGNORECASE), "User will"),
+    (re.compile(r"\b(we are|we're)\b", re.IGNORECASE), "User's team is"),
+    (re.compile(r"\bwe were\b", re.IGNORECASE), "User's team was"),
+    (re.compile(r"\b(we have|we've)\b", re.IGNORECASE), "User's team has"),
+    (re.compile(r"\b(we'd|we would)\b", re.IGNORECASE), "User's team would"),
+    (re.compile(r"\b(we'll|we will)\b", re.IGNORECASE), "User's team will"),
+    (re.compile(r"\bmyself\b", re.IGNORECASE), "themselves"),
+    (re.compile(r"\bourselves\b", re.IGNORECASE), "themselves"),
+    (re.compile(r"\b(mine|ours)\b", re.IGNORECASE), "theirs"),
+    (re.compile(r"\bmy\b", re.IGNORECASE), "their"),
+    (re.compile(rf"\bour {_GROUP_NOUNS}\b", re.IGNORECASE), r"their \1"),
+    (re.compile(r"\bour\b", re.IGNORECASE), "their team's"),
+    (re.compile(r"\b(me|us)\b", re.IGNORECASE), "them"),
+]
+
+# "I/we [adverb] verb": the verb is conjugated for "User" / "User's team"
+_ADVERBS = r"(?:also|often|usually|mostly|mainly|primarily|still|currently|always|never|only|just|really|sometimes|actually)"
+_SUBJECT_VERB = re.compile(rf"\b(i|we) ({_ADVERBS} )?(\w+(?:n't)?)\b(?!')", re.IGNORECASE)
+_SUBJECTS = {"i": "User", "we": "User's team"}
+_MODALS = frozenset({"can", "could", "should", "must", "might", "may", "shall", "would", "will", "did"})
+_NEGATIONS = {"don't": "doesn't", "haven't": "hasn't", "aren't": "isn't", "weren't": "wasn't"}
+
+MAX_SENTENCE_WORDS = 40
+MIN_SENTENCE_WORDS = 4
+
+# Bound on the document-frequency table before counts are halved
+MAX_DOCUMENTS = 100_000
+
+
+class ExtractiveSummarizer:
+    """
+    Heuristic + TF-IDF sentence extraction from the user's side of a turn.
+
+    Sentences are scored by fact patterns (first-person statements such as
+    "I work on", "my team uses"), penalized as questions or requests, and
+    weighted by the TF-IDF of their words against every sentence seen so
+    far, so distinctive details outrank boilerplate. PII is replaced with
+    type placeholders before anything is returned. Same interface as
+    MemorySummarizer; token usage is always zero.
+    """
+
+    model = "local/extractive"
+
+    def __init__(self, min_score: float = 1.5):
+        """
+        Args:
+            min_score: Sentences scoring below this are never extracted
+        """
+        self.min_score = min_score
+        self._document_frequency: Counter = Counter()
+        self._documents = 0
+
+    async def summarize_conversation(self, conversation: Dict) -> Optional[str]:
+        """
+        Extracts the single most fact-like sentence from a turn.
+
+        Args:
+            conversation: Dictionary with user and assistant messages
+
+        Returns:
+            Fact string or None if nothing qualifies
+        """
+        facts, _ = await self.summarize_batch([conversation], max_facts=1)
+        return facts[0] if facts else None
+
+    async def summarize_batch(
+        self,
+        conversations: List[Dict],
+        max_facts: int = 5
+    ) -> Tuple[List[str], int]:
+        """
+        Extracts up to max_facts facts from several turns.
+
+        Args:
+            conversations: Conversation dictionaries, oldest first
+            max_facts: Upper bound on facts returned
+
+        Returns:
+            Tuple of (facts, tokens used = 0)
+        """
+        return self.extract(conversations, max_facts), 0
+
+    def extract(self, conversations: List[Dict], max_facts: int = 5) -> List[str]:
+        """Synchronous extraction (microseconds per turn)."""
+        sentences = []
+        for conversation in conversations:
+            for sentence in _SENTENCE_SPLIT.split(self._user_text(conversation)):
+                sentence = sentence.strip(" \t-*")
+                words = _WORD_PATTERN.findall(sentence.lower())
+                if sentence:
+                    sentences.append((sentence, words))
+
+        self._observe(words for _, words in sentences)
+
+        scored = []
+        for index, (sentence, words) in enumerate(sentences):
+            score = self._score(sentence, words)
+            if score >= self.min_score:
+                # Later sentences win ties: newer context supersedes older
+                scored.append((score, index, sentence))
+
+        facts, seen = [], set()
+        for _, _, sentence in sorted(scored, reverse=True):
+            fact = self._to_fact(sentence)
+            key = fact.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            facts.append(fact)
+            if len(facts) >= max_facts:
+                break
+        return facts
+
+    @staticmethod
+    def _user_text(conversation: Dict) -> str:
+        """Only the user's words describe the user."""
+        if "user" in conversation:
+            return conversation.get("user") or ""
+        return "\n".join(
+            message.get("content", "") for message in conversation.get("messages", [])
+            if message.get("role") == "user" and isinstance(message.get("content"), str)
+        )
+
+    def _observe(self, documents):
+        """Update document frequencies with new sentences."""
+        for words in documents:
+            self._document_frequency.update(set(words) - STOPWORDS)
+            self._documents += 1
+
+        if self._documents > MAX_DOCUMENTS:
+            self._documents //= 2
+            self._document_frequency = Counter({
+                word: count // 2 for word, count in self._document_frequency.items() if count > 1
+            })
+
+    def _score(self, sentence: str, words: List[str]) -> float:
+        if not MIN_SENTENCE_WORDS <= len(words) <= MAX_SENTENCE_WORDS:
+            return 0.0
+
+        score = 0.0
+        if any(pattern.search(sentence) for pattern in FACT_PATTERNS):
+            score += 2.0
+        if sentence.rstrip().endswith("?"):
+            score -= 2.5
+        if REQUEST_PATTERN.match(sentence):
+            score -= 1.5
+
+        content = [word for word in words if word not in STOPWORDS]
+        if content:
+            max_idf = math.log(self._documents + 1) + 1
+            idf = sum(
+                math.log((self._documents + 1) / (self._document_frequency[word] + 1)) + 1
+                for word in content
+            ) / len(content)
+            score += idf / max_idf  # 0..1, distinctive wording scores higher
+        return score
+
+    @staticmethod
+    def _to_fact(sentence: str) -> str:
+        """Third-person, PII-free rewrite of a first-person sentence."""
+        # The PII patterns do not match a value directly followed by sentence punctuation
+        sentence = sentence.strip().rstrip(".!")
+        for pii_type, pattern in PIIRedactor.PATTERNS.items():
+            sentence = pattern.sub(f"[{pii_type}]", sentence)
+
+        for pattern, replacement in THIRD_PERSON_REWRITES:
+            sentence = pattern.sub(replacement, sentence)
+        sentence = _SUBJECT_VERB.sub(
+            lambda match: f"{_SUBJECTS[match.group(1).lower()]} {match.group(2) or ''}{_conjugate(match.group(3))}",
+            sentence
+        )
+
+        if not sentence.startswith("User"):
+            sentence = "User said: " + sentence
+        return sentence + "."
+
+
+def _conjugate(verb: str) -> str:
+    """Third-person singular of a verb ("work" -> "works"), naively."""
+    lower = verb.lower()
+    if lower in _NEGATIONS:
+        return _NEGATIONS[lower]
+    if lower in _MODALS or lower.endswith(("ed", "n't")):
+        return verb
+    if lower.endswith(("s", "sh", "ch", "x", "z", "o")):
+        return verb + "es"
+    if lower.endswith("y") and len(lower) > 1 and lower[-2] not in "aeiou":
+        return verb[:-1] + "ies"
+    return verb + "s"
+
+
+# Global extractive summarizer
+extractive_summarizer = ExtractiveSummarizer()
@@ -0,0 +1,283 @@
+"""
+Per-user hot memory cache.
+
+Holds the memory vectors and summaries of recently active users in
+process, so their retrievals are a NumPy matrix-vector product instead of
+a Qdrant search. Replicas keep each other coherent over Redis pub/sub.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+import structlog
+
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+from cortex.storage.redis_client import redis_client
+
+logger = structlog.get_logger()
+
+MAX_RESUBSCRIBE_BACKOFF_SECONDS = 30.0
+
+
+class _HotEntry:
+    """One user's memories: row i of `matrix` is ids[i] / summaries[i]."""
+
+    __slots__ = ("ids", "summaries", "matrix", "nbytes", "loaded_at")
+
+    def __init__(self, ids: List[Any], summaries: List[str], matrix: np.ndarray):
+        self.ids = ids
+        self.summaries = summaries
+        self.matrix = matrix
+        self.nbytes = matrix.nbytes + sum(len(summary) for summary in summaries)
+        self.loaded_at = time.monotonic()
+
+
+class HotMemoryCache:
+    """
+    LRU over users, bounded by user count and total bytes.
+
+    A user's entry is loaded on first retrieval and updated in place when
+    new memories are stored (write-through). After a write reaches the
+    vector store, the user is invalidated on every other replica over a
+    Redis channel; they reload on the next access. Entries also expire
+    after `ttl` seconds, which catches changes made outside the service
+    (dedup, compaction).
+
+    A load that overlaps a write or an invalidation of the same user is
+    discarded rather than caching stale memories.
+    """
+
+    def __init__(
+        self,
+        max_users: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        channel: Optional[str] = None
+    ):
+        """
+        Args:
+            max_users: Users held at most
+            max_bytes: Bytes of vectors and summaries held at most
+            ttl: Seconds before an entry is reloaded
+            channel: Redis pub/sub channel for invalidations
+        """
+        self.max_users = max_users or settings.memory_hot_cache_max_users
+        self.max_bytes = max_bytes or settings.memory_hot_cache_max_bytes
+        self.ttl = ttl or settings.memory_hot_cache_ttl
+        self.channel = channel or settings.memory_hot_cache_channel
+        self.instance_id = uuid.uuid4().hex
+
+        self._entries: "OrderedDict[str, _HotEntry]" = OrderedDict()
+        self._bytes = 0
+        self._loading: Set[str] = set()
+        self._voided: Set[str] = set()
+        # Users with more than max_points memories, searched in the vector store instead
+        self._oversized: "OrderedDict[str, float]" = OrderedDict()
+        self.max_points = settings.memory_hot_cache_max_points
+        self._subscriber: Optional[asyncio.Task] = None
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, user_id: str) -> Optional[_HotEntry]:
+        """A user's entry if cached and not expired (counts a hit or miss)."""
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry.loaded_at >= self.ttl:
+            self._drop(user_id)
+            entry = None
+
+        if entry is None:
+            self._misses += 1
+            metrics_collector.record_cache_miss("memory_hot")
+            return None
+
+        self._entries.move_to_end(user_id)
+        self._hits += 1
+        metrics_collector.record_cache_hit("memory_hot")
+        return entry
+
+    def begin_load(self, user_id: str) -> bool:
+        """
+        Claim the load of a user's memories.
+
+        Returns:
+            False if another load of this user is already in flight
+        """
+        if user_id in self._loading:
+            return False
+        self._loading.add(user_id)
+        self._voided.discard(user_id)
+        return True
+
+    def end_load(self, user_id: str):
+        """Release a load that did not complete (put() releases it otherwise)."""
+        self._loading.discard(user_id)
+        self._voided.discard(user_id)
+
+    def put(
+        self,
+        user_id: str,
+        ids: List[Any],
+        summaries: List[str],
+        vectors: List[List[float]]
+    ) -> Optional[_HotEntry]:
+        """
+        Cache a user's memories loaded from the vector store (after begin_load).
+
+        Returns:
+            The new entry, or None if the load was voided in the meantime
+        """
+        voided = user_id in self._voided
+        self.end_load(user_id)
+        if voided:
+            logger.debug("memory_hot_cache_load_discarded", user_id=user_id)
+            return None
+
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        entry = _HotEntry(list(ids), list(summaries), matrix / np.where(norms == 0, 1.0, norms))
+        self._store(user_id, entry)
+        return entry
+
+    def mark_oversized(self, user_id: str):
+        """Stop loading a user with too many memories until the TTL passes."""
+        self.end_load(user_id)
+        self._oversized[user_id] = time.monotonic()
+        self._oversized.move_to_end(user_id)
+        while len(self._oversized) > self.max_users:
+            self._oversized.popitem(last=False)
+
+    def is_oversized(self, user_id: str) -> bool:
+        marked_at = self._oversized.get(user_id)
+        if marked_at is not None and time.monotonic() - marked_at >= self.ttl:
+            del self._oversized[user_id]
+            return False
+        return marked_at is not None
+
+    def add(self, user_id: str, point_id: Any, summary: str, vector: List[float]):
+        """Write-through of a newly stored memory."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            # Void any load in flight that may have missed this memory
+            self._void(user_id)
+            return
+
+        row = np.asarray(vector, dtype=np.float32)
+        row = row / (np.linalg.norm(row) or 1.0)
+        if point_id in entry.ids:
+            index = entry.ids.index(point_id)
+            matrix = entry.matrix.copy()
+            matrix[index] = row
+            summaries = entry.summaries[:index] + [summary] + entry.summaries[index + 1:]
+            updated = _HotEntry(entry.ids, summaries, matrix)
+        else:
+            updated = _HotEntry(entry.ids + [point_id], entry.summaries + [summary], np.vstack([entry.matrix, row]))
+        updated.loaded_at = entry.loaded_at
+        self._store(user_id, updated)
+
+    def search(self, entry: _HotEntry, vector: List[float], top_k: int) -> List[Tuple[float, str]]:
+        """Best (score, summary) pairs by cosine similarity."""
+        if not entry.ids:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        scores = entry.matrix @ (query / (np.linalg.norm(query) or 1.0))
+        top = np.argsort(scores)[::-1][:top_k]
+        return [(float(scores[i]), entry.summaries[i]) for i in top]
+
+    def invalidate(self, user_id: str):
+        """Drop a user's entry on this replica."""
+        self._void(user_id)
+        self._drop(user_id)
+
+    async def publish_invalidation(self, user_ids: List[str]):
+        """Tell the other replicas to drop these users (best effort)."""
+        if not settings.memory_hot_cache_pubsub:
+            return
+        try:
+            for user_id in set(user_ids):
+                await redis_client.publish(self.channel, f"{self.instance_id} {user_id}")
+        except Exception as e:
+            logger.debug("memory_hot_cache_publish_failed", error=str(e))
+
+    def start(self):
+        """Listen for invalidations from other replicas in the background."""
+        if settings.memory_hot_cache_pubsub and (self._subscriber is None or self._subscriber.done()):
+            self._subscriber = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        failures = 0
+        while True:
+            pubsub = None
+            try:
+                pubsub = await redis_client.subscribe(self.channel)
+                logger.info("memory_hot_cache_subscribed", channel=self.channel)
+                async for message in pubsub.listen():
+                    sender, _, user_id = str(message.get("data", "")).partition(" ")
+                    if sender != self.instance_id and user_id:
+                        self.invalidate(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if pubsub is not None:
+                    # Invalidations may have been missed while the subscription was down
+                    self.clear()
+                    failures = 0
+                failures += 1
+                backoff = min(2 ** failures, MAX_RESUBSCRIBE_BACKOFF_SECONDS)
+                logger.warning(
+                    "memory_hot_cache_subscription_lost" if pubsub is not None else "memory_hot_cache_subscribe_failed",
+                    error=str(e),
+                    retry_in=backoff
+                )
+                await asyncio.sleep(backoff)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def clear(self):
+        """Drop every entry on this replica."""
+        for user_id in list(self._entries):
+            self.invalidate(user_id)
+
+    async def close(self):
+        """Stop listening for invalidations and drop every entry."""
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            await asyncio.gather(self._subscriber, return_exceptions=True)
+            self._subscriber = None
+        self.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Size and hit rate since startup."""
+        lookups = self._hits + self._misses
+        return {
+            "users": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+    def _store(self, user_id: str, entry: _HotEntry):
+        self._drop(user_id)
+        self._entries[user_id] = entry
+        self._bytes += entry.nbytes
+        while self._entries and (len(self._entries) > self.max_users or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+        metrics_collector.set_memory_hot_cache_size(len(self._entries), self._bytes)
+
+    def _drop(self, user_id: str):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+            metrics_collector.set_memory_hot_cache_size(len(self._entries), self._bytes)
+
+    def _void(self, user_id: str):
+        if user_id in self._loading:
+            self._voided.add(user_id)
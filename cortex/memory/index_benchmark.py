@@ -0,0 +1,188 @@
+"""
+Qdrant index tuning benchmark.
+
+Seeds one collection per HNSW / quantization configuration with clustered
+vectors spread over many users, then runs user-filtered searches (as
+retrieve_context does) at several search-time `ef` values and reports
+recall@k against exact search alongside latency.
+
+Local mode (":memory:" / "path:<dir>") always searches exhaustively and
+ignores HNSW and quantization, so run it against a Qdrant server to see
+the trade-offs:
+
+    docker run -p 6333:6333 qdrant/qdrant
+    python -m cortex.memory.index_benchmark --url http://localhost:6333
+    python -m cortex.memory.index_benchmark --m 16,32 --ef 32,64,128 --quantization none,int8
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CollectionStatus, Distance, FieldCondition, Filter, KeywordIndexParams, KeywordIndexType,
+    MatchValue, OptimizersConfigDiff, PointStruct, SearchParams, VectorParams
+)
+
+from cortex.memory.manager import PAYLOAD_INDEXES, hnsw_config, quantization_config, search_params
+
+BENCHMARK_COLLECTION = "cortex_memory_index_benchmark"
+UPSERT_BATCH_SIZE = 512
+
+
+def _dataset(rng: np.random.Generator, count: int, dim: int, users: int, topics: int):
+    """Vectors drawn around shared topic centers, like summaries of related facts."""
+    centers = rng.standard_normal((topics, dim)).astype(np.float32)
+    topic = rng.integers(0, topics, size=count)
+    vectors = centers[topic] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    user_ids = [f"user-{i % users}" for i in range(count)]
+    return vectors, user_ids
+
+
+def _client(url: str) -> QdrantClient:
+    if url.startswith("path:"):
+        return QdrantClient(path=url[len("path:"):])
+    if url == ":memory:":
+        return QdrantClient(location=url)
+    return QdrantClient(url=url, timeout=60)
+
+
+def _seed(client: QdrantClient, m: int, ef_construct: int, quantization: str, vectors, user_ids):
+    """Create a collection with the given configuration and wait until it is indexed."""
+    if client.collection_exists(BENCHMARK_COLLECTION):
+        client.delete_collection(BENCHMARK_COLLECTION)
+    client.create_collection(
+        BENCHMARK_COLLECTION,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE),
+        hnsw_config=hnsw_config(m, ef_construct),
+        quantization_config=quantization_config(quantization),
+        # Build the HNSW graph even for small benchmark collections
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1000)
+    )
+    for field, is_tenant in PAYLOAD_INDEXES:
+        client.create_payload_index(
+            BENCHMARK_COLLECTION,
+            field_name=field,
+            field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=is_tenant)
+        )
+
+    for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+        client.upsert(BENCHMARK_COLLECTION, points=[
+            PointStruct(
+                id=str(uuid.uuid4()),
+                vector=vectors[i].tolist(),
+                payload={"user_id": user_ids[i], "source_app": "benchmark"}
+            )
+            for i in range(start, min(start + UPSERT_BATCH_SIZE, len(vectors)))
+        ], wait=False)
+
+    started = time.perf_counter()
+    while client.get_collection(BENCHMARK_COLLECTION).status != CollectionStatus.GREEN:
+        time.sleep(0.5)
+    return time.perf_counter() - started
+
+
+def _search(client: QdrantClient, queries, users: List[str], top_k: int, params) -> Tuple[List[List], List[float]]:
+    """Run the queries one at a time; return result ids and latencies (ms)."""
+    results, latencies = [], []
+    for vector, user_id in zip(queries, users):
+        started = time.perf_counter()
+        response = client.query_points(
+            BENCHMARK_COLLECTION,
+            query=vector.tolist(),
+            query_filter=Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]),
+            limit=top_k,
+            search_params=params
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([point.id for point in response.points])
+    return results, latencies
+
+
+def run_benchmark(
+    url: str,
+    points: int,
+    queries: int,
+    dim: int,
+    users: int,
+    top_k: int,
+    m_values: List[int],
+    ef_values: List[int],
+    quantization_modes: List[str],
+    ef_construct: int
+) -> List[Dict[str, float]]:
+    """Benchmark every (m, quantization, ef) combination."""
+    rng = np.random.default_rng(0)
+    vectors, user_ids = _dataset(rng, points, dim, users, topics=max(users // 2, 8))
+    query_vectors, _ = _dataset(rng, queries, dim, users, topics=max(users // 2, 8))
+    query_users = [f"user-{i % users}" for i in range(queries)]
+
+    client = _client(url)
+    rows = []
+    try:
+        for m in m_values:
+            for quantization in quantization_modes:
+                index_seconds = _seed(client, m, ef_construct, quantization, vectors, user_ids)
+                truth, exact_ms = _search(client, query_vectors, query_users, top_k, SearchParams(exact=True))
+
+                for ef in ef_values:
+                    found, latencies = _search(
+                        client, query_vectors, query_users, top_k, search_params(ef, quantization)
+                    )
+                    hits = sum(len(set(a) & set(b)) for a, b in zip(found, truth))
+                    expected = sum(len(ids) for ids in truth) or 1
+                    latencies.sort()
+                    rows.append({
+                        "m": m,
+                        "quantization": quantization,
+                        "ef": ef,
+                        "recall": hits / expected,
+                        "p50_ms": statistics.median(latencies),
+                        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)],
+                        "exact_p50_ms": statistics.median(exact_ms),
+                        "index_seconds": index_seconds,
+                    })
+        client.delete_collection(BENCHMARK_COLLECTION)
+    finally:
+        client.close()
+    return rows
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency of Qdrant HNSW and quantization settings")
+    parser.add_argument("--url", default="http://localhost:6333", help="Qdrant URL (local mode shows no trade-off)")
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--m", default="16", help="Comma-separated HNSW m values")
+    parser.add_argument("--ef-construct", type=int, default=100)
+    parser.add_argument("--ef", default="16,32,64,128", help="Comma-separated search ef values")
+    parser.add_argument("--quantization", default="none,int8", help="Comma-separated: none, int8")
+    args = parser.parse_args()
+
+    rows = run_benchmark(
+        args.url, args.points, args.queries, args.dim, args.users, args.top_k,
+        _int_list(args.m), _int_list(args.ef), args.quantization.split(","), args.ef_construct
+    )
+
+    print(f"{'m':>4} {'quant':>6} {'ef':>5} {'recall@' + str(args.top_k):>9} {'p50':>9} {'p99':>9} {'exact p50':>10} {'index':>7}")
+    for row in rows:
+        print(
+            f"{row['m']:>4} {row['quantization']:>6} {row['ef']:>5} {row['recall']:>9.3f} "
+            f"{row['p50_ms']:>7.2f}ms {row['p99_ms']:>7.2f}ms {row['exact_p50_ms']:>8.2f}ms "
+            f"{row['index_seconds']:>6.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
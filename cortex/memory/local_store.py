@@ -0,0 +1,648 @@
+"""
+Embedded vector store for memories.
+
+Keeps one L2-normalized float32 matrix per user on local disk, read on
+the user's first access, and searches it in process. Implements the
+subset of the Qdrant client API that MemoryManager and the maintenance
+tools (dedup, compact) use, so it can replace Qdrant outright
+(MEMORY_STORE=local) or sit behind it as a warm fallback cache of
+recently active users.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import structlog
+from qdrant_client.http.models import QueryResponse
+from qdrant_client.models import (
+    CountResult, Filter, FilterSelector, PointIdsList, PointStruct, Record, ScoredPoint, UpdateResult,
+    UpdateStatus
+)
+
+from cortex.config import settings
+
+logger = structlog.get_logger()
+
+PointId = Union[str, int]
+
+IVF_ITERATIONS = 8
+
+
+class _UserIndex:
+    """One user's memories: row i of `matrix` belongs to ids[i] / payloads[i]."""
+
+    __slots__ = ("user_id", "ids", "payloads", "_matrix", "matrix_path", "ivf", "loaded_at", "last_used")
+
+    def __init__(
+        self,
+        user_id: str,
+        ids: List[PointId],
+        payloads: List[Dict[str, Any]],
+        matrix: Optional[np.ndarray],
+        matrix_path: Optional[Path] = None
+    ):
+        self.user_id = user_id
+        self.ids = ids
+        self.payloads = payloads
+        self._matrix = matrix
+        self.matrix_path = matrix_path
+        self.ivf: Optional[Tuple[np.ndarray, List[np.ndarray]]] = None
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        The user's vectors, read from disk on first access.
+
+        Read in full rather than memory-mapped: every mapping holds a file
+        descriptor, and a store with thousands of users would run out of
+        them. A read error propagates, so the user is never taken for empty.
+        """
+        if self._matrix is None:
+            self._matrix = np.load(self.matrix_path)
+        return self._matrix
+
+    @matrix.setter
+    def matrix(self, matrix: np.ndarray):
+        self._matrix = matrix
+
+
+class _Collection:
+    __slots__ = ("path", "users", "owners")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.users: Dict[str, _UserIndex] = {}
+        self.owners: Dict[PointId, str] = {}  # point id -> user_id
+
+
+class LocalVectorStore:
+    """
+    In-process vector search over per-user matrices.
+
+    Searches are brute force (one matrix-vector product over the user's
+    memories) until a user has `ivf_threshold` memories; larger users get
+    an IVF index (spherical k-means lists, `ivf_nprobe` probed per query)
+    built lazily after each change. Every change rewrites that user's
+    files atomically, so the store survives restarts.
+
+    With `max_users` set the store is a cache: the least recently used
+    user is evicted (files included) when a new one is added, and user
+    files that cannot be read at open are discarded. Otherwise an
+    unreadable user file fails the open, since the next write to that
+    user would overwrite it.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dimension: int = 0,
+        max_users: int = 0,
+        ivf_threshold: Optional[int] = None,
+        ivf_nprobe: Optional[int] = None
+    ):
+        """
+        Args:
+            path: Root directory (defaults to MEMORY_LOCAL_PATH)
+            dimension: Vector size of every collection
+            max_users: Users kept per collection, 0 for unlimited
+            ivf_threshold: Memories per user before IVF replaces brute force
+            ivf_nprobe: IVF lists searched per query
+        """
+        self.root = Path(path or settings.memory_local_path)
+        self.dimension = dimension
+        self.max_users = max_users
+        self.ivf_threshold = ivf_threshold or settings.memory_local_ivf_threshold
+        self.ivf_nprobe = ivf_nprobe or settings.memory_local_ivf_nprobe
+        self._collections: Dict[str, _Collection] = {}
+        self._write_lock = asyncio.Lock()
+
+    # Loading and persistence
+
+    async def open(self, collection_name: str):
+        """Load a collection from disk (created if missing) without blocking the loop."""
+        if collection_name not in self._collections:
+            collection = await asyncio.to_thread(self._load, collection_name)
+            self._collections.setdefault(collection_name, collection)
+
+    def _collection(self, name: str) -> _Collection:
+        if name not in self._collections:
+            self._collections[name] = self._load(name)
+        return self._collections[name]
+
+    def _load(self, name: str) -> _Collection:
+        collection = _Collection(self.root / name)
+        meta_path = collection.path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("dimension") != self.dimension:
+                raise ValueError(
+                    f"Local memory store {collection.path} holds {meta.get('dimension')}-dimensional "
+                    f"vectors but the embedding backend produces {self.dimension}"
+                )
+        else:
+            (collection.path / "users").mkdir(parents=True, exist_ok=True)
+            meta_path.write_text(json.dumps({"dimension": self.dimension}), encoding="utf-8")
+
+        for index_path in (collection.path / "users").glob("*.json"):
+            npy_path = index_path.with_suffix(".npy")
+            try:
+                data = json.loads(index_path.read_text(encoding="utf-8"))
+                shape = _npy_shape(npy_path)
+                if shape != (len(data["ids"]), self.dimension):
+                    raise ValueError(f"matrix shape {shape} does not match {len(data['ids'])} points")
+            except (OSError, ValueError, KeyError) as e:
+                if not self.max_users:
+                    raise ValueError(
+                        f"Local memory store user file {index_path} is unreadable ({e}); "
+                        f"repair or remove it before opening the store"
+                    ) from e
+                # A cache copy; the user is copied again from Qdrant on the next retrieval
+                logger.warning("local_memory_user_unreadable", path=str(index_path), error=str(e))
+                index_path.unlink(missing_ok=True)
+                npy_path.unlink(missing_ok=True)
+                continue
+            user = _UserIndex(data["user_id"], data["ids"], data["payloads"], None, npy_path)
+            user.loaded_at = data.get("loaded_at", user.loaded_at)
+            collection.users[user.user_id] = user
+            for point_id in user.ids:
+                collection.owners[point_id] = user.user_id
+
+        logger.info(
+            "local_memory_store_opened",
+            path=str(collection.path),
+            users=len(collection.users),
+            points=len(collection.owners)
+        )
+        return collection
+
+    @staticmethod
+    def _user_path(collection: _Collection, user_id: str) -> Path:
+        return collection.path / "users" / hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:20]
+
+    async def _persist(self, collection: _Collection, user_ids: Sequence[str]):
+        """Atomically rewrite the files of changed users (deleting emptied ones)."""
+        writes = []
+        for user_id in set(user_ids):
+            user = collection.users.get(user_id)
+            base = self._user_path(collection, user_id)
+            if user is None:
+                writes.append((base, None, None))
+            else:
+                document = json.dumps({
+                    "user_id": user_id, "ids": user.ids, "payloads": user.payloads, "loaded_at": user.loaded_at
+                })
+                writes.append((base, user.matrix, document))
+        await asyncio.to_thread(self._write_files, writes)
+
+    @staticmethod
+    def _write_files(writes):
+        for base, matrix, document in writes:
+            npy_path, json_path = base.with_suffix(".npy"), base.with_suffix(".json")
+            if matrix is None:
+                json_path.unlink(missing_ok=True)
+                npy_path.unlink(missing_ok=True)
+                continue
+            tmp_npy, tmp_json = base.with_suffix(".npy.tmp"), base.with_suffix(".json.tmp")
+            with open(tmp_npy, "wb") as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+            tmp_json.write_text(document, encoding="utf-8")
+            os.replace(tmp_npy, npy_path)
+            os.replace(tmp_json, json_path)
+
+    # Qdrant-compatible API
+
+    async def query_points(
+        self,
+        collection_name: str,
+        query: Sequence[float],
+        query_filter: Optional[Filter] = None,
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        **_: Any
+    ) -> QueryResponse:
+        """Nearest memories by cosine similarity (search_params are ignored)."""
+        collection = self._collection(collection_name)
+        vector = np.asarray(query, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+
+        candidates: List[Tuple[float, _UserIndex, int]] = []
+        for user in self._users(collection, query_filter):
+            user.last_used = time.monotonic()
+            rows, scores = self._search_user(user, vector, limit, query_filter)
+            candidates.extend((float(score), user, int(row)) for row, score in zip(rows, scores))
+
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        points = [
+            ScoredPoint(
+                id=user.ids[row],
+                version=0,
+                score=score,
+                payload=_select(user.payloads[row], with_payload),
+                vector=np.asarray(user.matrix[row]).tolist() if with_vectors else None
+            )
+            for score, user, row in candidates[:limit]
+            if score_threshold is None or score >= score_threshold
+        ]
+        return QueryResponse(points=points)
+
+    def _search_user(
+        self,
+        user: _UserIndex,
+        vector: np.ndarray,
+        limit: int,
+        query_filter: Optional[Filter]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Row numbers and scores of a user's best matches, best first."""
+        if not user.ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if len(user.ids) >= self.ivf_threshold:
+            if user.ivf is None:
+                user.ivf = _build_ivf(np.asarray(user.matrix))
+            centroids, lists = user.ivf
+            probe = np.argsort(centroids @ vector)[::-1][:self.ivf_nprobe]
+            rows = np.concatenate([lists[i] for i in probe])
+        else:
+            rows = np.arange(len(user.ids))
+
+        query_filter = _without_user(query_filter)
+        if query_filter is not None:
+            rows = np.asarray(
+                [row for row in rows if _matches(user.payloads[row], query_filter)], dtype=np.int64
+            )
+            if not len(rows):
+                return rows, np.empty(0, dtype=np.float32)
+
+        scores = np.asarray(user.matrix[rows]) @ vector
+        if len(scores) > limit:
+            top = np.argpartition(scores, -limit)[-limit:]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(scores)[::-1]
+        return rows[order], scores[order]
+
+    async def scroll(
+        self,
+        collection_name: str,
+        scroll_filter: Optional[Filter] = None,
+        limit: int = 10,
+        offset: Optional[int] = None,
+        with_payload: Union[bool, List[str]] = True,
+        with_vectors: bool = False,
+        **_: Any
+    ) -> Tuple[List[Record], Optional[int]]:
+        """Page through matching points; the offset is a position, not a point id."""
+        collection = self._collection(collection_name)
+        matching = [
+            (user, row)
+            for user in sorted(self._users(collection, scroll_filter), key=lambda user: user.user_id)
+            for row in range(len(user.ids))
+            if scroll_filter is None or _matches(user.payloads[row], scroll_filter)
+        ]
+        start = offset or 0
+        page = matching[start:start + limit]
+        records = [
+            Record(
+                id=user.ids[row],
+                payload=_select(user.payloads[row], with_payload),
+                vector=np.asarray(user.matrix[row]).tolist() if with_vectors else None
+            )
+            for user, row in page
+        ]
+        return records, start + limit if start + limit < len(matching) else None
+
+    async def count(self, collection_name: str, count_filter: Optional[Filter] = None, **_: Any) -> CountResult:
+        collection = self._collection(collection_name)
+        return CountResult(count=sum(
+            1 for user in self._users(collection, count_filter)
+            for payload in user.payloads
+            if count_filter is None or _matches(payload, count_filter)
+        ))
+
+    async def upsert(
+        self,
+        collection_name: str,
+        points: List[PointStruct],
+        cached_users_only: bool = False,
+        **_: Any
+    ) -> UpdateResult:
+        """
+        Insert or replace points, grouped by their payload's user_id.
+
+        Args:
+            collection_name: Collection
+            points: Points with a `user_id` payload field
+            cached_users_only: Skip users the store does not hold yet
+                (fallback cache mirroring writes)
+        """
+        collection = self._collection(collection_name)
+        async with self._write_lock:
+            by_user: Dict[str, List[PointStruct]] = {}
+            for point in points:
+                user_id = (point.payload or {}).get("user_id", "")
+                if cached_users_only and user_id not in collection.users:
+                    continue
+                by_user.setdefault(user_id, []).append(point)
+
+            changed = list(by_user)
+            for user_id, user_points in by_user.items():
+                # A point may move between users; drop it from the previous owner first
+                for point in user_points:
+                    owner = collection.owners.get(point.id)
+                    if owner is not None and owner != user_id:
+                        self._remove_rows(collection, owner, {point.id})
+                        changed.append(owner)
+                changed.extend(self._add_rows(collection, user_id, user_points))
+
+            if changed:
+                await self._persist(collection, changed)
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    async def set_payload(
+        self,
+        collection_name: str,
+        payload: Dict[str, Any],
+        points: List[PointId],
+        **_: Any
+    ) -> UpdateResult:
+        """Merge payload fields into existing points."""
+        collection = self._collection(collection_name)
+        async with self._write_lock:
+            changed = []
+            for point_id in points:
+                user = collection.users.get(collection.owners.get(point_id, ""))
+                if user is None:
+                    continue
+                user.payloads[user.ids.index(point_id)].update(payload)
+                changed.append(user.user_id)
+            if changed:
+                await self._persist(collection, changed)
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    async def delete_payload(
+        self,
+        collection_name: str,
+        keys: List[str],
+        points: List[PointId],
+        **_: Any
+    ) -> UpdateResult:
+        """Remove payload fields from existing points."""
+        collection = self._collection(collection_name)
+        async with self._write_lock:
+            changed = []
+            for point_id in points:
+                user = collection.users.get(collection.owners.get(point_id, ""))
+                if user is None:
+                    continue
+                payload = user.payloads[user.ids.index(point_id)]
+                for key in keys:
+                    payload.pop(key, None)
+                changed.append(user.user_id)
+            if changed:
+                await self._persist(collection, changed)
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    async def delete(
+        self,
+        collection_name: str,
+        points_selector: Union[PointIdsList, FilterSelector],
+        **_: Any
+    ) -> UpdateResult:
+        """Delete points by id or by filter."""
+        collection = self._collection(collection_name)
+        async with self._write_lock:
+            doomed: Dict[str, set] = {}
+            if isinstance(points_selector, FilterSelector):
+                for user in self._users(collection, points_selector.filter):
+                    for point_id, payload in zip(user.ids, user.payloads):
+                        if _matches(payload, points_selector.filter):
+                            doomed.setdefault(user.user_id, set()).add(point_id)
+            else:
+                for point_id in points_selector.points:
+                    if point_id in collection.owners:
+                        doomed.setdefault(collection.owners[point_id], set()).add(point_id)
+
+            for user_id, point_ids in doomed.items():
+                self._remove_rows(collection, user_id, point_ids)
+            if doomed:
+                await self._persist(collection, list(doomed))
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    async def create_payload_index(self, **_: Any):
+        """Payloads are filtered per user in memory; nothing to index."""
+
+    async def close(self, **_: Any):
+        self._collections.clear()
+
+    # Fallback cache API
+
+    def is_fresh(self, collection_name: str, user_id: str, max_age: float) -> bool:
+        """Whether the store holds a copy of the user's memories younger than max_age seconds."""
+        user = self._collection(collection_name).users.get(user_id)
+        return user is not None and time.time() - user.loaded_at < max_age
+
+    def has_user(self, collection_name: str, user_id: str) -> bool:
+        return user_id in self._collection(collection_name).users
+
+    async def replace_user(self, collection_name: str, user_id: str, records: List[Any]):
+        """Replace everything held for a user with records fetched from the primary store."""
+        collection = self._collection(collection_name)
+        async with self._write_lock:
+            changed = [user_id]
+            if user_id in collection.users:
+                self._remove_rows(collection, user_id, set(collection.users[user_id].ids))
+            points = [
+                PointStruct(id=record.id, vector=record.vector, payload=record.payload or {})
+                for record in records if record.vector is not None
+            ]
+            changed.extend(self._add_rows(collection, user_id, points))
+            await self._persist(collection, changed)
+
+    # Internals
+
+    @staticmethod
+    def _users(collection: _Collection, point_filter: Optional[Filter]) -> List[_UserIndex]:
+        """Users a filter can match; a user_id condition selects a single matrix."""
+        user_id = _filter_user(point_filter)
+        if user_id is None:
+            return list(collection.users.values())
+        user = collection.users.get(user_id)
+        return [user] if user is not None else []
+
+    def _add_rows(
+        self,
+        collection: _Collection,
+        user_id: str,
+        points: List[PointStruct]
+    ) -> List[str]:
+        """Insert or replace rows of one user; returns users changed (evictions included)."""
+        changed = []
+        user = collection.users.get(user_id)
+        if user is None:
+            user = _UserIndex(user_id, [], [], np.empty((0, self.dimension), dtype=np.float32))
+            collection.users[user_id] = user
+            changed.extend(self._evict(collection, keep=user_id))
+
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+        matrix = np.array(user.matrix, dtype=np.float32)  # copy; searches may hold the current one
+        positions = {point_id: row for row, point_id in enumerate(user.ids)}
+        appended = []
+        for point, vector in zip(points, vectors):
+            row = positions.get(point.id)
+            if row is None:
+                positions[point.id] = len(user.ids) + len(appended)
+                appended.append(vector)
+                user.ids.append(point.id)
+                user.payloads.append(dict(point.payload or {}))
+            elif row < len(matrix):
+                matrix[row] = vector
+                user.payloads[row] = dict(point.payload or {})
+            else:
+                # Repeated id within the same batch
+                appended[row - len(matrix)] = vector
+                user.payloads[row] = dict(point.payload or {})
+            collection.owners[point.id] = user_id
+
+        if appended:
+            matrix = np.vstack([matrix, np.asarray(appended, dtype=np.float32)])
+        user.matrix = matrix
+        user.ivf = None
+        user.last_used = time.monotonic()
+        changed.append(user_id)
+        return changed
+
+    def _remove_rows(self, collection: _Collection, user_id: str, point_ids: set):
+        user = collection.users.get(user_id)
+        if user is None:
+            return
+        keep = [row for row, point_id in enumerate(user.ids) if point_id not in point_ids]
+        for point_id in point_ids:
+            collection.owners.pop(point_id, None)
+        if not keep:
+            del collection.users[user_id]
+            return
+        user.matrix = np.asarray(user.matrix)[keep]
+        user.ids = [user.ids[row] for row in keep]
+        user.payloads = [user.payloads[row] for row in keep]
+        user.ivf = None
+
+    def _evict(self, collection: _Collection, keep: str) -> List[str]:
+        """Drop least recently used users beyond max_users."""
+        evicted = []
+        while self.max_users and len(collection.users) > self.max_users:
+            user_id = min(
+                (user for user in collection.users.values() if user.user_id != keep),
+                key=lambda user: user.last_used
+            ).user_id
+            self._remove_rows(collection, user_id, set(collection.users[user_id].ids))
+            evicted.append(user_id)
+        if evicted:
+            logger.debug("local_memory_users_evicted", count=len(evicted))
+        return evicted
+
+
+def _npy_shape(path: Path) -> Tuple[int, ...]:
+    """Array shape from a .npy header, without reading or mapping the data."""
+    with open(path, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return shape
+
+
+def _build_ivf(matrix: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Spherical k-means with sqrt(n) lists; returns (centroids, row numbers per list)."""
+    lists_count = max(int(math.sqrt(len(matrix))), 1)
+    rng = np.random.default_rng(0)
+    centroids = matrix[rng.choice(len(matrix), size=lists_count, replace=False)].copy()
+    for _ in range(IVF_ITERATIONS):
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        for i in range(lists_count):
+            members = matrix[assignment == i]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[i] = centroid / (np.linalg.norm(centroid) or 1.0)
+    assignment = np.argmax(matrix @ centroids.T, axis=1)
+    return centroids, [np.flatnonzero(assignment == i) for i in range(lists_count)]
+
+
+def _filter_user(point_filter: Optional[Filter]) -> Optional[str]:
+    for condition in (point_filter.must or []) if point_filter is not None else []:
+        if getattr(condition, "key", None) == "user_id" and getattr(condition, "match", None) is not None:
+            return condition.match.value
+    return None
+
+
+def _without_user(point_filter: Optional[Filter]) -> Optional[Filter]:
+    """The filter minus its user_id condition, which selecting the user's matrix already applies."""
+    if point_filter is None or _filter_user(point_filter) is None:
+        return point_filter
+    must = [condition for condition in point_filter.must if getattr(condition, "key", None) != "user_id"]
+    if not must and not point_filter.should and not point_filter.must_not:
+        return None
+    return Filter(must=must, should=point_filter.should, must_not=point_filter.must_not)
+
+
+def _matches(payload: Dict[str, Any], point_filter: Filter) -> bool:
+    """Evaluate the `must` conditions the memory code uses (match value, range)."""
+    if point_filter.should or point_filter.must_not:
+        raise ValueError("The local memory store only supports `must` filters")
+    for condition in point_filter.must or []:
+        value = payload.get(condition.key)
+        if condition.match is not None:
+            if value != condition.match.value:
+                return False
+        elif condition.range is not None:
+            if value is None or not _in_range(value, condition.range):
+                return False
+        else:
+            raise ValueError(f"Unsupported filter condition on {condition.key!r} in the local memory store")
+    return True
+
+
+def _in_range(value: Any, bounds: Any) -> bool:
+    if isinstance(value, str):
+        value = _as_datetime(value)
+        if value is None:
+            return False
+    for name, accept in (("lt", lambda a, b: a < b), ("lte", lambda a, b: a <= b),
+                         ("gt", lambda a, b: a > b), ("gte", lambda a, b: a >= b)):
+        bound = getattr(bounds, name)
+        if bound is None:
+            continue
+        if isinstance(value, datetime):
+            bound = _as_datetime(bound)
+        if not accept(value, bound):
+            return False
+    return True
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    try:
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _select(payload: Dict[str, Any], with_payload: Union[bool, List[str]]) -> Optional[Dict[str, Any]]:
+    if with_payload is True:
+        return dict(payload)
+    if not with_payload:
+        return None
+    return {key: payload[key] for key in with_payload if key in payload}
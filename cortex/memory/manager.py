@@ -1,93 +1,373 @@
 """Memory manager for cross-application context storage and retrieval."""
 
+import asyncio
 import os
-from typing import List, Optional, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Set
 from datetime import datetime, timezone
 import uuid
+import numpy as np
 import structlog
 
 # Cloud-native imports
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-
-# BRAIN TRANSPLANT: Use LiteLLM for cloud embeddings instead of local models
-try:
-    from litellm import embedding
-    LITELLM_AVAILABLE = True
-except ImportError:
-    logger.warning("litellm_not_available", message="Memory features disabled")
-    LITELLM_AVAILABLE = False
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, HnswConfigDiff,
+    KeywordIndexParams, KeywordIndexType, QuantizationSearchParams, ScalarQuantization,
+    ScalarQuantizationConfig, ScalarType, SearchParams
+)
 
 from cortex.config import settings
+from cortex.embeddings.service import embedding_service
+from cortex.memory.hot_cache import HotMemoryCache
+from cortex.memory.local_store import LocalVectorStore
+from cortex.memory.snippets import snippet_store
+from cortex.memory.write_buffer import MemoryWriteBuffer
+from cortex.observability.metrics import metrics_collector
 
 logger = structlog.get_logger()
 
+# Qdrant locations served in-process rather than over the network
+LOCAL_LOCATIONS = (":memory:",)
+
+QUANTIZATION_MODES = ("none", "int8")
+
+MEMORY_STORES = ("qdrant", "local")
+
+SCROLL_PAGE_SIZE = 256
+
+# Keyword payload indexes: (field, is_tenant). Every search filters on
+# user_id, so points are also co-located per user on disk.
+PAYLOAD_INDEXES = (("user_id", True), ("source_app", False))
+
+
+def hnsw_config(m: Optional[int] = None, ef_construct: Optional[int] = None) -> HnswConfigDiff:
+    """HNSW graph parameters for new collections (defaults to settings)."""
+    return HnswConfigDiff(
+        m=m or settings.qdrant_hnsw_m,
+        ef_construct=ef_construct or settings.qdrant_hnsw_ef_construct
+    )
+
+
+def quantization_config(mode: Optional[str] = None) -> Optional[ScalarQuantization]:
+    """
+    Vector quantization for new collections.
+    
+    int8 scalar quantization keeps a 4x smaller copy of every vector
+    (in RAM with QDRANT_QUANTIZATION_ALWAYS_RAM) that the HNSW search runs
+    on; the original float32 vectors stay on disk for rescoring.
+    """
+    mode = (mode or settings.qdrant_quantization).lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown Qdrant quantization mode: {mode}")
+    if mode == "none":
+        return None
+    return ScalarQuantization(scalar=ScalarQuantizationConfig(
+        type=ScalarType.INT8,
+        quantile=0.99,
+        always_ram=settings.qdrant_quantization_always_ram
+    ))
+
+
+def search_params(ef: Optional[int] = None, quantization: Optional[str] = None) -> Optional[SearchParams]:
+    """
+    Per-query search parameters.
+    
+    Args:
+        ef: HNSW beam width (defaults to QDRANT_SEARCH_EF; 0 uses the
+            collection's ef_construct)
+        quantization: Quantization mode of the collection
+        
+    Returns:
+        SearchParams, or None when everything is left to Qdrant
+    """
+    ef = settings.qdrant_search_ef if ef is None else ef
+    quantized = (quantization or settings.qdrant_quantization).lower() != "none"
+    if not ef and not quantized:
+        return None
+    return SearchParams(
+        hnsw_ef=ef or None,
+        quantization=QuantizationSearchParams(
+            rescore=settings.qdrant_quantization_rescore,
+            oversampling=settings.qdrant_quantization_oversampling
+        ) if quantized else None
+    )
+
+
+class ThreadedQdrantClient:
+    """
+    Async facade over the synchronous QdrantClient.
+    
+    Qdrant's local mode (":memory:" or an on-disk path) is pure Python and
+    blocks even through AsyncQdrantClient, so its calls run on a dedicated
+    thread pool instead of the event loop.
+    """
+    
+    def __init__(self, client: QdrantClient, max_workers: int = 1):
+        self._client = client
+        # Local mode is not thread-safe; the default single worker serializes calls
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qdrant")
+    
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+        if not callable(method):
+            return method
+        
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, lambda: method(*args, **kwargs))
+        
+        return call
+    
+    async def close(self, **kwargs):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, lambda: self._client.close(**kwargs))
+        self._executor.shutdown(wait=False)
+
 
 class MemoryManager:
     """
     Manages storage and retrieval of cross-application context using Vector Database.
     
-    BRAIN TRANSPLANT: Uses Qdrant for vector storage and LiteLLM cloud embeddings.
+    BRAIN TRANSPLANT: Uses Qdrant for vector storage and the shared embedding service.
+    
+    MEMORY_STORE=local replaces Qdrant with the embedded LocalVectorStore.
+    With Qdrant and MEMORY_LOCAL_FALLBACK, users whose memories were
+    retrieved recently are also copied to a LocalVectorStore; while Qdrant
+    is unreachable their retrievals are served from that copy instead of
+    waiting on a connect timeout per request.
+    
+    With MEMORY_HOT_CACHE the memories of active users are also held in
+    process (see HotMemoryCache) and searched without a Qdrant call.
+    
+    Maintenance tools construct it with service=False: writes go straight
+    to the collection, and the serving instance's write-behind spill file,
+    hot cache pub/sub and local fallback are left alone.
     """
     
     def __init__(
         self,
         qdrant_url: Optional[str] = None,
         collection_name: Optional[str] = None,
-        embedding_model: str = "text-embedding-3-small"
+        service: bool = True
     ):
         """
-        Initialize memory manager with cloud embeddings.
+        Initialize memory manager with the shared embedding backend.
         
         Args:
-            qdrant_url: Qdrant server URL (defaults to settings)
+            qdrant_url: Qdrant server URL, ":memory:" or "path:<dir>" for
+                local mode (defaults to settings)
             collection_name: Collection name (defaults to settings)
-            embedding_model: Cloud embedding model (OpenAI, Google, etc.)
+            service: False for maintenance tools (no write-behind buffer,
+                hot cache or local fallback)
         """
         self.qdrant_url = qdrant_url or settings.qdrant_url
         self.collection_name = collection_name or settings.qdrant_collection
-        self._client: Optional[QdrantClient] = None
-        self._embedding_model = embedding_model
-        self._embedding_dim = 1536  # Dimension for text-embedding-3-small
+        self.call_timeout = settings.qdrant_call_timeout
+        self.store = settings.memory_store.lower()
+        if self.store not in MEMORY_STORES:
+            raise ValueError(f"Unknown memory store: {self.store}")
+        self._client: Optional[Any] = None
+        self._connect_lock = asyncio.Lock()
+        self._embedding_model = embedding_service.model
+        self._embedding_dim = embedding_service.dimension
+        self._quantization = quantization_config()
+        # Local mode searches exhaustively and warns about search params
+        self._search_params = None if self._is_local() else search_params()
+        self._write_buffer = (
+            MemoryWriteBuffer(self._upsert_points, collection=self.collection_name)
+            if settings.memory_write_behind and service else None
+        )
+        
+        self._fallback: Optional[LocalVectorStore] = None
+        if self.store == "qdrant" and settings.memory_local_fallback and service:
+            if os.path.realpath(settings.memory_local_fallback_path) == os.path.realpath(settings.memory_local_path):
+                # The fallback evicts user files, which would delete a former local primary's memories
+                raise ValueError("MEMORY_LOCAL_FALLBACK_PATH must differ from MEMORY_LOCAL_PATH")
+            self._fallback = LocalVectorStore(
+                path=settings.memory_local_fallback_path,
+                dimension=self._embedding_dim,
+                max_users=settings.memory_local_fallback_max_users
+            )
+        self._hot_cache = (
+            HotMemoryCache() if settings.memory_hot_cache and self.store == "qdrant" and service else None
+        )
+        self._primary_retry_at = 0.0
+        self._warming: Set[str] = set()
+        self._warm_tasks: Set[asyncio.Task] = set()
         
         logger.info(
             "memory_manager_initialized",
             qdrant_url=self.qdrant_url,
             collection=self.collection_name,
-            embedding_model=embedding_model,
+            embedding_model=self._embedding_model,
+            embedding_dim=self._embedding_dim,
+            store=self.store,
+            local_fallback=self._fallback is not None,
+            hot_cache=self._hot_cache is not None,
+            hnsw_m=settings.qdrant_hnsw_m,
+            quantization=settings.qdrant_quantization,
+            write_behind=self._write_buffer is not None,
             cloud_native=True
         )
     
     async def connect(self):
         """Establish connection to Qdrant and ensure collection exists."""
-        if self._client is None:
-            # Initialize Qdrant client
-            if settings.qdrant_api_key:
-                self._client = QdrantClient(
-                    url=self.qdrant_url,
-                    api_key=settings.qdrant_api_key
-                )
-            else:
-                self._client = QdrantClient(url=self.qdrant_url)
+        async with self._connect_lock:
+            if self._client is not None:
+                return
+            
+            if self.store == "local":
+                client = LocalVectorStore(dimension=self._embedding_dim)
+                await client.open(self.collection_name)
+                self._client = client
+                if self._write_buffer is not None:
+                    self._write_buffer.start()
+                return
+            
+            client = self._create_client()
             
             # Create collection if it doesn't exist
             try:
-                self._client.get_collection(self.collection_name)
-                logger.info("qdrant_collection_exists", collection=self.collection_name)
-            except Exception:
-                self._client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
+                exists = await self._call(client.collection_exists(self.collection_name))
+                if exists:
+                    info = await self._call(client.get_collection(self.collection_name))
+                    self._check_collection_config(info)
+                    logger.info("qdrant_collection_exists", collection=self.collection_name)
+                else:
+                    await self._call(client.create_collection(
+                        collection_name=self.collection_name,
+                        vectors_config=VectorParams(
+                            size=self._embedding_dim,
+                            distance=Distance.COSINE
+                        ),
+                        hnsw_config=hnsw_config(),
+                        quantization_config=self._quantization
+                    ))
+                    info = None
+                    logger.info(
+                        "qdrant_collection_created",
+                        collection=self.collection_name,
                         size=self._embedding_dim,
-                        distance=Distance.COSINE
+                        hnsw_m=settings.qdrant_hnsw_m,
+                        hnsw_ef_construct=settings.qdrant_hnsw_ef_construct,
+                        quantization=settings.qdrant_quantization
                     )
-                )
-                logger.info("qdrant_collection_created", collection=self.collection_name)
+                await self._ensure_payload_indexes(client, info)
+            except BaseException:
+                await client.close()
+                raise
+            
+            self._client = client
+            if self._fallback is not None:
+                await self._fallback.open(self.collection_name)
+            if self._hot_cache is not None:
+                self._hot_cache.start()
+            if self._write_buffer is not None:
+                self._write_buffer.start()
+    
+    async def _ensure_payload_indexes(self, client, info=None):
+        """Create the keyword payload indexes the collection is missing."""
+        if self._is_local():
+            # Local mode scans payloads regardless and warns on index creation
+            return
+        existing = set((info.payload_schema or {}) if info is not None else {})
+        for field, is_tenant in PAYLOAD_INDEXES:
+            if field in existing:
+                continue
+            await self._call(client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field,
+                field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=is_tenant)
+            ))
+            logger.info("qdrant_payload_index_created", collection=self.collection_name, field=field)
+    
+    def _check_collection_config(self, info):
+        """
+        Validate an existing collection against the configuration.
+        
+        A vector size that does not match the embedding backend is fatal.
+        HNSW and quantization settings only apply to new collections, so
+        differences are logged (update the collection or re-create it).
+        """
+        vectors = info.config.params.vectors
+        size = getattr(vectors, "size", None)
+        if size is not None and size != self._embedding_dim:
+            logger.error(
+                "qdrant_collection_dimension_mismatch",
+                collection=self.collection_name,
+                collection_dim=size,
+                embedding_model=self._embedding_model,
+                embedding_dim=self._embedding_dim
+            )
+            raise ValueError(
+                f"Collection {self.collection_name} stores {size}-dimensional vectors but "
+                f"{self._embedding_model} produces {self._embedding_dim}; use another "
+                f"QDRANT_COLLECTION or re-embed the collection"
+            )
+        
+        hnsw = info.config.hnsw_config
+        quantized = info.config.quantization_config is not None
+        if (
+            hnsw.m != settings.qdrant_hnsw_m
+            or hnsw.ef_construct != settings.qdrant_hnsw_ef_construct
+            or quantized != (self._quantization is not None)
+        ):
+            logger.warning(
+                "qdrant_collection_config_differs",
+                collection=self.collection_name,
+                hnsw_m=hnsw.m,
+                hnsw_ef_construct=hnsw.ef_construct,
+                quantized=quantized,
+                configured_hnsw_m=settings.qdrant_hnsw_m,
+                configured_hnsw_ef_construct=settings.qdrant_hnsw_ef_construct,
+                configured_quantization=settings.qdrant_quantization
+            )
+    
+    def _is_local(self) -> bool:
+        """Whether the vector store runs in process (embedded store or Qdrant local mode)."""
+        return self.store == "local" or self._is_local_qdrant()
+    
+    def _is_local_qdrant(self) -> bool:
+        return self.qdrant_url in LOCAL_LOCATIONS or self.qdrant_url.startswith("path:")
+    
+    def _create_client(self):
+        """Build the Qdrant client for the configured location."""
+        if self._is_local_qdrant():
+            if self.qdrant_url.startswith("path:"):
+                sync_client = QdrantClient(path=self.qdrant_url[len("path:"):])
+            else:
+                sync_client = QdrantClient(location=self.qdrant_url)
+            logger.info("qdrant_local_mode", location=self.qdrant_url)
+            return ThreadedQdrantClient(sync_client, max_workers=settings.qdrant_local_threads)
+        
+        return AsyncQdrantClient(
+            url=self.qdrant_url,
+            api_key=settings.qdrant_api_key or None,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            timeout=int(self.call_timeout) or None,
+            pool_size=settings.qdrant_pool_size
+        )
+    
+    async def _call(self, awaitable):
+        """Await a Qdrant call with the per-call timeout."""
+        return await asyncio.wait_for(awaitable, timeout=self.call_timeout)
     
     async def disconnect(self):
-        """Close Qdrant connection."""
+        """Flush buffered memory writes and close the Qdrant connection."""
+        if self._write_buffer is not None:
+            await self._write_buffer.close()
+        for task in list(self._warm_tasks):
+            task.cancel()
+        if self._warm_tasks:
+            await asyncio.gather(*self._warm_tasks, return_exceptions=True)
+        if self._fallback is not None:
+            await self._fallback.close()
+        if self._hot_cache is not None:
+            await self._hot_cache.close()
         if self._client:
-            self._client.close()
+            await self._client.close()
             self._client = None
             logger.info("qdrant_disconnected")
     
@@ -108,52 +388,38 @@ class MemoryManager:
         Returns:
             List of context strings (summaries)
         """
-        if not self._client:
-            await self.connect()
-        
         if not query:
             return []
         
-        # Generate query embedding using cloud API
+        # Embed the query (EmbeddingError propagates; the pipeline skips memory)
         query_embedding = await self._embed_text(query)
+        user_filter = Filter(
+            must=[
+                FieldCondition(
+                    key="user_id",
+                    match=MatchValue(value=user_id)
+                )
+            ]
+        )
+        
+        if self._hot_cache is not None:
+            contexts = await self._retrieve_hot(user_id, query_embedding, top_k)
+            if contexts is not None:
+                return contexts
+        
+        if not await self._primary_ready():
+            return await self._retrieve_fallback(user_id, query_embedding, user_filter, top_k)
         
         try:
             # Search with user_id filter
-            results = self._client.search(
+            response = await self._call(self._client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
-                query_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="user_id",
-                            match=MatchValue(value=user_id)
-                        )
-                    ]
-                ),
-                limit=top_k
-            )
-            
-            # Extract summaries from results (limit to top_k in case mock returns more)
-            contexts = []
-            for result in results[:top_k]:
-                summary = result.payload.get("summary", "")
-                if summary:
-                    contexts.append(summary)
-                    logger.debug(
-                        "memory_retrieved",
-                        user_id=user_id,
-                        score=result.score,
-                        summary_length=len(summary)
-                    )
-            
-            logger.info(
-                "context_retrieval_complete",
-                user_id=user_id,
-                count=len(contexts),
-                requested=top_k
-            )
-            
-            return contexts
+                query=query_embedding,
+                query_filter=user_filter,
+                limit=top_k,
+                search_params=self._search_params,
+                with_payload=["summary"]
+            ))
         
         except Exception as e:
             logger.error(
@@ -161,7 +427,215 @@ class MemoryManager:
                 user_id=user_id,
                 error=str(e)
             )
+            if self._fallback is None:
+                return []
+            self._mark_primary_down(e)
+            return await self._retrieve_fallback(user_id, query_embedding, user_filter, top_k)
+        
+        self._warm_fallback(user_id)
+        return self._contexts(user_id, response.points, top_k, source=self.store)
+    
+    def _contexts(self, user_id: str, results: List[Any], top_k: int, source: str) -> List[str]:
+        """Extract summaries from search results (limit to top_k in case mock returns more)."""
+        contexts = []
+        for result in results[:top_k]:
+            summary = (result.payload or {}).get("summary", "")
+            if summary:
+                contexts.append(summary)
+                logger.debug(
+                    "memory_retrieved",
+                    user_id=user_id,
+                    score=result.score,
+                    summary_length=len(summary)
+                )
+        
+        logger.info(
+            "context_retrieval_complete",
+            user_id=user_id,
+            count=len(contexts),
+            requested=top_k,
+            source=source
+        )
+        
+        return contexts
+    
+    async def _retrieve_hot(self, user_id: str, query_embedding: List[float], top_k: int) -> Optional[List[str]]:
+        """
+        Search the user's memories in the hot cache, loading them on a miss.
+        
+        Returns:
+            Summaries, or None if the user cannot be served from the cache
+        """
+        entry = self._hot_cache.get(user_id)
+        if entry is None:
+            entry = await self._load_hot(user_id)
+            if entry is None:
+                return None
+        
+        contexts = [summary for _, summary in self._hot_cache.search(entry, query_embedding, top_k) if summary]
+        logger.info(
+            "context_retrieval_complete",
+            user_id=user_id,
+            count=len(contexts),
+            requested=top_k,
+            source="hot_cache"
+        )
+        return contexts
+    
+    async def _load_hot(self, user_id: str):
+        """Load a user's memories (vectors included) into the hot cache."""
+        if self._hot_cache.is_oversized(user_id) or not self._hot_cache.begin_load(user_id):
+            return None
+        
+        try:
+            if not await self._primary_ready():
+                self._hot_cache.end_load(user_id)
+                return None
+            
+            ids, summaries, vectors = [], [], []
+            offset = None
+            while True:
+                page, offset = await self._call(self._client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]),
+                    limit=SCROLL_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=["summary"],
+                    with_vectors=True
+                ))
+                for point in page:
+                    ids.append(point.id)
+                    summaries.append((point.payload or {}).get("summary", ""))
+                    vectors.append(point.vector)
+                if len(ids) > self._hot_cache.max_points:
+                    self._hot_cache.mark_oversized(user_id)
+                    logger.debug("memory_hot_cache_user_oversized", user_id=user_id)
+                    return None
+                if offset is None:
+                    break
+            
+            # Memories still in the write-behind buffer are not in Qdrant yet
+            if self._write_buffer is not None:
+                for point in self._write_buffer.pending_points():
+                    if point.payload.get("user_id") == user_id and point.id not in ids:
+                        ids.append(point.id)
+                        summaries.append(point.payload.get("summary", ""))
+                        vectors.append(point.vector)
+        
+        except Exception as e:
+            self._hot_cache.end_load(user_id)
+            logger.warning("memory_hot_cache_load_failed", user_id=user_id, error=str(e))
+            return None
+        
+        self._warm_fallback(user_id)
+        return self._hot_cache.put(user_id, ids, summaries, vectors)
+    
+    def hot_cache_stats(self) -> Dict[str, Any]:
+        """Hot memory cache size and hit rate ({"enabled": False} when off)."""
+        if self._hot_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._hot_cache.stats()}
+    
+    async def _primary_ready(self) -> bool:
+        """
+        Connect to the vector store if needed.
+        
+        Without a local fallback connection errors propagate as before.
+        
+        Returns:
+            False while Qdrant is considered down and the local fallback
+            should serve instead
+        """
+        if self._fallback is None:
+            if not self._client:
+                await self.connect()
+            return True
+        
+        if time.monotonic() < self._primary_retry_at:
+            return False
+        try:
+            if not self._client:
+                await self.connect()
+            return True
+        except Exception as e:
+            self._mark_primary_down(e)
+            return False
+    
+    def _mark_primary_down(self, error: Exception):
+        """Serve retrievals from the local fallback for the next retry interval."""
+        self._primary_retry_at = time.monotonic() + settings.memory_qdrant_retry_interval
+        logger.warning(
+            "qdrant_unavailable_using_local_fallback",
+            error=str(error),
+            retry_in=settings.memory_qdrant_retry_interval
+        )
+    
+    async def _retrieve_fallback(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        user_filter: Filter,
+        top_k: int
+    ) -> List[str]:
+        """Search the local copy of a user's memories, if one is held."""
+        try:
+            await self._fallback.open(self.collection_name)
+            if not self._fallback.has_user(self.collection_name, user_id):
+                metrics_collector.record_memory_fallback("miss")
+                logger.info("memory_fallback_miss", user_id=user_id)
+                return []
+            
+            response = await self._fallback.query_points(
+                collection_name=self.collection_name,
+                query=query_embedding,
+                query_filter=user_filter,
+                limit=top_k
+            )
+        except Exception as e:
+            logger.error("memory_fallback_failed", user_id=user_id, error=str(e))
             return []
+        
+        metrics_collector.record_memory_fallback("served")
+        return self._contexts(user_id, response.points, top_k, source="local_fallback")
+    
+    def _warm_fallback(self, user_id: str):
+        """Copy a user's memories to the local fallback in the background unless a fresh copy exists."""
+        if self._fallback is None or user_id in self._warming:
+            return
+        if self._fallback.is_fresh(self.collection_name, user_id, settings.memory_local_fallback_ttl):
+            return
+        
+        self._warming.add(user_id)
+        task = asyncio.get_running_loop().create_task(self._load_fallback_user(user_id))
+        self._warm_tasks.add(task)
+        task.add_done_callback(self._warm_tasks.discard)
+    
+    async def _load_fallback_user(self, user_id: str):
+        """Scroll one user's memories (vectors included) from Qdrant into the local fallback."""
+        try:
+            user_filter = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+            records, offset = [], None
+            while True:
+                page, offset = await self._call(self._client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=user_filter,
+                    limit=SCROLL_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                ))
+                records.extend(page)
+                if offset is None:
+                    break
+            
+            await self._fallback.replace_user(self.collection_name, user_id, records)
+            metrics_collector.record_memory_fallback("warmed")
+            logger.debug("memory_fallback_warmed", user_id=user_id, points=len(records))
+        except Exception as e:
+            metrics_collector.record_memory_fallback("warm_failed")
+            logger.warning("memory_fallback_warm_failed", user_id=user_id, error=str(e))
+        finally:
+            self._warming.discard(user_id)
     
     async def store_memory(
         self,
@@ -173,22 +647,36 @@ class MemoryManager:
         """
         Embeds and stores distilled memory with metadata.
         
+        With MEMORY_WRITE_BEHIND the point is queued and written in the
+        next batch, so it becomes searchable up to one flush interval later.
+        
+        The payload holds only what retrieval filters and returns on; the
+        conversation goes to the snippet store (see get_snippet).
+        
         Args:
             user_id: User identifier
             summary: Distilled fact/summary to store
             conversation: Optional conversation context
             source_app: Source application name
         """
-        if not self._client:
-            await self.connect()
-        
         if not summary:
             logger.warning("empty_summary_skipped", user_id=user_id)
             return
         
-        # Generate embedding using cloud API
+        # Embed the summary (EmbeddingError propagates; nothing is stored)
         embedding = await self._embed_text(summary)
         
+        if settings.memory_dedup_enabled:
+            duplicate_id = await self._refresh_duplicate(user_id, embedding)
+            if duplicate_id is not None:
+                logger.info(
+                    "memory_refreshed",
+                    user_id=user_id,
+                    point_id=duplicate_id,
+                    summary_length=len(summary)
+                )
+                return
+        
         # Create point
         point_id = str(uuid.uuid4())
         point = PointStruct(
@@ -199,15 +687,33 @@ class MemoryManager:
                 "summary": summary,
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "source_app": source_app,
-                "conversation_snippet": str(conversation) if conversation else ""
+                "hit_count": 1
             }
         )
         
-        try:
-            self._client.upsert(
-                collection_name=self.collection_name,
-                points=[point]
+        if conversation:
+            try:
+                await snippet_store.put_many([(point_id, user_id, str(conversation))])
+            except Exception as e:
+                # The memory itself is still worth storing
+                logger.warning("memory_snippet_store_failed", user_id=user_id, point_id=point_id, error=str(e))
+        
+        if self._write_buffer is not None:
+            self._write_buffer.add(point)
+            if self._hot_cache is not None:
+                self._hot_cache.add(user_id, point_id, summary, embedding)
+            logger.info(
+                "memory_queued",
+                user_id=user_id,
+                point_id=point_id,
+                pending=self._write_buffer.pending
             )
+            return
+        
+        try:
+            await self._upsert_points([point])
+            if self._hot_cache is not None:
+                self._hot_cache.add(user_id, point_id, summary, embedding)
             
             logger.info(
                 "memory_stored",
@@ -223,50 +729,132 @@ class MemoryManager:
                 error=str(e)
             )
     
-    async def _embed_text(self, text: str) -> List[float]:
+    async def get_snippet(self, point_id: str) -> Optional[str]:
+        """
+        Fetch the conversation a memory was distilled from.
+        
+        Args:
+            point_id: Memory point id
+            
+        Returns:
+            The conversation snippet, or None if none was kept
         """
-        Generates embedding using cloud API via LiteLLM.
+        return await snippet_store.get(point_id)
+    
+    async def _refresh_duplicate(self, user_id: str, embedding: List[float]) -> Optional[str]:
+        """
+        Refresh an existing near-duplicate memory instead of inserting a new one.
         
-        BRAIN TRANSPLANT: Uses Google's free, high-quality embedding model.
+        Looks for the user's most similar memory, first among points still
+        waiting in the write buffer, then in the collection. At or above
+        MEMORY_DEDUP_THRESHOLD (cosine) its timestamp is set to now and its
+        hit count incremented.
         
         Args:
-            text: Text to embed
+            user_id: User identifier
+            embedding: Embedding of the new summary
             
         Returns:
-            List of embedding floats
+            ID of the refreshed point, or None if the memory is new
         """
-        if not LITELLM_AVAILABLE:
-            logger.error("embedding_failed", reason="litellm_not_available")
-            return [0.0] * self._embedding_dim
+        threshold = settings.memory_dedup_threshold
+        now = datetime.now(timezone.utc).isoformat()
+        
+        if self._write_buffer is not None:
+            pending = [
+                point for point in self._write_buffer.pending_points()
+                if point.payload.get("user_id") == user_id
+            ]
+            if pending:
+                matrix = np.asarray([point.vector for point in pending], dtype=np.float32)
+                query = np.asarray(embedding, dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+                scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+                best = int(np.argmax(scores))
+                if scores[best] >= threshold:
+                    point = pending[best]
+                    point.payload["timestamp"] = now
+                    point.payload["hit_count"] = point.payload.get("hit_count", 1) + 1
+                    metrics_collector.record_memory_dedup("refreshed_pending")
+                    return str(point.id)
         
         try:
-            # Use Google's free embedding model via LiteLLM
-            response = await embedding(
-                model="gemini/text-embedding-004",
-                input=[text],
-                api_key=os.getenv("GOOGLE_API_KEY")
-            )
+            if not await self._primary_ready():
+                metrics_collector.record_memory_dedup("check_failed")
+                return None
             
-            embedding_vector = response['data'][0]['embedding']
+            response = await self._call(self._client.query_points(
+                collection_name=self.collection_name,
+                query=embedding,
+                query_filter=Filter(
+                    must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]
+                ),
+                limit=1,
+                score_threshold=threshold,
+                search_params=self._search_params,
+                with_payload=["hit_count"]
+            ))
+            if not response.points:
+                metrics_collector.record_memory_dedup("inserted")
+                return None
             
-            logger.debug(
-                "cloud_embedding_generated",
-                text_length=len(text),
-                embedding_dim=len(embedding_vector),
-                model="gemini/text-embedding-004"
-            )
+            match = response.points[0]
+            await self._call(self._client.set_payload(
+                collection_name=self.collection_name,
+                payload={
+                    "timestamp": now,
+                    "hit_count": (match.payload or {}).get("hit_count", 1) + 1
+                },
+                points=[match.id]
+            ))
+            metrics_collector.record_memory_dedup("refreshed")
+            return str(match.id)
+        
+        except Exception as e:
+            # Better a duplicate than a lost memory
+            logger.warning("memory_dedup_check_failed", user_id=user_id, error=str(e))
+            metrics_collector.record_memory_dedup("check_failed")
+            return None
+    
+    async def _upsert_points(self, points: List[PointStruct]):
+        """Write points to the collection in one call."""
+        if self._fallback is not None:
+            # Keep local copies of hot users current, also while Qdrant is down
+            try:
+                await self._fallback.open(self.collection_name)
+                await self._fallback.upsert(self.collection_name, points, cached_users_only=True)
+            except Exception as e:
+                logger.warning("memory_fallback_mirror_failed", points=len(points), error=str(e))
+        
+        if not self._client:
+            await self.connect()
+        
+        await self._call(self._client.upsert(
+            collection_name=self.collection_name,
+            points=points
+        ))
+        
+        if self._hot_cache is not None:
+            # Other replicas reload these users now that Qdrant has the points
+            await self._hot_cache.publish_invalidation([point.payload.get("user_id", "") for point in points])
+    
+    async def _embed_text(self, text: str) -> List[float]:
+        """
+        Embeds text through the shared embedding service.
+        
+        Args:
+            text: Text to embed
             
-            return embedding_vector
+        Returns:
+            List of embedding floats
             
-        except Exception as e:
-            logger.error(
-                "cloud_embedding_failed",
-                error=str(e),
-                model=self._embedding_model,
-                fallback="zero_vector"
-            )
-            # Return zero vector as fallback
-            return [0.0] * self._embedding_dim
+        Raises:
+            EmbeddingError: If the text cannot be embedded. A zero vector
+                would match nothing on retrieval and store an unfindable
+                memory, so the failure is left to the caller.
+        """
+        vector = await embedding_service.embed(text)
+        return vector.tolist()
 
 
 # Global memory manager instance
@@ -0,0 +1,403 @@
+"""
+Bulk re-embedding and collection migration.
+
+Copies every memory of a source collection into a new collection,
+re-embedding its summary with the configured embedding backend (for a new
+model or dimension), then atomically points an alias at the new
+collection. Point ids and payloads are kept.
+
+The copy scrolls the source page by page and re-embeds each page in
+batches with bounded concurrency. After every page a checkpoint is
+written, so an interrupted run resumes where it stopped. Memories stored
+or refreshed by the live service during the copy are picked up by a final
+catch-up pass over recent timestamps, and memories deleted from the source
+in the meantime (dedup, compaction, expiry) are deleted from the target by
+an id diff. Then source and target counts are verified, and only a
+verified copy is switched in. A last catch-up after the switch copies what
+reached the source in the meantime, without overwriting target points the
+live service has refreshed since.
+
+The service must address the collection through the alias: set
+QDRANT_COLLECTION to the alias name (the default alias).
+
+Usage:
+    EMBEDDING_MODEL=... EMBEDDING_DIMENSION=... python -m cortex.memory.migrate
+    python -m cortex.memory.migrate --source cortex_memory --target cortex_memory_v2 --alias cortex_memory_live
+    python -m cortex.memory.migrate --no-switch      # copy and verify only
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from qdrant_client.models import (
+    CreateAlias, CreateAliasOperation, DatetimeRange, DeleteAlias, DeleteAliasOperation, FieldCondition,
+    Filter, PointIdsList, PointStruct
+)
+
+from cortex.config import settings
+from cortex.embeddings.service import embedding_service
+from cortex.memory.manager import MemoryManager
+
+CHECKPOINT_DIR = ".cache/migrations"
+MAX_BATCH_ATTEMPTS = 3
+
+# Writes that land on the source just before the copy starts are caught up too
+CATCH_UP_MARGIN = timedelta(minutes=5)
+
+
+class MigrationError(Exception):
+    """The migration cannot continue; the checkpoint allows a resume."""
+
+
+def _is_newer(timestamp: Optional[str], than: Optional[str]) -> bool:
+    """Whether ISO timestamp `timestamp` is later than `than` (False if either is missing or invalid)."""
+    try:
+        return datetime.fromisoformat(str(timestamp)) > datetime.fromisoformat(str(than))
+    except (TypeError, ValueError):
+        return False
+
+
+def default_target(source: str) -> str:
+    """Source name suffixed with the embedding model and dimension."""
+    slug = re.sub(r"[^a-z0-9]+", "_", embedding_service.model.lower()).strip("_")
+    return f"{re.sub(r'__.*$', '', source)}__{slug}_{embedding_service.dimension}"
+
+
+class Migration:
+    """Copies one collection into another with re-embedded vectors."""
+
+    def __init__(
+        self,
+        manager: MemoryManager,
+        source: str,
+        target: str,
+        page_size: int,
+        batch_size: int,
+        concurrency: int,
+        checkpoint_path: Path
+    ):
+        self.manager = manager
+        self.source = source
+        self.target = target
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.state: Dict[str, Any] = {}
+
+    def load_checkpoint(self, resume: bool):
+        """Resume from the checkpoint of an earlier run with the same source, target and model."""
+        if resume and self.checkpoint_path.exists():
+            state = json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+            if (state.get("source"), state.get("target"), state.get("model")) != (
+                self.source, self.target, embedding_service.model
+            ):
+                raise MigrationError(
+                    f"Checkpoint {self.checkpoint_path} belongs to another migration; "
+                    f"remove it or pass --restart"
+                )
+            self.state = state
+            print(f"resuming at {state['copied']} copied points (offset {state['offset']})")
+            return
+
+        self.state = {
+            "source": self.source,
+            "target": self.target,
+            "model": embedding_service.model,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "offset": None,
+            "copied": 0,
+            "skipped": 0,
+            "copy_done": False,
+        }
+
+    def save_checkpoint(self):
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.state), encoding="utf-8")
+        os.replace(tmp_path, self.checkpoint_path)
+
+    async def _client_call(self, method: str, **kwargs):
+        return await self.manager._call(getattr(self.manager._client, method)(**kwargs))
+
+    async def count(self, collection: str, count_filter: Optional[Filter] = None) -> int:
+        return (await self._client_call("count", collection_name=collection, count_filter=count_filter, exact=True)).count
+
+    async def copy(
+        self,
+        scroll_filter: Optional[Filter] = None,
+        checkpoint: bool = True,
+        keep_newer: bool = False
+    ) -> int:
+        """
+        Copy matching source points page by page.
+
+        Args:
+            scroll_filter: Only copy matching source points
+            checkpoint: Resume from and record progress in the checkpoint
+            keep_newer: Skip points whose target copy has a later timestamp
+                (refreshed by the live service after the switch)
+
+        Returns:
+            Points copied by this call
+        """
+        total = await self.count(self.source, scroll_filter)
+        offset = self.state["offset"] if checkpoint else None
+        done = self.state["copied"] + self.state["skipped"] if checkpoint else 0
+        copied = 0
+        started = last_report = time.perf_counter()
+
+        while True:
+            points, next_offset = await self._client_call(
+                "scroll",
+                collection_name=self.source,
+                scroll_filter=scroll_filter,
+                limit=self.page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            written = await self._copy_page(points, keep_newer)
+            copied += written
+            done += len(points)
+            offset = next_offset
+
+            if checkpoint:
+                self.state["copied"] += written
+                self.state["skipped"] += len(points) - written
+                self.state["offset"] = offset
+                self.save_checkpoint()
+
+            now = time.perf_counter()
+            if now - last_report >= 2 or offset is None:
+                rate = copied / (now - started) if now > started else 0.0
+                remaining = max(total - done, 0)
+                eta = f"{remaining / rate:.0f}s" if rate else "?"
+                print(f"  {done}/{total} ({100 * done / total if total else 100:.1f}%)  {rate:.0f} points/s  eta {eta}")
+                last_report = now
+
+            if offset is None:
+                return copied
+
+    async def _copy_page(self, points: List[Any], keep_newer: bool = False) -> int:
+        """Re-embed and upsert one page in concurrent batches; returns points written."""
+        points = [point for point in points if (point.payload or {}).get("summary")]
+        if keep_newer and points:
+            current = await self._client_call(
+                "retrieve",
+                collection_name=self.target,
+                ids=[point.id for point in points],
+                with_payload=["timestamp"],
+                with_vectors=False
+            )
+            target_timestamps = {record.id: (record.payload or {}).get("timestamp") for record in current}
+            points = [
+                point for point in points
+                if not _is_newer(target_timestamps.get(point.id), point.payload.get("timestamp"))
+            ]
+        batches = [points[i:i + self.batch_size] for i in range(0, len(points), self.batch_size)]
+        await asyncio.gather(*(self._copy_batch(batch) for batch in batches))
+        return len(points)
+
+    async def _copy_batch(self, points: List[Any]):
+        async with self._semaphore:
+            for attempt in range(1, MAX_BATCH_ATTEMPTS + 1):
+                try:
+                    vectors = await embedding_service.embed_many([point.payload["summary"] for point in points])
+                    await self._client_call("upsert", collection_name=self.target, points=[
+                        PointStruct(id=point.id, vector=vector.tolist(), payload=point.payload)
+                        for point, vector in zip(points, vectors)
+                    ])
+                    return
+                except Exception as e:
+                    if attempt == MAX_BATCH_ATTEMPTS:
+                        raise MigrationError(f"Batch of {len(points)} points failed {attempt} times: {e}") from e
+                    await asyncio.sleep(2 ** attempt)
+
+    async def catch_up(self, since: datetime, keep_newer: bool = False) -> int:
+        """Copy again what the live service stored or refreshed since `since`."""
+        since -= CATCH_UP_MARGIN
+        recent = Filter(must=[FieldCondition(key="timestamp", range=DatetimeRange(gte=since))])
+        return await self.copy(recent, checkpoint=False, keep_newer=keep_newer)
+
+    async def replay_deletions(self) -> int:
+        """
+        Delete target points that no longer exist in the source.
+
+        Dedup, compaction and expiry delete source points during the copy;
+        catch-up passes only see writes. Pages through the target ids and
+        looks them up in the source, so memory use stays at one page.
+
+        Returns:
+            Points deleted from the target
+        """
+        deleted = 0
+        offset = None
+        while True:
+            points, offset = await self._client_call(
+                "scroll",
+                collection_name=self.target,
+                limit=self.page_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            if points:
+                present = await self._client_call(
+                    "retrieve",
+                    collection_name=self.source,
+                    ids=[point.id for point in points],
+                    with_payload=False,
+                    with_vectors=False
+                )
+                present_ids = {record.id for record in present}
+                gone = [point.id for point in points if point.id not in present_ids]
+                if gone:
+                    await self._client_call(
+                        "delete", collection_name=self.target, points_selector=PointIdsList(points=gone)
+                    )
+                    deleted += len(gone)
+            if offset is None:
+                return deleted
+
+    async def verify(self) -> Dict[str, int]:
+        """Every source point with a summary must exist in the target, and nothing else."""
+        source_count = await self.count(self.source)
+        target_count = await self.count(self.target)
+        return {
+            "source": source_count,
+            "target": target_count,
+            "expected": source_count - self.state["skipped"],
+        }
+
+
+async def resolve_alias(manager: MemoryManager, name: str) -> Optional[str]:
+    """Collection an alias points to, or None if `name` is not an alias."""
+    response = await manager._call(manager._client.get_aliases())
+    for alias in response.aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return None
+
+
+async def switch_alias(manager: MemoryManager, alias: str, collection: str):
+    """Point the alias at the collection in one atomic operation."""
+    operations = []
+    if await resolve_alias(manager, alias) is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    elif await manager._call(manager._client.collection_exists(alias)):
+        raise MigrationError(
+            f"{alias} is a collection, not an alias; pass --alias with a new name and set "
+            f"QDRANT_COLLECTION to it"
+        )
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias)))
+    await manager._call(manager._client.update_collection_aliases(change_aliases_operations=operations))
+
+
+async def run_migration(args: argparse.Namespace) -> int:
+    alias = args.alias or settings.qdrant_collection
+    if settings.memory_store.lower() != "qdrant":
+        raise MigrationError("Migration requires MEMORY_STORE=qdrant")
+
+    probe = MemoryManager(qdrant_url=args.url, collection_name=alias, service=False)
+    probe._client = probe._create_client()
+    try:
+        source = args.source or await resolve_alias(probe, alias) or alias
+        if not await probe._call(probe._client.collection_exists(source)):
+            raise MigrationError(f"Source collection {source} does not exist")
+    finally:
+        await probe._client.close()
+
+    target = args.target or default_target(source)
+    if target == source:
+        raise MigrationError(f"Target {target} is the source collection; pass --target")
+
+    # Connecting provisions the target (dimension, HNSW, quantization, payload indexes)
+    manager = MemoryManager(qdrant_url=args.url, collection_name=target, service=False)
+    await manager.connect()
+    checkpoint_path = Path(args.checkpoint or f"{CHECKPOINT_DIR}/{source}__to__{target}.json")
+    migration = Migration(
+        manager, source, target, args.page_size, args.batch_size, args.concurrency, checkpoint_path
+    )
+
+    try:
+        migration.load_checkpoint(resume=not args.restart)
+        print(
+            f"migrating {source} -> {target} with {embedding_service.model} "
+            f"({embedding_service.dimension} dims), alias {alias}"
+        )
+
+        started = time.perf_counter()
+        if not migration.state["copy_done"]:
+            await migration.copy()
+            migration.state["copy_done"] = True
+            migration.save_checkpoint()
+
+        print("catching up on memories written during the copy")
+        catch_up_started = datetime.now(timezone.utc)
+        caught_up = await migration.catch_up(datetime.fromisoformat(migration.state["started_at"]))
+        deleted = await migration.replay_deletions()
+        elapsed = time.perf_counter() - started
+
+        counts = await migration.verify()
+        print(
+            f"copied {migration.state['copied']} points (skipped {migration.state['skipped']} without summary, "
+            f"{caught_up} caught up, {deleted} deleted from the source meanwhile) in {elapsed:.1f}s; "
+            f"source {counts['source']}, target {counts['target']}"
+        )
+        if counts["target"] < counts["expected"]:
+            print(f"verification failed: expected at least {counts['expected']} points in {target}", file=sys.stderr)
+            return 1
+        if counts["target"] > counts["source"]:
+            print(
+                f"verification failed: {target} holds points deleted from {source}; rerun to replay them",
+                file=sys.stderr
+            )
+            return 1
+
+        if args.no_switch:
+            print(f"not switching; point {alias} at {target} with a rerun without --no-switch")
+            return 0
+
+        await switch_alias(manager, alias, target)
+        print(f"alias {alias} -> {target}; copying memories written since the catch-up began")
+        # The source receives no more writes once the alias has moved; the
+        # target may already hold newer refreshes of the same points
+        await migration.catch_up(catch_up_started, keep_newer=True)
+        checkpoint_path.unlink(missing_ok=True)
+        return 0
+    finally:
+        await manager.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed a memory collection into a new one and switch an alias")
+    parser.add_argument("--url", default=None, help="Qdrant URL or path:<dir> (default: QDRANT_URL)")
+    parser.add_argument("--alias", default=None, help="Alias the service reads (default: QDRANT_COLLECTION)")
+    parser.add_argument("--source", default=None, help="Source collection (default: the alias's collection)")
+    parser.add_argument("--target", default=None, help="New collection (default: source + model + dimension)")
+    parser.add_argument("--page-size", type=int, default=512, help="Points scrolled per page (and per checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Summaries per embedding call")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding batches in flight")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: .cache/migrations/...)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--no-switch", action="store_true", help="Copy and verify without switching the alias")
+    args = parser.parse_args()
+
+    try:
+        sys.exit(asyncio.run(run_migration(args)))
+    except MigrationError as e:
+        print(f"migration failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Summarization scheduler.
+
+Decides which conversation turns are worth summarizing and summarizes the
+ones that are several at a time per user, with the LLM or the local
+extractive summarizer, instead of one completion per request.
+"""
+
+import asyncio
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import structlog
+
+from cortex.config import settings
+from cortex.memory.extractive import extractive_summarizer
+from cortex.memory.manager import memory_manager
+from cortex.memory.summarizer import memory_summarizer
+from cortex.observability.metrics import metrics_collector
+from cortex.user_dna.manager import user_dna_manager
+
+logger = structlog.get_logger()
+
+SMALL_TALK_PATTERN = re.compile(
+    r"^(hi|hey|hello|yo|thanks|thank you|thx|ty|ok|okay|k|cool|great|nice|awesome|perfect|"
+    r"bye|goodbye|good (morning|afternoon|evening|night)|yes|no|yep|nope|sure|lol|got it)"
+    r"[\s!.?,:)]*$",
+    re.IGNORECASE
+)
+
+# The user talking about themselves, their work or their team
+PERSONAL_PATTERN = re.compile(r"\b(i|i'm|im|i've|i'd|i'll|me|my|mine|myself|we|we're|our|us)\b", re.IGNORECASE)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+SUMMARIZER_MODES = ("llm", "local", "hybrid")
+
+# Rough prompt overhead of the batch summarization call, in tokens
+PROMPT_OVERHEAD_TOKENS = 120
+
+
+class _UserBuffer:
+    """Eligible turns of one user waiting to be summarized."""
+
+    __slots__ = ("turns", "first_at", "last_at", "recent")
+
+    def __init__(self):
+        self.turns: List[Dict[str, str]] = []
+        self.first_at = 0.0
+        self.last_at = time.monotonic()
+        # Word sets of recently accepted turns, for the novelty check
+        self.recent: List[Set[str]] = []
+
+
+class SummarizationScheduler:
+    """
+    Gates, buffers and batch-summarizes conversation turns.
+
+    Each turn first passes a local gate (no LLM call): it is skipped when
+    it is too short, small talk, says nothing about the user, or nearly
+    repeats one of the user's recent turns. Eligible turns are buffered per
+    user and summarized together in one call when the buffer holds
+    `batch_turns` turns or its oldest turn is `max_wait` seconds old. Each
+    user's summarizer mode (see summarize_turns) picks the LLM, the local
+    extractive summarizer, or both; LLM calls count against a daily
+    per-user token budget.
+
+    A user's buffer is dropped once it is flushed and the user has been
+    idle for `recent_ttl` seconds, and token usage is only kept for the
+    current day, so state is bounded by recently active users.
+    """
+
+    def __init__(
+        self,
+        batch_turns: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        daily_token_budget: Optional[int] = None,
+        min_words: Optional[int] = None,
+        novelty_threshold: Optional[float] = None,
+        recent_ttl: Optional[float] = None
+    ):
+        self.batch_turns = max(batch_turns or settings.memory_summary_batch_turns, 1)
+        self.max_wait = max_wait or settings.memory_summary_max_wait
+        self.daily_token_budget = daily_token_budget or settings.memory_summary_daily_token_budget
+        self.min_words = settings.memory_summary_min_words if min_words is None else min_words
+        self.novelty_threshold = novelty_threshold or settings.memory_summary_novelty_threshold
+        self.recent_ttl = recent_ttl or settings.memory_summary_recent_ttl
+        self.require_personal = settings.memory_summary_require_personal
+        self.default_mode = settings.memory_summarizer_mode.lower()
+        if self.default_mode not in SUMMARIZER_MODES:
+            raise ValueError(f"Unknown memory summarizer mode: {self.default_mode}")
+
+        self._buffers: Dict[str, _UserBuffer] = {}
+        self._usage: Dict[str, Tuple[str, int]] = {}  # user_id -> (UTC date, tokens)
+        self._usage_day = ""
+        self._semaphore = asyncio.Semaphore(settings.memory_summary_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._timer: Optional[asyncio.Task] = None
+        self._llm_cooldown_until = 0.0
+
+        self._counts: Counter = Counter()
+
+        logger.info(
+            "summarization_scheduler_initialized",
+            batch_turns=self.batch_turns,
+            max_wait=self.max_wait,
+            default_mode=self.default_mode,
+            daily_token_budget=self.daily_token_budget
+        )
+
+    def submit(self, user_id: str, user_message: str, assistant_response: str):
+        """
+        Offer one completed turn for summarization. Never blocks.
+
+        Args:
+            user_id: User identifier
+            user_message: Last user message
+            assistant_response: Assistant reply
+        """
+        self._counts["submitted"] += 1
+        words = set(_WORD_PATTERN.findall((user_message or "").lower()))
+        buffer = self._buffers.setdefault(user_id, _UserBuffer())
+        buffer.last_at = time.monotonic()
+        self._ensure_timer()
+
+        reason = self._gate(user_message or "", words, buffer)
+        metrics_collector.record_memory_summary_turn(reason or "eligible")
+        if reason:
+            self._counts[f"skipped_{reason}"] += 1
+            logger.debug("memory_turn_skipped", user_id=user_id, reason=reason)
+            return
+
+        self._counts["eligible"] += 1
+        if not buffer.turns:
+            buffer.first_at = time.monotonic()
+        buffer.turns.append({"user": user_message, "assistant": assistant_response})
+        buffer.recent = (buffer.recent + [words])[-self.batch_turns * 2:]
+
+        if len(buffer.turns) >= self.batch_turns:
+            self._flush_user(user_id)
+
+    def _gate(self, text: str, words: Set[str], buffer: _UserBuffer) -> Optional[str]:
+        """
+        Cheap local check for memorable content.
+
+        Returns:
+            Skip reason, or None if the turn is eligible
+        """
+        stripped = text.strip()
+        if SMALL_TALK_PATTERN.match(stripped):
+            return "small_talk"
+        if len(words) < self.min_words:
+            return "too_short"
+        if self.require_personal and not PERSONAL_PATTERN.search(stripped):
+            return "impersonal"
+        for previous in buffer.recent:
+            if not previous:
+                continue
+            overlap = len(words & previous) / len(words | previous)
+            if overlap >= self.novelty_threshold:
+                return "duplicate"
+        return None
+
+    def _ensure_timer(self):
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.get_running_loop().create_task(self._flush_due())
+
+    async def _flush_due(self):
+        """Flush buffers whose oldest turn has waited max_wait seconds; drop idle empty ones."""
+        interval = min(self.max_wait, 5.0)
+        while self._buffers:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for user_id, buffer in list(self._buffers.items()):
+                if buffer.turns and now - buffer.first_at >= self.max_wait:
+                    self._flush_user(user_id)
+                elif not buffer.turns and now - buffer.last_at >= self.recent_ttl:
+                    del self._buffers[user_id]
+
+    def _flush_user(self, user_id: str):
+        """Start summarizing a user's buffered turns in the background."""
+        buffer = self._buffers.get(user_id)
+        if buffer is None or not buffer.turns:
+            return
+        turns, buffer.turns = buffer.turns, []
+
+        task = asyncio.get_running_loop().create_task(self._summarize(user_id, turns))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, user_id: str, turns: List[Dict[str, str]]):
+        """Summarize a batch of turns, then store each fact."""
+        facts, _, _ = await self.summarize_turns(user_id, turns)
+        # Facts are distilled from the whole batch, so each keeps all of its turns
+        conversation = turns[0] if len(turns) == 1 else {"turns": turns}
+
+        for fact in facts:
+            try:
+                await memory_manager.store_memory(user_id, fact, conversation)
+                metrics_collector.record_memory_storage(user_id)
+            except Exception as e:
+                logger.warning(
+                    "memory_storage_failed",
+                    user_id=user_id,
+                    error=str(e),
+                    message="Memory storage unavailable - continuing without storage"
+                )
+
+    async def summarize_turns(
+        self,
+        user_id: str,
+        turns: List[Dict[str, str]],
+        max_facts: int = 5
+    ) -> Tuple[List[str], int, str]:
+        """
+        Summarize turns with the backend chosen by the user's summarizer mode.
+
+        - llm: one LLM call; skipped once the daily token budget is spent
+        - local: extractive summarizer, no network
+        - hybrid: LLM, falling back to local when the budget is spent or
+          the call fails (the LLM is then avoided for a cooldown period)
+
+        Args:
+            user_id: User identifier
+            turns: Conversation dictionaries, oldest first
+            max_facts: Upper bound on facts
+
+        Returns:
+            Tuple of (facts, LLM tokens used, backend: llm, local or skipped)
+        """
+        mode = await self.resolve_mode(user_id)
+
+        use_llm = mode != "local" and not (mode == "hybrid" and time.monotonic() < self._llm_cooldown_until)
+        if use_llm:
+            estimate = PROMPT_OVERHEAD_TOKENS + sum(
+                len(turn.get("user") or "") + len(turn.get("assistant") or "") for turn in turns
+            ) // 4
+            if self._tokens_used(user_id) + estimate > self.daily_token_budget:
+                logger.info("memory_summary_budget_exhausted", user_id=user_id, turns=len(turns), mode=mode)
+                if mode == "llm":
+                    self._counts["skipped_budget"] += len(turns)
+                    metrics_collector.record_memory_summary_turn("budget", len(turns))
+                    return [], 0, "skipped"
+                use_llm = False
+
+        if use_llm:
+            async with self._semaphore:
+                facts, tokens = await memory_summarizer.summarize_batch(turns, max_facts=max_facts)
+            self._add_usage(user_id, tokens or estimate)
+
+            if facts is not None:
+                self._record_batch("llm", turns, facts)
+                return facts, tokens, "llm"
+
+            if mode == "llm":
+                return [], tokens, "llm"
+            self._llm_cooldown_until = time.monotonic() + settings.memory_summarizer_llm_cooldown
+            logger.warning(
+                "memory_summarizer_llm_unavailable",
+                fallback="local",
+                cooldown=settings.memory_summarizer_llm_cooldown
+            )
+
+        facts, _ = await extractive_summarizer.summarize_batch(turns, max_facts=max_facts)
+        self._record_batch("local", turns, facts)
+        return facts, 0, "local"
+
+    async def resolve_mode(self, user_id: str) -> str:
+        """The user's summarizer mode (User DNA preference "memory_summarizer"), else the default."""
+        profile = await user_dna_manager.get_profile(user_id)
+        mode = (profile.preferences or {}).get("memory_summarizer") or self.default_mode
+        if mode not in SUMMARIZER_MODES:
+            logger.warning("memory_summarizer_mode_invalid", user_id=user_id, mode=mode)
+            return self.default_mode
+        return mode
+
+    def _record_batch(self, backend: str, turns: List[Dict[str, str]], facts: List[str]):
+        self._counts["llm_calls" if backend == "llm" else "local_batches"] += 1
+        self._counts["batched_turns"] += len(turns)
+        metrics_collector.record_memory_summary_batch(backend, len(turns), len(facts))
+
+    def _tokens_used(self, user_id: str) -> int:
+        today = datetime.now(timezone.utc).date().isoformat()
+        day, tokens = self._usage.get(user_id, (today, 0))
+        return tokens if day == today else 0
+
+    def _add_usage(self, user_id: str, tokens: int):
+        today = datetime.now(timezone.utc).date().isoformat()
+        if today != self._usage_day:
+            # Budgets are daily; earlier days' rows no longer count
+            self._usage = {user: usage for user, usage in self._usage.items() if usage[0] == today}
+            self._usage_day = today
+        self._usage[user_id] = (today, self._tokens_used(user_id) + tokens)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters since startup.
+
+        llm_calls_saved_per_1000 compares the LLM calls actually made with
+        one call per submitted turn (the behaviour without the scheduler).
+        """
+        submitted = self._counts["submitted"]
+        skipped = sum(count for key, count in self._counts.items() if key.startswith("skipped_"))
+        calls = self._counts["llm_calls"]
+        batches = calls + self._counts["local_batches"]
+        return {
+            **dict(self._counts),
+            "pending": sum(len(buffer.turns) for buffer in self._buffers.values()),
+            "skip_rate": skipped / submitted if submitted else 0.0,
+            "avg_batch_size": self._counts["batched_turns"] / batches if batches else 0.0,
+            "llm_calls_saved_per_1000": 1000 * (submitted - calls) / submitted if submitted else 0.0
+        }
+
+    async def close(self):
+        """Summarize everything still buffered (graceful shutdown)."""
+        if self._timer is not None:
+            self._timer.cancel()
+        for user_id in list(self._buffers):
+            self._flush_user(user_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("summarization_scheduler_closed", **self.stats())
+
+
+# Global summarization scheduler
+summarization_scheduler = SummarizationScheduler()
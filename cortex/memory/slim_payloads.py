@@ -0,0 +1,108 @@
+"""
+Move conversation snippets out of existing memory payloads.
+
+Memories stored before the snippet store carry the whole conversation in
+a `conversation_snippet` payload field, which Qdrant holds in RAM, ships
+in snapshots and returns on every search. This scrolls the collection,
+writes each snippet compressed to the snippet store (MEMORY_SNIPPET_STORE)
+keyed by point id, then deletes the field from the payload.
+
+A page's snippets are stored before its payloads are changed, so an
+interrupted run loses nothing; a rerun skips the points already slimmed.
+
+Usage:
+    python -m cortex.memory.slim_payloads --dry-run
+    python -m cortex.memory.slim_payloads --url path:/data/qdrant --collection cortex_memory
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from cortex.memory.manager import MemoryManager
+from cortex.memory.snippets import ZSTD_AVAILABLE, compress, snippet_store
+
+SNIPPET_FIELD = "conversation_snippet"
+
+
+async def slim_payloads(
+    url: Optional[str],
+    collection: Optional[str],
+    page_size: int,
+    dry_run: bool
+) -> Dict[str, Any]:
+    """Move every payload snippet to the snippet store and report the bytes moved."""
+    if not snippet_store.enabled and not dry_run:
+        raise ValueError("MEMORY_SNIPPET_STORE is none; the snippets would be lost")
+
+    manager = MemoryManager(qdrant_url=url, collection_name=collection, service=False)
+    await manager.connect()
+    report = {
+        "collection": manager.collection_name,
+        "points": 0,
+        "slimmed": 0,
+        "payload_bytes": 0,
+        "stored_bytes": 0,
+        "dry_run": dry_run,
+    }
+    try:
+        started = time.perf_counter()
+        offset = None
+        while True:
+            points, offset = await manager._call(manager._client.scroll(
+                collection_name=manager.collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=["user_id", SNIPPET_FIELD],
+                with_vectors=False
+            ))
+            report["points"] += len(points)
+
+            carrying = [point for point in points if SNIPPET_FIELD in (point.payload or {})]
+            items = [
+                (point.id, point.payload.get("user_id", ""), str(point.payload[SNIPPET_FIELD] or ""))
+                for point in carrying
+            ]
+            report["slimmed"] += len(carrying)
+            report["payload_bytes"] += sum(len(snippet.encode("utf-8")) for _, _, snippet in items)
+
+            if carrying and dry_run:
+                report["stored_bytes"] += sum(len(compress(snippet)) for _, _, snippet in items if snippet)
+            elif carrying:
+                report["stored_bytes"] += await snippet_store.put_many(items)
+                await manager._call(manager._client.delete_payload(
+                    collection_name=manager.collection_name,
+                    keys=[SNIPPET_FIELD],
+                    points=[point.id for point in carrying]
+                ))
+
+            if offset is None:
+                break
+
+        report["seconds"] = time.perf_counter() - started
+        return report
+    finally:
+        await manager.disconnect()
+        snippet_store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move conversation snippets from memory payloads to the snippet store")
+    parser.add_argument("--url", default=None, help="Qdrant URL or path:<dir> (default: QDRANT_URL)")
+    parser.add_argument("--collection", default=None, help="Collection (default: QDRANT_COLLECTION)")
+    parser.add_argument("--page-size", type=int, default=512, help="Points scrolled and updated per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Report without changing the collection")
+    args = parser.parse_args()
+
+    report = asyncio.run(slim_payloads(args.url, args.collection, args.page_size, args.dry_run))
+    prefix = "would move" if report["dry_run"] else "moved"
+    print(
+        f"{report['collection']}: {report['points']} points, {prefix} {report['slimmed']} snippets "
+        f"({report['payload_bytes'] / 1e6:.1f} MB of payload -> {report['stored_bytes'] / 1e6:.1f} MB "
+        f"{'zstd' if ZSTD_AVAILABLE else 'zlib'} in {snippet_store.backend}) in {report['seconds']:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
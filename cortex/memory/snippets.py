@@ -0,0 +1,200 @@
+"""
+Compressed side-store for conversation snippets.
+
+Memory payloads in the vector store only carry the fields retrieval
+filters and returns on; the conversation a memory was distilled from is
+kept here, compressed and keyed by point id, and fetched only when asked
+for (see MemoryManager.get_snippet).
+
+Backends: "sqlite" (one local file, the default), "redis" (shared by
+replicas) or "none" (snippets are not kept). Values are compressed with
+zstd when the `zstandard` package is installed and zlib otherwise; a
+one-byte codec prefix lets either build read what the other wrote.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import structlog
+
+from cortex.config import settings
+from cortex.storage.redis_client import redis_client
+
+logger = structlog.get_logger()
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    logger.info("zstandard_not_installed", message="Memory snippets are compressed with zlib")
+
+SNIPPET_STORES = ("sqlite", "redis", "none")
+
+_CODEC_ZSTD = b"z"
+_CODEC_ZLIB = b"d"
+_CODEC_RAW = b"r"
+
+# Short snippets do not shrink enough to be worth a codec call
+MIN_COMPRESS_BYTES = 64
+
+
+def compress(text: str) -> bytes:
+    """Encode a snippet with the best available codec, prefixed by the codec byte."""
+    raw = text.encode("utf-8")
+    if len(raw) < MIN_COMPRESS_BYTES:
+        return _CODEC_RAW + raw
+    if ZSTD_AVAILABLE:
+        return _CODEC_ZSTD + zstandard.ZstdCompressor(level=settings.memory_snippet_level).compress(raw)
+    return _CODEC_ZLIB + zlib.compress(raw, min(settings.memory_snippet_level, 9))
+
+
+def decompress(data: bytes) -> str:
+    """
+    Decode a value written by compress().
+
+    Raises:
+        ValueError: If the value was written with zstd and zstandard is
+            not installed here
+    """
+    codec, body = data[:1], data[1:]
+    if codec == _CODEC_RAW:
+        raw = body
+    elif codec == _CODEC_ZLIB:
+        raw = zlib.decompress(body)
+    elif codec == _CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ValueError("Snippet is zstd-compressed; install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().decompress(body)
+    else:
+        raise ValueError(f"Unknown snippet codec: {codec!r}")
+    return raw.decode("utf-8")
+
+
+class SnippetStore:
+    """Conversation snippets by memory point id."""
+
+    def __init__(self, backend: Optional[str] = None, path: Optional[str] = None):
+        """
+        Args:
+            backend: sqlite, redis or none (defaults to settings)
+            path: SQLite database file (defaults to settings)
+        """
+        self.backend = (backend or settings.memory_snippet_store).lower()
+        if self.backend not in SNIPPET_STORES:
+            raise ValueError(f"Unknown snippet store: {self.backend}")
+        self.path = path or settings.memory_snippet_path
+        self._db: Optional[sqlite3.Connection] = None
+        # sqlite3 connections are not safe for concurrent use across threads
+        self._db_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "none"
+
+    async def put_many(self, items: List[Tuple[Any, str, str]]) -> int:
+        """
+        Store snippets, replacing earlier ones of the same points.
+
+        Args:
+            items: (point_id, user_id, snippet) triples; empty snippets are skipped
+
+        Returns:
+            Compressed bytes written
+        """
+        rows = [(str(point_id), user_id, compress(snippet)) for point_id, user_id, snippet in items if snippet]
+        if not self.enabled or not rows:
+            return 0
+
+        if self.backend == "redis":
+            await redis_client.set_snippets({point_id: data for point_id, _, data in rows})
+        else:
+            now = datetime.now(timezone.utc).isoformat()
+            await asyncio.to_thread(
+                self._execute_many,
+                "INSERT OR REPLACE INTO snippets (point_id, user_id, data, created_at) VALUES (?, ?, ?, ?)",
+                [(point_id, user_id, data, now) for point_id, user_id, data in rows]
+            )
+        return sum(len(data) for _, _, data in rows)
+
+    async def get(self, point_id: Any) -> Optional[str]:
+        """
+        Fetch one snippet.
+
+        Args:
+            point_id: Memory point id
+
+        Returns:
+            The snippet, or None if none is stored
+        """
+        if not self.enabled:
+            return None
+
+        if self.backend == "redis":
+            data = await redis_client.get_snippet(str(point_id))
+        else:
+            rows = await asyncio.to_thread(
+                self._query, "SELECT data FROM snippets WHERE point_id = ?", (str(point_id),)
+            )
+            data = rows[0][0] if rows else None
+        return decompress(data) if data else None
+
+    async def delete(self, point_ids: List[Any]):
+        """Remove the snippets of deleted memories."""
+        if not self.enabled or not point_ids:
+            return
+
+        keys = [str(point_id) for point_id in point_ids]
+        if self.backend == "redis":
+            await redis_client.delete_snippets(keys)
+        else:
+            await asyncio.to_thread(
+                self._execute_many, "DELETE FROM snippets WHERE point_id = ?", [(key,) for key in keys]
+            )
+
+    async def stats(self) -> Dict[str, Any]:
+        """Snippet count and compressed size (SQLite only)."""
+        if self.backend != "sqlite":
+            return {"backend": self.backend}
+        count, size = (await asyncio.to_thread(
+            self._query, "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM snippets", ()
+        ))[0]
+        return {"backend": self.backend, "snippets": count, "bytes": size}
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS snippets ("
+                "point_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, data BLOB NOT NULL, created_at TEXT NOT NULL)"
+            )
+            db.commit()
+            self._db = db
+            logger.info("memory_snippet_store_opened", path=self.path, zstd=ZSTD_AVAILABLE)
+        return self._db
+
+    def _execute_many(self, sql: str, rows: List[tuple]):
+        with self._db_lock:
+            db = self._connection()
+            db.executemany(sql, rows)
+            db.commit()
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        with self._db_lock:
+            return self._connection().execute(sql, params).fetchall()
+
+
+# Global snippet store instance
+snippet_store = SnippetStore()
@@ -1,8 +1,11 @@
 """Memory summarization using LLM."""
 
-from typing import Dict, Optional
+import re
+from typing import Dict, List, Optional, Tuple
 import structlog
 
+from cortex.config import settings
+
 logger = structlog.get_logger()
 
 # Optional imports for memory features
@@ -28,6 +31,15 @@ Conversation:
 
 Fact:"""
     
+    BATCH_SUMMARIZATION_PROMPT = """Below are {count} recent conversation turns with the same user. List the durable facts they reveal about the user: preferences, personal context, ongoing work. Write at most {max_facts} facts, one per line, each a short standalone statement starting with "User". Skip anything only relevant to a single question. If there is nothing worth remembering, write NONE.
+
+{turns}
+
+Facts:"""
+    
+    # Leading list markers the model may add ("1.", "-", "*")
+    FACT_PREFIX = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s*")
+    
     def __init__(self, model: str = "groq/llama-3.1-8b-instant"):
         """
         Initialize summarizer.
@@ -93,6 +105,78 @@ Fact:"""
             )
             return None
     
+    async def summarize_batch(
+        self,
+        conversations: List[Dict],
+        max_facts: int = 5
+    ) -> Tuple[Optional[List[str]], int]:
+        """
+        Distills several conversation turns into facts with one LLM call.
+        
+        Args:
+            conversations: Conversation dictionaries, oldest first
+            max_facts: Upper bound on facts requested
+            
+        Returns:
+            Tuple of (facts, total tokens used); facts is None if the call
+            failed, so callers can fall back to another summarizer
+        """
+        if not LITELLM_AVAILABLE:
+            return None, 0
+        if not conversations:
+            return [], 0
+        
+        turns = "\n\n".join(
+            f"Turn {index}:\n{self._format_conversation(conversation)}"
+            for index, conversation in enumerate(conversations, 1)
+        )
+        prompt = self.BATCH_SUMMARIZATION_PROMPT.format(
+            count=len(conversations),
+            max_facts=max_facts,
+            turns=turns
+        )
+        
+        try:
+            response = await litellm.acompletion(
+                model=self.model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=60 * max_facts,
+                temperature=0.3
+            )
+        except Exception as e:
+            logger.error(
+                "batch_summarization_failed",
+                error=str(e),
+                model=self.model,
+                turns=len(conversations)
+            )
+            return None, 0
+        
+        usage = getattr(response, "usage", None)
+        tokens = getattr(usage, "total_tokens", 0) or 0
+        facts = self._parse_facts(response.choices[0].message.content or "", max_facts)
+        
+        logger.info(
+            "conversations_summarized",
+            turns=len(conversations),
+            facts=len(facts),
+            tokens=tokens
+        )
+        
+        return facts, tokens
+    
+    def _parse_facts(self, text: str, max_facts: int) -> List[str]:
+        """Split the model's answer into fact lines."""
+        facts = []
+        for line in text.splitlines():
+            fact = self.FACT_PREFIX.sub("", line).strip()
+            if not fact or fact.upper().rstrip(".") == "NONE":
+                continue
+            facts.append(fact)
+        return facts[:max_facts]
+    
     def _format_conversation(self, conversation: Dict) -> str:
         """
         Formats conversation dictionary into readable text.
@@ -169,5 +253,5 @@ def inject_context(messages: list, retrieved_context: list) -> list:
     return modified_messages
 
 
-# Global summarizer instance (uses Groq Llama 3.1 - free tier available)
-memory_summarizer = MemorySummarizer(model="groq/llama-3.1-8b-instant")
+# Global summarizer instance (default: Groq Llama 3.1 - free tier available)
+memory_summarizer = MemorySummarizer(model=settings.memory_summarizer_model)
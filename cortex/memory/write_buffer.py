@@ -0,0 +1,328 @@
+"""Write-behind buffer that batches memory upserts to Qdrant."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+import structlog
+from qdrant_client.models import PointStruct
+
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+
+logger = structlog.get_logger()
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Non-POSIX platforms: the spill file is only locked within the process
+    FCNTL_AVAILABLE = False
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "spill")
+
+MAX_RETRY_BACKOFF_SECONDS = 30.0
+
+UpsertCall = Callable[[List[PointStruct]], Awaitable[None]]
+
+
+class MemoryWriteBuffer:
+    """
+    Accumulates memory points and upserts them in batches.
+
+    A single background task flushes the queue in FIFO order when it holds
+    `batch_size` points or `flush_interval` seconds after the first point
+    arrived. A failed batch stays at the head of the queue and is retried
+    with backoff, so points (and therefore each user's memories) are always
+    written in the order they were stored.
+
+    The queue is bounded by `max_pending`. When Qdrant is down long enough
+    to fill it, the overflow policy decides what happens to new points:
+    drop the oldest, drop the newest, or spill them to a JSONL file that is
+    replayed, still in order, once writes succeed again. The spill file is
+    per collection, so a buffer only ever replays points meant for its own
+    collection; one left by an earlier run is replayed from start(). Spill
+    file I/O runs in a thread under an advisory lock, since every worker
+    process of the service shares the file; replaying the same point twice
+    is harmless (upserts are idempotent).
+    """
+
+    def __init__(
+        self,
+        upsert: UpsertCall,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        overflow_policy: Optional[str] = None,
+        spill_path: Optional[str] = None,
+        collection: Optional[str] = None
+    ):
+        """
+        Args:
+            upsert: Coroutine writing a list of points in one call
+            batch_size: Points per upsert
+            flush_interval: Seconds a point may wait for its batch to fill
+            max_pending: Queue bound
+            overflow_policy: drop_oldest, drop_newest or spill
+            spill_path: JSONL file for the spill policy (defaults to the
+                settings path with the collection name inserted)
+            collection: Collection the points are written to
+        """
+        self._upsert = upsert
+        self.batch_size = max(batch_size or settings.memory_write_batch_size, 1)
+        self.flush_interval = flush_interval or settings.memory_write_flush_interval
+        self.max_pending = max_pending or settings.memory_write_max_pending
+        self.overflow_policy = (overflow_policy or settings.memory_write_overflow_policy).lower()
+        if spill_path is None:
+            default_path = Path(settings.memory_write_spill_path)
+            if collection:
+                default_path = default_path.with_name(f"{default_path.stem}.{collection}{default_path.suffix}")
+            spill_path = default_path
+        self.spill_path = Path(spill_path)
+        self.lock_path = self.spill_path.with_name(self.spill_path.name + ".lock")
+
+        if self.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {self.overflow_policy}")
+
+        self._queue: Deque[Tuple[PointStruct, float]] = deque()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._failures = 0
+        # Points left in the spill file by an earlier outage or process
+        self._spilled = self.overflow_policy == "spill" and self.spill_path.exists()
+        # Points to append to the spill file, written by _spill_task off the event loop
+        self._unspilled: List[PointStruct] = []
+        self._spill_task: Optional[asyncio.Task] = None
+        self._file_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def pending_points(self) -> List[PointStruct]:
+        """Points queued but not yet written, oldest first (spilled points excluded)."""
+        return [point for point, _ in self._queue]
+
+    def start(self):
+        """Replay points spilled by an earlier run without waiting for the next add()."""
+        if self._spilled and not self._closing:
+            self._ensure_task()
+            logger.info("memory_write_spill_found", path=str(self.spill_path))
+
+    def add(self, point: PointStruct):
+        """Queue a point for the next batch. Never blocks."""
+        if self._closing:
+            raise RuntimeError("Memory write buffer is closed")
+
+        if self._spilled:
+            # The spill file holds older points; keep FIFO by appending behind them
+            self._spill([point])
+        elif len(self._queue) >= self.max_pending:
+            self._handle_overflow(point)
+        else:
+            self._queue.append((point, time.perf_counter()))
+
+        metrics_collector.set_memory_write_pending(len(self._queue))
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+        self._ensure_task()
+
+    def _handle_overflow(self, point: PointStruct):
+        if self.overflow_policy == "drop_newest":
+            metrics_collector.record_memory_write_dropped("overflow_newest")
+            logger.warning("memory_write_dropped", policy=self.overflow_policy, pending=len(self._queue))
+        elif self.overflow_policy == "drop_oldest":
+            self._queue.popleft()
+            self._queue.append((point, time.perf_counter()))
+            metrics_collector.record_memory_write_dropped("overflow_oldest")
+            logger.warning("memory_write_dropped", policy=self.overflow_policy, pending=len(self._queue))
+        else:
+            self._spill([point])
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """Flush loop: wait for a full batch or the interval, then drain."""
+        while self._queue or self._spilled:
+            if len(self._queue) < self.batch_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+
+            while self._queue:
+                if not await self._flush_batch():
+                    if self._closing:
+                        return
+                    backoff = min(self.flush_interval * 2 ** self._failures, MAX_RETRY_BACKOFF_SECONDS)
+                    await asyncio.sleep(backoff)
+                    break
+
+            if not self._queue and self._spilled:
+                await self._load_spilled()
+
+    async def _flush_batch(self) -> bool:
+        """Upsert the head of the queue; on failure leave it there."""
+        batch = list(islice(self._queue, self.batch_size))
+        started = time.perf_counter()
+        try:
+            await self._upsert([point for point, _ in batch])
+        except Exception as e:
+            self._failures += 1
+            logger.warning(
+                "memory_write_flush_failed",
+                points=len(batch),
+                pending=len(self._queue),
+                failures=self._failures,
+                error=str(e)
+            )
+            return False
+
+        finished = time.perf_counter()
+        for _ in batch:
+            self._queue.popleft()
+        self._failures = 0
+
+        metrics_collector.record_memory_write_flush(
+            size=len(batch),
+            flush_seconds=finished - started,
+            queue_seconds=[finished - enqueued_at for _, enqueued_at in batch]
+        )
+        metrics_collector.set_memory_write_pending(len(self._queue))
+        logger.debug("memory_write_flushed", points=len(batch), pending=len(self._queue))
+        return True
+
+    def _spill(self, points: List[PointStruct]):
+        """Hand points to the background spill writer (never blocks)."""
+        self._unspilled.extend(points)
+        self._spilled = True
+        if self._spill_task is None or self._spill_task.done():
+            self._spill_task = asyncio.get_running_loop().create_task(self._write_spill())
+
+    async def _write_spill(self):
+        while self._unspilled:
+            points, self._unspilled = self._unspilled, []
+            await asyncio.to_thread(self._append_spill, points)
+
+    async def _drain_spill(self):
+        """Wait until every handed-over point is in the spill file."""
+        if self._spill_task is not None and not self._spill_task.done():
+            await asyncio.shield(self._spill_task)
+        await self._write_spill()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the spill file, across threads and processes."""
+        with self._file_lock:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            if not FCNTL_AVAILABLE:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _append_spill(self, points: List[PointStruct], ahead: bool = False):
+        """Write points to the spill file, behind (or ahead of) its contents. Runs in a thread."""
+        lines = "".join(json.dumps(point.model_dump(mode="json")) + "\n" for point in points)
+        try:
+            with self._locked():
+                if ahead and self.spill_path.exists():
+                    tmp_path = self.spill_path.with_suffix(".tmp")
+                    tmp_path.write_text(lines + self.spill_path.read_text(encoding="utf-8"), encoding="utf-8")
+                    os.replace(tmp_path, self.spill_path)
+                else:
+                    with open(self.spill_path, "a", encoding="utf-8") as f:
+                        f.write(lines)
+            metrics_collector.record_memory_write_dropped("spilled", len(points))
+        except OSError as e:
+            metrics_collector.record_memory_write_dropped("spill_failed", len(points))
+            logger.error("memory_write_spill_failed", path=str(self.spill_path), points=len(points), error=str(e))
+
+    def _take_spilled(self) -> Tuple[List[str], int]:
+        """Remove up to max_pending lines from the head of the spill file. Runs in a thread."""
+        with self._locked():
+            try:
+                with open(self.spill_path, encoding="utf-8") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                return [], 0
+
+            loaded, remaining = lines[:self.max_pending], lines[self.max_pending:]
+            if remaining:
+                tmp_path = self.spill_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.writelines(remaining)
+                os.replace(tmp_path, self.spill_path)
+            else:
+                self.spill_path.unlink(missing_ok=True)
+        return loaded, len(remaining)
+
+    async def _load_spilled(self):
+        """Move spilled points back into the queue, oldest first."""
+        await self._drain_spill()
+        loaded, remaining = await asyncio.to_thread(self._take_spilled)
+
+        now = time.perf_counter()
+        for line in loaded:
+            try:
+                self._queue.append((PointStruct(**json.loads(line)), now))
+            except (ValueError, TypeError) as e:
+                logger.warning("memory_write_spill_line_invalid", error=str(e))
+
+        # Points spilled while the file was being read are replayed on the next pass
+        if not remaining and not self._unspilled:
+            self._spilled = False
+
+        metrics_collector.set_memory_write_pending(len(self._queue))
+        if loaded:
+            logger.info("memory_write_spill_replayed", points=len(loaded), remaining=remaining)
+
+    async def close(self, timeout: Optional[float] = None):
+        """
+        Flush everything still queued (graceful shutdown).
+
+        Points that cannot be written within `timeout` are spilled under
+        the spill policy and dropped otherwise.
+        """
+        timeout = settings.memory_write_shutdown_timeout if timeout is None else timeout
+        self._closing = True
+        self._wake.set()
+
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+        elif self._queue:
+            while self._queue and await self._flush_batch():
+                pass
+
+        await self._drain_spill()
+        if self._queue:
+            leftover = [point for point, _ in self._queue]
+            self._queue.clear()
+            if self.overflow_policy == "spill":
+                # Queued points are older than anything already in the spill file
+                await asyncio.to_thread(self._append_spill, leftover, True)
+                self._spilled = True
+                logger.warning("memory_write_spilled_on_shutdown", points=len(leftover), path=str(self.spill_path))
+            else:
+                metrics_collector.record_memory_write_dropped("shutdown", len(leftover))
+                logger.error("memory_write_unflushed_on_shutdown", points=len(leftover))
+
+        metrics_collector.set_memory_write_pending(0)
+        logger.info("memory_write_buffer_closed", spilled=self._spilled)
@@ -77,6 +77,81 @@ memory_storage_total = Counter(
     ['user_id']
 )
 
+memory_dedup_total = Counter(
+    'cortex_memory_dedup_total',
+    'Near-duplicate checks on memory storage',
+    ['outcome']  # inserted, refreshed, refreshed_pending, check_failed
+)
+
+memory_fallback_total = Counter(
+    'cortex_memory_fallback_total',
+    'Local fallback store activity while Qdrant is unavailable or being mirrored',
+    ['outcome']  # served, miss, warmed, warm_failed
+)
+
+memory_summary_turns_total = Counter(
+    'cortex_memory_summary_turns_total',
+    'Conversation turns offered for memory summarization',
+    ['outcome']  # eligible, small_talk, too_short, impersonal, duplicate, budget
+)
+
+memory_summary_batch_turns = Histogram(
+    'cortex_memory_summary_batch_turns',
+    'Turns summarized per batch',
+    ['backend'],  # llm, local
+    buckets=(1, 2, 3, 5, 8, 13, 20)
+)
+
+memory_summary_llm_calls_total = Counter(
+    'cortex_memory_summary_llm_calls_total',
+    'Memory summarization LLM calls'
+)
+
+memory_summary_facts_total = Counter(
+    'cortex_memory_summary_facts_total',
+    'Facts extracted by memory summarization',
+    ['backend']
+)
+
+memory_write_batch_size = Histogram(
+    'cortex_memory_write_batch_size',
+    'Points per batched memory upsert',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+memory_write_flush_seconds = Histogram(
+    'cortex_memory_write_flush_seconds',
+    'Duration of one batched memory upsert',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+memory_write_queue_seconds = Histogram(
+    'cortex_memory_write_queue_seconds',
+    'Time from storing a memory to it being written to Qdrant',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 60.0)
+)
+
+memory_write_dropped_total = Counter(
+    'cortex_memory_write_dropped_total',
+    'Memory points not written directly by the write-behind buffer',
+    ['reason']  # overflow_oldest, overflow_newest, spilled, spill_failed, shutdown
+)
+
+memory_write_pending = Gauge(
+    'cortex_memory_write_pending',
+    'Memory points waiting in the write-behind buffer'
+)
+
+memory_hot_cache_users = Gauge(
+    'cortex_memory_hot_cache_users',
+    'Users held in the hot memory cache'
+)
+
+memory_hot_cache_bytes = Gauge(
+    'cortex_memory_hot_cache_bytes',
+    'Bytes of vectors and summaries held in the hot memory cache'
+)
+
 # API Key metrics
 api_key_validations_total = Counter(
     'cortex_api_key_validations_total',
@@ -90,6 +165,140 @@ api_key_usage_total = Counter(
     ['key_id', 'user_id']
 )
 
+# Sandbox metrics
+sandbox_queue_wait_seconds = Histogram(
+    'cortex_sandbox_queue_wait_seconds',
+    'Time spent waiting for a sandbox worker',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+sandbox_execution_seconds = Histogram(
+    'cortex_sandbox_execution_seconds',
+    'Sandbox code execution time in seconds',
+    ['mode'],  # pool, spawn
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+
+sandbox_worker_recycles_total = Counter(
+    'cortex_sandbox_worker_recycles_total',
+    'Total number of sandbox workers recycled',
+    ['reason']
+)
+
+# Math agent metrics
+math_tool_calls_total = Counter(
+    'cortex_math_tool_calls_total',
+    'Total number of calculator calls made by the math agent',
+    ['mode']  # function_calling, calc_protocol
+)
+
+math_completion_tokens = Histogram(
+    'cortex_math_completion_tokens',
+    'Completion tokens per math agent request',
+    ['mode'],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000)
+)
+
+math_tokens_saved_total = Counter(
+    'cortex_math_tokens_saved_estimate_total',
+    'Estimated completion tokens saved by offloading arithmetic',
+    ['mode']
+)
+
+# Embedding metrics
+embedding_calls_total = Counter(
+    'cortex_embedding_calls_total',
+    'Embedding provider calls',
+    ['model']
+)
+
+embedding_texts_total = Counter(
+    'cortex_embedding_texts_total',
+    'Texts sent to the embedding provider',
+    ['model']
+)
+
+embedding_call_duration_seconds = Histogram(
+    'cortex_embedding_call_duration_seconds',
+    'Embedding provider call latency',
+    ['model'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+embedding_cache_bytes_saved_total = Counter(
+    'cortex_embedding_cache_bytes_saved_total',
+    'Redis bytes saved by packed float16 embeddings versus JSON float lists'
+)
+
+embedding_batch_size = Histogram(
+    'cortex_embedding_batch_size',
+    'Texts per micro-batched embedding call',
+    ['model'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+embedding_batch_queue_seconds = Histogram(
+    'cortex_embedding_batch_queue_seconds',
+    'Time an embedding request waited for its batch to be sent',
+    ['model'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+# Agent step metrics
+agent_request_duration_seconds = Histogram(
+    'cortex_agent_request_duration_seconds',
+    'Agentic request duration by strategy',
+    ['strategy'],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+agent_step_duration_seconds = Histogram(
+    'cortex_agent_step_duration_seconds',
+    'Agentic step duration by action and strategy',
+    ['action', 'strategy'],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+# Cascade routing metrics
+cascade_requests_total = Counter(
+    'cortex_cascade_requests_total',
+    'Cascade-routed requests by outcome',
+    ['category', 'outcome']  # accepted, escalated
+)
+
+cascade_duration_seconds = Histogram(
+    'cortex_cascade_duration_seconds',
+    'Cascade request latency by outcome',
+    ['category', 'outcome'],
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+cascade_tokens_saved_total = Counter(
+    'cortex_cascade_tokens_saved_total',
+    'Estimated tokens saved by accepted drafts versus direct routing',
+    ['category']
+)
+
+cascade_tokens_overhead_total = Counter(
+    'cortex_cascade_tokens_overhead_total',
+    'Tokens spent on drafts and verification that were escalated anyway',
+    ['category']
+)
+
+# Vision preprocessing metrics
+vision_bytes_saved_total = Counter(
+    'cortex_vision_bytes_saved_total',
+    'Total image payload bytes saved by preprocessing',
+    ['model']
+)
+
+vision_preprocess_cpu_seconds = Histogram(
+    'cortex_vision_preprocess_cpu_seconds',
+    'CPU time spent preprocessing one image',
+    ['model'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
 # System metrics
 active_requests = Gauge(
     'cortex_active_requests',
@@ -238,6 +447,81 @@ class MetricsCollector:
         """
         memory_storage_total.labels(user_id=user_id).inc()
     
+    def record_memory_dedup(self, outcome: str):
+        """
+        Record the outcome of a near-duplicate check.
+        
+        Args:
+            outcome: inserted, refreshed, refreshed_pending or check_failed
+        """
+        memory_dedup_total.labels(outcome=outcome).inc()
+    
+    def record_memory_fallback(self, outcome: str):
+        """
+        Record local fallback store activity.
+        
+        Args:
+            outcome: served, miss, warmed or warm_failed
+        """
+        memory_fallback_total.labels(outcome=outcome).inc()
+    
+    def record_memory_summary_turn(self, outcome: str, count: int = 1):
+        """
+        Record the summarization gate's decision for conversation turns.
+        
+        Args:
+            outcome: eligible, or the skip reason
+            count: Number of turns
+        """
+        memory_summary_turns_total.labels(outcome=outcome).inc(count)
+    
+    def record_memory_summary_batch(self, backend: str, turns: int, facts: int):
+        """
+        Record one summarized batch of turns.
+        
+        Args:
+            backend: llm or local
+            turns: Turns summarized together
+            facts: Facts produced
+        """
+        if backend == "llm":
+            memory_summary_llm_calls_total.inc()
+        memory_summary_batch_turns.labels(backend=backend).observe(turns)
+        memory_summary_facts_total.labels(backend=backend).inc(facts)
+    
+    def record_memory_write_flush(self, size: int, flush_seconds: float, queue_seconds: list):
+        """
+        Record one batched memory upsert.
+        
+        Args:
+            size: Points in the batch
+            flush_seconds: Upsert duration
+            queue_seconds: Time each point spent queued before it was written
+        """
+        memory_write_batch_size.observe(size)
+        memory_write_flush_seconds.observe(flush_seconds)
+        for seconds in queue_seconds:
+            memory_write_queue_seconds.observe(seconds)
+    
+    def record_memory_write_dropped(self, reason: str, count: int = 1):
+        """Record memory points dropped or spilled by the write-behind buffer."""
+        memory_write_dropped_total.labels(reason=reason).inc(count)
+    
+    def set_memory_write_pending(self, pending: int):
+        """Set the number of points waiting in the write-behind buffer."""
+        memory_write_pending.set(pending)
+    
+    def set_memory_hot_cache_size(self, users: int, size_bytes: int):
+        """
+        Set the hot memory cache size (hits and misses are recorded as cache_type memory_hot).
+        
+        Args:
+            users: Users held
+            size_bytes: Bytes held
+        """
+        memory_hot_cache_users.set(users)
+        memory_hot_cache_bytes.set(size_bytes)
+    
     def record_api_key_validation(self, status: str):
         """
         Record API key validation.
@@ -260,6 +544,140 @@ class MetricsCollector:
             user_id=user_id or 'none'
         ).inc()
     
+    def record_sandbox_queue_wait(self, seconds: float):
+        """
+        Record time spent waiting for a sandbox worker.
+        
+        Args:
+            seconds: Queue wait in seconds
+        """
+        sandbox_queue_wait_seconds.observe(seconds)
+    
+    def record_sandbox_execution(self, mode: str, seconds: float):
+        """
+        Record sandbox execution time.
+        
+        Args:
+            mode: Execution mode (pool, spawn)
+            seconds: Execution time in seconds
+        """
+        sandbox_execution_seconds.labels(mode=mode).observe(seconds)
+    
+    def record_sandbox_recycle(self, reason: str):
+        """
+        Record a sandbox worker being recycled.
+        
+        Args:
+            reason: Why the worker was recycled (max_runs, timeout, cpu_limit, ...)
+        """
+        sandbox_worker_recycles_total.labels(reason=reason).inc()
+    
+    def record_math_agent(
+        self,
+        mode: str,
+        tool_calls: int,
+        completion_tokens: int,
+        tokens_saved: int
+    ):
+        """
+        Record one math agent request.
+        
+        Args:
+            mode: Tool protocol used (function_calling, calc_protocol)
+            tool_calls: Number of local calculator calls
+            completion_tokens: Completion tokens across all LLM rounds
+            tokens_saved: Estimated tokens saved by offloading arithmetic
+        """
+        math_tool_calls_total.labels(mode=mode).inc(tool_calls)
+        math_completion_tokens.labels(mode=mode).observe(completion_tokens)
+        math_tokens_saved_total.labels(mode=mode).inc(tokens_saved)
+    
+    def record_embedding_call(self, model: str, texts: int, duration_seconds: float):
+        """
+        Record one embedding provider call.
+        
+        Args:
+            model: Embedding model
+            texts: Number of texts in the call
+            duration_seconds: Call latency
+        """
+        embedding_calls_total.labels(model=model).inc()
+        embedding_texts_total.labels(model=model).inc(texts)
+        embedding_call_duration_seconds.labels(model=model).observe(duration_seconds)
+    
+    def record_embedding_cache_bytes_saved(self, bytes_saved: int):
+        """Record Redis bytes saved by compact embedding storage."""
+        if bytes_saved > 0:
+            embedding_cache_bytes_saved_total.inc(bytes_saved)
+    
+    def record_embedding_batch(self, model: str, size: int, queue_seconds: list):
+        """
+        Record one micro-batched embedding call.
+        
+        Args:
+            model: Embedding model
+            size: Number of texts in the batch
+            queue_seconds: Queue wait of each request in the batch
+        """
+        embedding_batch_size.labels(model=model).observe(size)
+        for seconds in queue_seconds:
+            embedding_batch_queue_seconds.labels(model=model).observe(seconds)
+    
+    def record_agent_trace(
+        self,
+        strategy: str,
+        duration_seconds: float,
+        steps: list
+    ):
+        """
+        Record the timing of one agentic request.
+        
+        Args:
+            strategy: Execution strategy from the plan
+            duration_seconds: Total request duration
+            steps: (normalized action, duration seconds) per step
+        """
+        agent_request_duration_seconds.labels(strategy=strategy).observe(duration_seconds)
+        for action, step_seconds in steps:
+            agent_step_duration_seconds.labels(action=action, strategy=strategy).observe(step_seconds)
+    
+    def record_cascade(
+        self,
+        category: str,
+        escalated: bool,
+        duration_seconds: float,
+        tokens_saved: float
+    ):
+        """
+        Record one cascade-routed request.
+        
+        Args:
+            category: Task type
+            escalated: Whether the draft was rejected
+            duration_seconds: Total latency including any escalation
+            tokens_saved: Estimated saving versus direct routing (negative = overhead)
+        """
+        outcome = "escalated" if escalated else "accepted"
+        cascade_requests_total.labels(category=category, outcome=outcome).inc()
+        cascade_duration_seconds.labels(category=category, outcome=outcome).observe(duration_seconds)
+        if tokens_saved > 0:
+            cascade_tokens_saved_total.labels(category=category).inc(tokens_saved)
+        elif tokens_saved < 0:
+            cascade_tokens_overhead_total.labels(category=category).inc(-tokens_saved)
+    
+    def record_vision_preprocess(self, model: str, bytes_saved: int, cpu_seconds: float):
+        """
+        Record one preprocessed vision image.
+        
+        Args:
+            model: Target model or worker name
+            bytes_saved: Payload bytes saved (negative if the image grew)
+            cpu_seconds: CPU time spent decoding and re-encoding
+        """
+        if bytes_saved > 0:
+            vision_bytes_saved_total.labels(model=model).inc(bytes_saved)
+        vision_preprocess_cpu_seconds.labels(model=model).observe(cpu_seconds)
+    
     def start_request(self):
         """Increment active requests counter."""
         active_requests.inc()
@@ -0,0 +1,397 @@
+"""Agent trace store: bounded in-memory history of agentic requests."""
+
+import asyncio
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Iterable
+import structlog
+
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+
+logger = structlog.get_logger()
+
+ERROR_MAX_CHARS = 200
+
+# Recent successful durations kept per step action (and per action and worker)
+STEP_LATENCY_WINDOW = 256
+
+# "generate_code_iteration_2" -> "generate_code", "execute_code_block_1_3" -> "execute_code_block"
+_ACTION_SUFFIX = re.compile(r"(_iteration)?(_\d+)+$")
+
+
+def normalize_action(action: str) -> str:
+    """Strip iteration and block numbers so step actions aggregate."""
+    return _ACTION_SUFFIX.sub("", action)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class StepRecord:
+    """Timing of one agentic step."""
+
+    __slots__ = ("step_number", "action", "worker", "started_at", "duration_ms", "success", "error")
+
+    def __init__(
+        self,
+        step_number: int,
+        action: str,
+        worker: Optional[str],
+        started_at: float,
+        duration_ms: float,
+        success: bool,
+        error: Optional[str] = None
+    ):
+        self.step_number = step_number
+        self.action = action
+        self.worker = worker
+        self.started_at = started_at
+        self.duration_ms = duration_ms
+        self.success = success
+        self.error = error[:ERROR_MAX_CHARS] if error else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class TraceRecord:
+    """One agentic request and its steps."""
+
+    __slots__ = (
+        "request_id", "user_id", "task_type", "strategy", "worker",
+        "started_at", "duration_ms", "success", "steps"
+    )
+
+    def __init__(
+        self,
+        request_id: str,
+        user_id: Optional[str],
+        task_type: Optional[str],
+        strategy: Optional[str],
+        worker: Optional[str],
+        started_at: float,
+        duration_ms: float,
+        success: bool,
+        steps: Iterable[StepRecord]
+    ):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.task_type = task_type
+        self.strategy = strategy
+        self.worker = worker
+        self.started_at = started_at
+        self.duration_ms = duration_ms
+        self.success = success
+        self.steps = tuple(steps)
+
+    @classmethod
+    def from_steps(
+        cls,
+        request_id: str,
+        user_id: Optional[str],
+        task_type: Optional[str],
+        plan: Optional[Dict[str, Any]],
+        steps: Iterable[Any],
+        started_at: float,
+        success: bool
+    ) -> "TraceRecord":
+        """Build a trace from finished AgenticStep objects and the execution plan."""
+        plan = plan or {}
+        records = []
+        for step in steps:
+            step_started = step.started_at or started_at
+            step_finished = step.finished_at or step_started
+            records.append(StepRecord(
+                step.step_number,
+                step.action,
+                step.worker,
+                step_started,
+                (step_finished - step_started) * 1000,
+                step.error is None,
+                step.error
+            ))
+
+        return cls(
+            request_id=request_id,
+            user_id=user_id,
+            task_type=str(task_type.value if hasattr(task_type, "value") else task_type) if task_type else None,
+            strategy=plan.get("strategy"),
+            worker=plan.get("worker"),
+            started_at=started_at,
+            duration_ms=(time.time() - started_at) * 1000,
+            success=success,
+            steps=records
+        )
+
+    def to_dict(self, include_steps: bool = True) -> Dict[str, Any]:
+        data = {slot: getattr(self, slot) for slot in self.__slots__ if slot != "steps"}
+        data["step_count"] = len(self.steps)
+        if include_steps:
+            data["steps"] = [step.to_dict() for step in self.steps]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TraceRecord":
+        steps = [StepRecord(**{slot: step.get(slot) for slot in StepRecord.__slots__}) for step in data.get("steps", [])]
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__ if slot != "steps"}, steps=steps)
+
+
+class TraceStore:
+    """
+    Fixed-capacity ring buffer of agent traces.
+
+    When full, the oldest trace is overwritten. Evicted traces can be spilled
+    to the database or Redis (TRACE_SPILL_BACKEND) so request_id lookups
+    still find them; everything left in memory is spilled on shutdown.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, spill_backend: Optional[str] = None):
+        self.capacity = capacity or settings.trace_store_capacity
+        self.spill_backend = (spill_backend or settings.trace_spill_backend or "none").lower()
+
+        self._slots: List[Optional[TraceRecord]] = [None] * self.capacity
+        self._next = 0
+        self._by_request: Dict[str, int] = {}
+        self._pending_spill: List[TraceRecord] = []
+        self._spill_task: Optional[asyncio.Task] = None
+        # (action, worker or None) -> recent durations, so planning never scans the ring
+        self._step_latencies: Dict[tuple, deque] = {}
+
+        logger.info(
+            "trace_store_initialized",
+            capacity=self.capacity,
+            spill_backend=self.spill_backend
+        )
+
+    def record(self, trace: TraceRecord):
+        """Add a trace, evicting (and optionally spilling) the oldest one."""
+        evicted = self._slots[self._next]
+        if evicted is not None:
+            self._by_request.pop(evicted.request_id, None)
+            if self.spill_backend != "none":
+                self._pending_spill.append(evicted)
+                self._schedule_spill()
+
+        self._slots[self._next] = trace
+        self._by_request[trace.request_id] = self._next
+        self._next = (self._next + 1) % self.capacity
+
+        for step in trace.steps:
+            if not step.success:
+                continue
+            action = normalize_action(step.action)
+            for key in ((action, None), (action, step.worker)) if step.worker else ((action, None),):
+                window = self._step_latencies.get(key)
+                if window is None:
+                    window = self._step_latencies[key] = deque(maxlen=STEP_LATENCY_WINDOW)
+                window.append(step.duration_ms)
+
+        metrics_collector.record_agent_trace(
+            strategy=trace.strategy or "unknown",
+            duration_seconds=trace.duration_ms / 1000,
+            steps=[(normalize_action(step.action), step.duration_ms / 1000) for step in trace.steps]
+        )
+
+    def traces(self) -> List[TraceRecord]:
+        """All in-memory traces, newest first."""
+        ordered = self._slots[self._next:] + self._slots[:self._next]
+        return [trace for trace in reversed(ordered) if trace is not None]
+
+    async def get(self, request_id: str) -> Optional[TraceRecord]:
+        """Look up one trace in memory, then in the spill backend."""
+        index = self._by_request.get(request_id)
+        if index is not None:
+            return self._slots[index]
+
+        for trace in self._pending_spill:
+            if trace.request_id == request_id:
+                return trace
+
+        if self.spill_backend == "none":
+            return None
+        try:
+            return await self._load_spilled(request_id)
+        except Exception as e:
+            logger.warning("trace_spill_lookup_failed", request_id=request_id, error=str(e))
+            return None
+
+    def query(
+        self,
+        worker: Optional[str] = None,
+        strategy: Optional[str] = None,
+        min_percentile: Optional[float] = None,
+        limit: int = 50
+    ) -> List[TraceRecord]:
+        """
+        Filter in-memory traces.
+
+        Args:
+            worker: Only traces planned for this worker
+            strategy: Only traces using this strategy
+            min_percentile: Only traces at or above this latency percentile
+                (computed over the filtered set); results are slowest first
+            limit: Maximum number of traces
+
+        Returns:
+            Matching traces, newest first (slowest first with min_percentile)
+        """
+        matches = [
+            trace for trace in self.traces()
+            if (worker is None or trace.worker == worker)
+            and (strategy is None or trace.strategy == strategy)
+        ]
+
+        if min_percentile is not None:
+            threshold = percentile([trace.duration_ms for trace in matches], min_percentile)
+            matches = sorted(
+                (trace for trace in matches if trace.duration_ms >= threshold),
+                key=lambda trace: trace.duration_ms,
+                reverse=True
+            )
+
+        return matches[:limit]
+
+    def step_latency(
+        self,
+        action: str,
+        worker: Optional[str] = None,
+        pct: float = 50,
+        min_samples: int = 5
+    ) -> Optional[float]:
+        """
+        Observed latency percentile (ms) of a step action.
+
+        Computed over the last STEP_LATENCY_WINDOW successful steps of the
+        action, kept up to date as traces are recorded.
+
+        Args:
+            action: Normalized step action (e.g. "chain_of_thought")
+            worker: Only count steps run by this worker
+            pct: Percentile
+            min_samples: Return None with fewer successful samples than this
+
+        Returns:
+            Latency in milliseconds, or None if there is not enough history
+        """
+        values = self._step_latencies.get((action, worker))
+        if values is None or len(values) < min_samples:
+            return None
+        return percentile(list(values), pct)
+
+    def latency_stats(self, strategy: Optional[str] = None) -> Dict[str, Any]:
+        """Per-strategy and per-step latency percentiles over the in-memory traces."""
+        by_strategy: Dict[str, List[float]] = {}
+        by_action: Dict[str, List[float]] = {}
+        for trace in self.traces():
+            if strategy is not None and trace.strategy != strategy:
+                continue
+            by_strategy.setdefault(trace.strategy or "unknown", []).append(trace.duration_ms)
+            for step in trace.steps:
+                by_action.setdefault(normalize_action(step.action), []).append(step.duration_ms)
+
+        def summarize(values: List[float]) -> Dict[str, Any]:
+            return {
+                "count": len(values),
+                "mean_ms": sum(values) / len(values),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "max_ms": max(values)
+            }
+
+        return {
+            "traces": sum(len(values) for values in by_strategy.values()),
+            "capacity": self.capacity,
+            "strategies": {name: summarize(values) for name, values in by_strategy.items()},
+            "steps": {name: summarize(values) for name, values in by_action.items()}
+        }
+
+    def _schedule_spill(self):
+        """Flush pending evictions in the background (one flush at a time)."""
+        if self._spill_task is not None and not self._spill_task.done():
+            return
+        try:
+            self._spill_task = asyncio.get_running_loop().create_task(self._flush_spill())
+        except RuntimeError:
+            # No event loop (e.g. scripts); spill on the next record or at close()
+            pass
+
+    async def _flush_spill(self):
+        while self._pending_spill:
+            batch, self._pending_spill = self._pending_spill, []
+            try:
+                await self._spill(batch)
+            except Exception as e:
+                logger.warning("trace_spill_failed", backend=self.spill_backend, traces=len(batch), error=str(e))
+
+    async def _spill(self, batch: List[TraceRecord]):
+        """Write traces to the configured backend."""
+        if self.spill_backend == "database":
+            from cortex.database.connection import AsyncSessionLocal
+            from cortex.database.models import AgentTrace
+
+            async with AsyncSessionLocal() as session:
+                for trace in batch:
+                    data = trace.to_dict()
+                    data.pop("step_count")
+                    data["started_at"] = datetime.fromtimestamp(trace.started_at, tz=timezone.utc)
+                    session.add(AgentTrace(**data))
+                await session.commit()
+
+        elif self.spill_backend == "redis":
+            from cortex.storage.redis_client import redis_client
+
+            for trace in batch:
+                await redis_client.set_trace(trace.request_id, trace.to_dict(), settings.trace_spill_ttl)
+
+        logger.debug("traces_spilled", backend=self.spill_backend, traces=len(batch))
+
+    async def _load_spilled(self, request_id: str) -> Optional[TraceRecord]:
+        """Read one spilled trace back."""
+        if self.spill_backend == "database":
+            from sqlalchemy import select
+            from cortex.database.connection import AsyncSessionLocal
+            from cortex.database.models import AgentTrace
+
+            async with AsyncSessionLocal() as session:
+                row = (await session.execute(
+                    select(AgentTrace).where(AgentTrace.request_id == request_id)
+                )).scalar_one_or_none()
+            if row is None:
+                return None
+            started_at = row.started_at
+            if started_at.tzinfo is None:  # SQLite drops the timezone
+                started_at = started_at.replace(tzinfo=timezone.utc)
+            return TraceRecord.from_dict({
+                slot: getattr(row, slot) for slot in TraceRecord.__slots__
+            } | {"started_at": started_at.timestamp()})
+
+        if self.spill_backend == "redis":
+            from cortex.storage.redis_client import redis_client
+
+            data = await redis_client.get_trace(request_id)
+            return TraceRecord.from_dict(data) if data else None
+
+        return None
+
+    async def close(self):
+        """Spill everything still in memory (when a spill backend is configured)."""
+        if self.spill_backend == "none":
+            return
+        if self._spill_task is not None:
+            await asyncio.gather(self._spill_task, return_exceptions=True)
+        self._pending_spill.extend(self.traces())
+        await self._flush_spill()
+        logger.info("trace_store_closed")
+
+
+# Global trace store
+trace_store = TraceStore()
@@ -6,11 +6,13 @@ import time
 from typing import Dict, Any, List
 import structlog
 
+from cortex.config import settings
 from cortex.pii.redactor import PIIRedactor
 from cortex.sentiment.analyzer import SentimentAnalyzer
 from cortex.routing.semantic_router import SemanticRouter
 from cortex.memory.manager import memory_manager
-from cortex.memory.summarizer import inject_context, memory_summarizer
+from cortex.memory.summarizer import inject_context
+from cortex.memory.scheduler import summarization_scheduler
 from cortex.user_dna.manager import user_dna_manager
 from cortex.llm.executor import litellm_executor
 from cortex.prefetch.prefetcher import predictive_prefetcher
@@ -195,13 +197,20 @@ class RequestPipeline:
                 response["choices"][0]["message"]["content"] = restored_content
             
             # Step 9: Async Memory Storage
-            asyncio.create_task(
-                self._store_memory_async(
+            if settings.memory_summary_batching:
+                summarization_scheduler.submit(
                     user_id,
                     user_message,
                     response["choices"][0]["message"]["content"]
                 )
-            )
+            else:
+                asyncio.create_task(
+                    self._store_memory_async(
+                        user_id,
+                        user_message,
+                        response["choices"][0]["message"]["content"]
+                    )
+                )
             
             # Calculate total latency
             latency_ms = (time.time() - start_time) * 1000
@@ -303,13 +312,16 @@ class RequestPipeline:
                 "assistant": assistant_response
             }
             
-            summary = await memory_summarizer.summarize_conversation(conversation)
+            # Uses the user's summarizer mode (llm, local or hybrid)
+            facts, _, _ = await summarization_scheduler.summarize_turns(
+                user_id, [conversation], max_facts=1
+            )
             
-            if summary:
+            if facts:
                 try:
                     await memory_manager.store_memory(
                         user_id,
-                        summary,
+                        facts[0],
                         conversation
                     )
                     metrics_collector.record_memory_storage(user_id)
@@ -1,21 +1,23 @@
 """Semantic routing for intent classification and model selection."""
 
 import os
+import re
+import json
+import hashlib
 from enum import Enum
-from typing import Optional, List
+from pathlib import Path
+from typing import Optional, List, Tuple
+import numpy as np
 import structlog
 
-# BRAIN TRANSPLANT: Use LiteLLM for cloud embeddings instead of local models
-try:
-    from litellm import embedding
-    import numpy as np
-    LITELLM_AVAILABLE = True
-except ImportError:
-    logger.warning("litellm_not_available", message="Semantic routing disabled")
-    LITELLM_AVAILABLE = False
+from cortex.config import settings
+from cortex.embeddings.service import embedding_service
 
 logger = structlog.get_logger()
 
+if not embedding_service.available:
+    logger.warning("embedding_backend_not_available", message="Semantic routing disabled")
+
 
 class IntentCategory(str, Enum):
     """Intent categories for prompt classification."""
@@ -60,19 +62,77 @@ class SemanticRouter:
         ),
     }
     
-    def __init__(self, model_name: str = "gemini/text-embedding-004"):
+    # Exemplar utterances per category. The description above is always
+    # included as the first exemplar so the original behaviour is preserved.
+    CATEGORY_EXEMPLARS = {
+        IntentCategory.SIMPLE_CHAT: [
+            "Hi, how are you today?",
+            "Thanks, that was helpful!",
+            "What is the capital of France?",
+            "Good morning",
+            "What time zone is London in?",
+            "Tell me a fun fact",
+        ],
+        IntentCategory.CODE_GEN: [
+            "Write a Python function that reverses a linked list",
+            "Why does this JavaScript throw undefined is not a function?",
+            "Fix the bug in my SQL query",
+            "Refactor this class to use dependency injection",
+            "Write unit tests for this FastAPI endpoint",
+            "Implement binary search in Go",
+        ],
+        IntentCategory.COMPLEX_REASONING: [
+            "Compare the trade-offs of microservices versus a monolith for our team",
+            "Prove that the square root of two is irrational",
+            "Design a strategy to enter the European market",
+            "Explain step by step why the Roman Empire declined",
+            "Analyze the pros and cons of raising interest rates",
+            "Solve this logic puzzle about three boxes and their labels",
+        ],
+        IntentCategory.CREATIVE_STORY: [
+            "Write a short story about a robot who learns to paint",
+            "Compose a haiku about autumn rain",
+            "Create a villain backstory for my fantasy novel",
+            "Write a poem for my mother's birthday",
+            "Continue this story: the door creaked open and",
+            "Invent a myth about how the moon got its craters",
+        ],
+    }
+    
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        top_k: Optional[int] = None
+    ):
         """
         Initialize semantic router with cloud embedding model.
         
         Args:
-            model_name: Name of the cloud embedding model to use
+            cache_dir: Directory for persisted exemplar embeddings
+                (defaults to settings, empty string disables persistence)
+            top_k: Number of nearest exemplars that vote on the category
         """
-        self._model_name = model_name
-        self._category_embeddings = {}
+        self._model_name = embedding_service.model
+        self._cache_dir = settings.router_embedding_cache_dir if cache_dir is None else cache_dir
+        self._top_k = top_k or settings.router_knn_top_k
+        
+        # Flattened exemplar table: one row per utterance, L2-normalized
+        self._categories: List[IntentCategory] = list(self.CATEGORY_DESCRIPTIONS.keys())
+        self._exemplar_texts: List[str] = []
+        exemplar_labels: List[int] = []
+        for index, category in enumerate(self._categories):
+            texts = [self.CATEGORY_DESCRIPTIONS[category]] + self.CATEGORY_EXEMPLARS.get(category, [])
+            self._exemplar_texts.extend(texts)
+            exemplar_labels.extend([index] * len(texts))
+        
+        self._exemplar_labels = np.array(exemplar_labels, dtype=np.int64)
+        self._exemplar_matrix = None
         
         logger.info(
             "semantic_router_initialized", 
-            model=model_name,
+            model=self._model_name,
+            exemplars=len(self._exemplar_texts),
+            top_k=self._top_k,
             cloud_native=True
         )
     
@@ -80,7 +140,8 @@ class SemanticRouter:
         """
         Classifies prompt into one of the defined categories.
         
-        Uses cosine similarity between prompt embedding and category embeddings.
+        Scores the prompt against every exemplar with a single matrix-vector
+        product and lets the top-k nearest exemplars vote on the category.
         
         Args:
             prompt: User prompt to classify
@@ -88,26 +149,18 @@ class SemanticRouter:
         Returns:
             IntentCategory enum value
         """
-        if not LITELLM_AVAILABLE or not prompt:
+        if not embedding_service.available or not prompt:
             return IntentCategory.SIMPLE_CHAT
         
         try:
-            # Lazy load category embeddings on first use
-            if not self._category_embeddings:
+            # Lazy load exemplar embeddings on first use
+            if self._exemplar_matrix is None:
                 await self._precompute_category_embeddings()
             
             # Encode the prompt using cloud API
             prompt_embedding = await self._get_cloud_embedding(prompt)
             
-            # Calculate cosine similarity with each category
-            similarities = {}
-            for category, category_embedding in self._category_embeddings.items():
-                similarity = self._cosine_similarity(prompt_embedding, category_embedding)
-                similarities[category] = similarity
-            
-            # Select category with highest similarity
-            best_category = max(similarities, key=similarities.get)
-            best_score = similarities[best_category]
+            best_category, best_score = self._knn_vote(prompt_embedding)
             
             logger.info(
                 "intent_classified",
@@ -159,50 +212,128 @@ class SemanticRouter:
         return model
     
     async def _precompute_category_embeddings(self):
-        """Pre-compute embeddings for all category descriptions."""
-        for category, description in self.CATEGORY_DESCRIPTIONS.items():
-            embedding = await self._get_cloud_embedding(description)
-            self._category_embeddings[category] = embedding
+        """
+        Load or compute the normalized exemplar matrix.
+        
+        Reuses a persisted matrix keyed by embedding model and exemplar hash;
+        otherwise embeds every exemplar in one batched call and persists it.
+        """
+        cache_path = self._cache_path()
+        matrix = self._load_cached_matrix(cache_path)
+        source = "disk_cache"
+        
+        if matrix is None:
+            vectors = await self._get_cloud_embeddings(self._exemplar_texts)
+            matrix = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1.0, norms)
+            self._save_cached_matrix(cache_path, matrix)
+            source = "embedding_api"
+        
+        self._exemplar_matrix = matrix
         
         logger.info(
             "category_embeddings_precomputed",
-            count=len(self._category_embeddings),
+            count=len(self._categories),
+            exemplars=matrix.shape[0],
+            dimension=matrix.shape[1],
+            source=source,
             model=self._model_name
         )
     
-    async def _get_cloud_embedding(self, text: str) -> List[float]:
+    def _cache_path(self) -> Optional[Path]:
+        """Path of the persisted exemplar matrix for this model and exemplar set."""
+        if not self._cache_dir:
+            return None
+        
+        digest = hashlib.sha256(
+            json.dumps([self._model_name, self._exemplar_texts]).encode("utf-8")
+        ).hexdigest()[:16]
+        safe_model = re.sub(r"[^A-Za-z0-9_.-]", "_", self._model_name)
+        return Path(self._cache_dir) / f"{safe_model}-{digest}.npy"
+    
+    def _load_cached_matrix(self, path: Optional[Path]):
+        """Load a persisted exemplar matrix, ignoring missing or stale files."""
+        if path is None or not path.exists():
+            return None
+        
+        try:
+            matrix = np.load(path)
+            if matrix.ndim != 2 or matrix.shape != (len(self._exemplar_texts), embedding_service.dimension):
+                logger.warning("router_embedding_cache_stale", path=str(path))
+                return None
+            return matrix.astype(np.float32, copy=False)
+        except Exception as e:
+            logger.warning("router_embedding_cache_load_failed", path=str(path), error=str(e))
+            return None
+    
+    def _save_cached_matrix(self, path: Optional[Path], matrix) -> None:
+        """Persist the exemplar matrix atomically; failures are non-fatal."""
+        if path is None:
+            return
+        
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, path)
+            logger.debug("router_embedding_cache_saved", path=str(path))
+        except Exception as e:
+            logger.warning("router_embedding_cache_save_failed", path=str(path), error=str(e))
+    
+    def _knn_vote(self, prompt_embedding: List[float]) -> Tuple[IntentCategory, float]:
         """
-        Get embedding from cloud API via LiteLLM.
+        Top-k similarity-weighted vote over the exemplar matrix.
         
         Args:
-            text: Text to embed
+            prompt_embedding: Raw prompt embedding
             
         Returns:
-            List of embedding floats
+            Tuple of (winning category, its share of the vote)
         """
-        response = await embedding(
-            model=self._model_name,
-            input=[text],
-            api_key=os.getenv("GOOGLE_API_KEY")
+        query = np.asarray(prompt_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or query.shape[0] != self._exemplar_matrix.shape[1]:
+            return IntentCategory.SIMPLE_CHAT, 0.0
+        
+        scores = self._exemplar_matrix @ (query / norm)
+        k = min(self._top_k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        
+        votes = np.bincount(
+            self._exemplar_labels[top],
+            weights=np.maximum(scores[top], 0.0),
+            minlength=len(self._categories)
         )
+        winner = int(np.argmax(votes))
+        total = float(votes.sum())
         
-        return response['data'][0]['embedding']
+        return self._categories[winner], float(votes[winner] / total) if total > 0 else 0.0
     
-    @staticmethod
-    def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    async def _get_cloud_embedding(self, text: str):
         """
-        Calculate cosine similarity between two vectors.
+        Get embedding through the shared embedding service.
+        
+        The memory manager embeds the same prompt, so within a request this
+        is usually served from the service's cache.
         
         Args:
-            a: First vector
-            b: Second vector
+            text: Text to embed
             
         Returns:
-            Cosine similarity score between -1 and 1
+            float32 embedding vector
+        """
+        return await embedding_service.embed(text)
+    
+    async def _get_cloud_embeddings(self, texts: List[str]):
         """
-        if not LITELLM_AVAILABLE:
-            return 0.0
+        Embed several texts in a single batched call.
+        
+        Args:
+            texts: Texts to embed
             
-        a_np = np.array(a)
-        b_np = np.array(b)
-        return float(np.dot(a_np, b_np) / (np.linalg.norm(a_np) * np.linalg.norm(b_np)))
+        Returns:
+            Embeddings in the same order as the input
+        """
+        return await embedding_service.embed_many(texts)
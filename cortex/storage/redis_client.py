@@ -1,7 +1,7 @@
 """Redis client wrapper for Cortex."""
 
 import json
-from typing import Optional, Any
+from typing import Optional, Any, List
 import redis.asyncio as redis
 import structlog
 
@@ -16,6 +16,8 @@ class RedisClient:
     def __init__(self):
         """Initialize Redis client."""
         self._client: Optional[redis.Redis] = None
+        # Second connection without response decoding, for binary values
+        self._binary_client: Optional[redis.Redis] = None
     
     async def connect(self):
         """Establish connection to Redis."""
@@ -27,8 +29,19 @@ class RedisClient:
             )
             logger.info("redis_connected", url=settings.redis_url)
     
+    async def connect_binary(self):
+        """Establish the binary (non-decoding) connection to Redis."""
+        if self._binary_client is None:
+            self._binary_client = await redis.from_url(
+                settings.redis_url,
+                decode_responses=False
+            )
+    
     async def disconnect(self):
         """Close Redis connection."""
+        if self._binary_client:
+            await self._binary_client.close()
+            self._binary_client = None
         if self._client:
             await self._client.close()
             self._client = None
@@ -119,6 +132,146 @@ class RedisClient:
         logger.debug("prefetch_cache_miss", key=cache_key)
         return None
     
+    async def set_exec_cache(self, cache_key: str, result: dict, ttl: int) -> None:
+        """
+        Store a sandbox execution result.
+        
+        Args:
+            cache_key: Content hash of the executed code
+            result: Execution result dictionary
+            ttl: Time to live in seconds
+        """
+        if not self._client:
+            await self.connect()
+        
+        await self._client.setex(f"exec:{cache_key}", ttl, json.dumps(result))
+        logger.debug("exec_result_cached", key=cache_key, ttl=ttl)
+    
+    async def get_exec_cache(self, cache_key: str) -> Optional[dict]:
+        """
+        Retrieve a sandbox execution result.
+        
+        Args:
+            cache_key: Content hash of the executed code
+            
+        Returns:
+            Execution result dictionary or None if not found
+        """
+        if not self._client:
+            await self.connect()
+        
+        value = await self._client.get(f"exec:{cache_key}")
+        
+        if value:
+            return json.loads(value)
+        return None
+    
+    async def set_trace(self, request_id: str, trace: dict, ttl: int) -> None:
+        """
+        Store an agent trace spilled from the in-memory trace store.
+        
+        Args:
+            request_id: Unique request identifier
+            trace: Trace dictionary
+            ttl: Time to live in seconds
+        """
+        if not self._client:
+            await self.connect()
+        
+        await self._client.setex(f"trace:{request_id}", ttl, json.dumps(trace))
+    
+    async def get_trace(self, request_id: str) -> Optional[dict]:
+        """
+        Retrieve a spilled agent trace.
+        
+        Args:
+            request_id: Unique request identifier
+            
+        Returns:
+            Trace dictionary or None if not found
+        """
+        if not self._client:
+            await self.connect()
+        
+        value = await self._client.get(f"trace:{request_id}")
+        
+        if value:
+            return json.loads(value)
+        return None
+    
+    async def set_embeddings(self, items: dict, ttl: int) -> None:
+        """
+        Store packed embedding vectors.
+        
+        Args:
+            items: Mapping of cache key to packed vector bytes
+            ttl: Time to live in seconds
+        """
+        if not self._binary_client:
+            await self.connect_binary()
+        
+        async with self._binary_client.pipeline(transaction=False) as pipe:
+            for cache_key, value in items.items():
+                pipe.setex(f"emb:{cache_key}", ttl, value)
+            await pipe.execute()
+    
+    async def get_embeddings(self, cache_keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Retrieve packed embedding vectors.
+        
+        Args:
+            cache_keys: Cache keys to look up
+            
+        Returns:
+            Packed vector bytes (or None) in the same order as the keys
+        """
+        if not self._binary_client:
+            await self.connect_binary()
+        
+        return await self._binary_client.mget([f"emb:{cache_key}" for cache_key in cache_keys])
+    
+    async def set_snippets(self, items: dict) -> None:
+        """
+        Store compressed memory snippets (no expiry; deleted with their memories).
+        
+        Args:
+            items: Mapping of memory point id to compressed snippet bytes
+        """
+        if not self._binary_client:
+            await self.connect_binary()
+        
+        async with self._binary_client.pipeline(transaction=False) as pipe:
+            for point_id, value in items.items():
+                pipe.set(f"snippet:{point_id}", value)
+            await pipe.execute()
+    
+    async def get_snippet(self, point_id: str) -> Optional[bytes]:
+        """
+        Retrieve a compressed memory snippet.
+        
+        Args:
+            point_id: Memory point id
+        
+        Returns:
+            Compressed snippet bytes or None if not found
+        """
+        if not self._binary_client:
+            await self.connect_binary()
+        
+        return await self._binary_client.get(f"snippet:{point_id}")
+    
+    async def delete_snippets(self, point_ids: List[str]) -> None:
+        """
+        Delete memory snippets.
+        
+        Args:
+            point_ids: Memory point ids
+        """
+        if not self._binary_client:
+            await self.connect_binary()
+        
+        await self._binary_client.delete(*[f"snippet:{point_id}" for point_id in point_ids])
+    
     async def set_user_dna(self, user_id: str, profile: dict) -> None:
         """
         Store user DNA profile.
@@ -158,6 +311,36 @@ class RedisClient:
         
         logger.debug("user_dna_not_found", user_id=user_id)
         return None
+    
+    async def publish(self, channel: str, message: str) -> None:
+        """
+        Publish a message to a pub/sub channel.
+        
+        Args:
+            channel: Channel name
+            message: Message text
+        """
+        if not self._client:
+            await self.connect()
+        
+        await self._client.publish(channel, message)
+    
+    async def subscribe(self, channel: str) -> redis.client.PubSub:
+        """
+        Subscribe to a pub/sub channel on a dedicated connection.
+        
+        Args:
+            channel: Channel name
+            
+        Returns:
+            PubSub object; iterate `listen()` for messages and `aclose()` it when done
+        """
+        if not self._client:
+            await self.connect()
+        
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        return pubsub
 
 
 # Global Redis client instance
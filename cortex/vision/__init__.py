@@ -0,0 +1,5 @@
+"""Vision request preprocessing components."""
+
+from cortex.vision.preprocessor import ImagePreprocessor, image_preprocessor
+
+__all__ = ["ImagePreprocessor", "image_preprocessor"]
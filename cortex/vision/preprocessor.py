@@ -0,0 +1,250 @@
+"""
+Image preprocessing for vision requests.
+
+Decodes base64 image parts, downscales them to the target model's maximum
+resolution, strips metadata and re-encodes them before they are sent to the
+provider, so large phone photos are not uploaded (and billed) at full size.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import structlog
+
+from cortex.config import settings
+from cortex.observability.metrics import metrics_collector
+
+logger = structlog.get_logger()
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("pillow_not_available", message="Vision images will be sent unprocessed")
+
+DATA_URL_PATTERN = re.compile(r"^data:(image/[\w.+-]+);base64,(.*)$", re.DOTALL)
+
+OUTPUT_MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Info keys that carry metadata worth stripping even when re-encoding does not shrink the file
+METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment", "icc_profile", "photoshop")
+
+
+class ImagePreprocessor:
+    """
+    Downscales and re-encodes inline (data URL) images.
+
+    Results are cached by a hash of the original bytes and the processing
+    parameters, so an image that is resent with every turn of a conversation
+    is only decoded once. Remote (http) image URLs are passed through.
+    """
+
+    def __init__(
+        self,
+        max_dimension: Optional[int] = None,
+        output_format: Optional[str] = None,
+        quality: Optional[int] = None,
+        max_cache_entries: Optional[int] = None
+    ):
+        self.max_dimension = max_dimension or settings.vision_max_dimension
+        self.output_format = (output_format or settings.vision_output_format).lower()
+        self.quality = quality or settings.vision_quality
+        self.max_cache_entries = max_cache_entries or settings.vision_cache_max_entries
+
+        if self.output_format not in OUTPUT_MIME_TYPES:
+            raise ValueError(f"Unsupported output format: {self.output_format}")
+
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+        logger.info(
+            "image_preprocessor_initialized",
+            enabled=PIL_AVAILABLE,
+            max_dimension=self.max_dimension,
+            output_format=self.output_format,
+            quality=self.quality
+        )
+
+    async def prepare_messages(
+        self,
+        messages: List[Dict[str, Any]],
+        max_dimension: Optional[int] = None,
+        model: str = "unknown"
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Return a copy of messages with every inline image preprocessed.
+
+        Args:
+            messages: Chat messages, possibly with multimodal content lists
+            max_dimension: Longest-side limit for the target model
+            model: Target model or worker name (metrics label)
+
+        Returns:
+            Tuple of (processed messages, stats dict)
+        """
+        stats = {"images": 0, "cached": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+        if not PIL_AVAILABLE:
+            return messages, stats
+
+        max_dimension = max_dimension or self.max_dimension
+        processed = []
+        for message in messages:
+            content = message.get("content")
+            if not isinstance(content, list):
+                processed.append(message)
+                continue
+
+            parts = []
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "image_url":
+                    part = await self._prepare_part(part, max_dimension, model, stats)
+                parts.append(part)
+            processed.append({**message, "content": parts})
+
+        if stats["images"]:
+            logger.info("vision_images_preprocessed", model=model, **stats)
+        return processed, stats
+
+    async def _prepare_part(
+        self,
+        part: Dict[str, Any],
+        max_dimension: int,
+        model: str,
+        stats: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Preprocess one image_url content part."""
+        image_url = part.get("image_url")
+        url = image_url.get("url", "") if isinstance(image_url, dict) else image_url
+        match = DATA_URL_PATTERN.match(url or "")
+        if not match:
+            return part
+
+        encoded = match.group(2)
+        cache_key = hashlib.sha256(
+            f"{max_dimension}:{self.output_format}:{self.quality}:{encoded}".encode("ascii", "ignore")
+        ).hexdigest()
+
+        stats["images"] += 1
+        stats["bytes_in"] += len(url)
+
+        new_url = self._cache.get(cache_key)
+        if new_url is not None:
+            self._cache.move_to_end(cache_key)
+            metrics_collector.record_cache_hit("vision_image")
+            stats["cached"] += 1
+        else:
+            metrics_collector.record_cache_miss("vision_image")
+            try:
+                new_url, cpu_seconds = await asyncio.to_thread(
+                    self._process, match.group(1), encoded, max_dimension
+                )
+            except Exception as e:
+                logger.warning("vision_image_preprocess_failed", model=model, error=str(e))
+                stats["bytes_out"] += len(url)
+                return part
+
+            stats["cpu_seconds"] += cpu_seconds
+            metrics_collector.record_vision_preprocess(
+                model=model,
+                bytes_saved=len(url) - len(new_url),
+                cpu_seconds=cpu_seconds
+            )
+            self._store(cache_key, new_url)
+
+        stats["bytes_out"] += len(new_url)
+
+        if isinstance(image_url, dict):
+            return {**part, "image_url": {**image_url, "url": new_url}}
+        return {**part, "image_url": new_url}
+
+    def _process(self, mime_type: str, encoded: str, max_dimension: int) -> Tuple[str, float]:
+        """
+        Decode, downscale and re-encode one image (runs in a worker thread).
+
+        Returns:
+            Tuple of (data URL, CPU seconds spent)
+        """
+        started = time.thread_time()
+
+        try:
+            raw = base64.b64decode(encoded, validate=False)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Invalid base64 image data: {e}")
+
+        with Image.open(io.BytesIO(raw)) as image:
+            if getattr(image, "is_animated", False):
+                # Re-encoding would drop every frame but the first
+                return f"data:{mime_type};base64,{encoded}", time.thread_time() - started
+
+            has_metadata = any(key in image.info for key in METADATA_KEYS)
+            resized = max(image.size) > max_dimension
+
+            # Let the JPEG decoder downscale by a power of two while decoding
+            image.draft("RGB", (max_dimension, max_dimension))
+
+            # Bake in the EXIF orientation before the EXIF block is dropped
+            image = ImageOps.exif_transpose(image)
+
+            if max(image.size) > max_dimension:
+                image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+            image = self._to_output_mode(image)
+
+            buffer = io.BytesIO()
+            save_kwargs = {"quality": self.quality}
+            if self.output_format == "jpeg":
+                save_kwargs["optimize"] = True
+            else:
+                save_kwargs["method"] = 4
+            image.save(buffer, format=self.output_format.upper(), **save_kwargs)
+
+        output = buffer.getvalue()
+        cpu_seconds = time.thread_time() - started
+
+        if not resized and not has_metadata and len(output) >= len(raw):
+            # Already small and clean; re-encoding would only cost quality
+            return f"data:{mime_type};base64,{encoded}", cpu_seconds
+
+        new_encoded = base64.b64encode(output).decode("ascii")
+        return f"data:{OUTPUT_MIME_TYPES[self.output_format]};base64,{new_encoded}", cpu_seconds
+
+    def _to_output_mode(self, image: "Image.Image") -> "Image.Image":
+        """Convert to a mode the output format can store."""
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+
+        if has_alpha and self.output_format == "webp":
+            return image.convert("RGBA")
+
+        if has_alpha:
+            # JPEG has no alpha channel; flatten onto white
+            rgba = image.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            return background
+
+        if image.mode not in ("RGB", "L"):
+            return image.convert("RGB")
+        return image
+
+    def _store(self, key: str, data_url: str):
+        """Insert into the LRU cache, evicting the oldest entries."""
+        self._cache[key] = data_url
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        """Drop all cached images."""
+        self._cache.clear()
+
+
+# Global image preprocessor
+image_preprocessor = ImagePreprocessor()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Rotate the Fernet key that encrypts stored provider API keys.
+
+Re-encrypts every provider setting with a fresh key in one transaction,
+then replaces .encryption_key. Run it with the service stopped, from the
+directory holding .encryption_key.
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the cortex directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cryptography.fernet import Fernet
+from cortex.admin.settings import ProviderSetting
+from cortex.database.connection import AsyncSessionLocal
+from sqlalchemy import select
+
+KEY_FILE = ".encryption_key"
+
+
+async def rotate_encryption_key():
+    """Re-encrypt all provider settings under a new key and install it."""
+    with open(KEY_FILE, "rb") as f:
+        old_cipher = Fernet(f.read().strip())
+    new_key = Fernet.generate_key()
+    new_cipher = Fernet(new_key)
+
+    # Written before the commit so the new key is never lost once rows use it
+    pending_file = KEY_FILE + ".new"
+    with open(pending_file, "wb") as f:
+        f.write(new_key)
+    os.chmod(pending_file, 0o600)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(ProviderSetting))
+        settings_rows = result.scalars().all()
+        for setting in settings_rows:
+            api_key = old_cipher.decrypt(setting.api_key_encrypted.encode())
+            setting.api_key_encrypted = new_cipher.encrypt(api_key).decode()
+        await db.commit()
+
+    os.replace(pending_file, KEY_FILE)
+    print(f"✅ Re-encrypted {len(settings_rows)} provider settings; new key written to {KEY_FILE}")
+
+
+if __name__ == "__main__":
+    asyncio.run(rotate_encryption_key())
@@ -0,0 +1,40 @@
+"""Unit tests for the extractive summarizer's third-person rewrite."""
+
+import pytest
+
+from cortex.memory.extractive import ExtractiveSummarizer
+
+
+@pytest.mark.parametrize("sentence, fact", [
+    ("My team uses Go and Rust.", "User's team uses Go and Rust."),
+    ("I work closely with my team.", "User works closely with their team."),
+    ("Our team runs Kubernetes in production.", "User's team runs Kubernetes in production."),
+    ("I think our team runs a tight ship.", "User thinks their team runs a tight ship."),
+    ("Our stack is mostly Python.", "User's stack is mostly Python."),
+    ("I lead the backend of our product.", "User leads the backend of their team's product."),
+])
+def test_possessives(sentence, fact):
+    assert ExtractiveSummarizer._to_fact(sentence) == fact
+
+
+@pytest.mark.parametrize("sentence, fact", [
+    ("We use Postgres for everything.", "User's team uses Postgres for everything."),
+    ("We also deploy to AWS.", "User's team also deploys to AWS."),
+    ("We're based in Berlin.", "User's team is based in Berlin."),
+    ("We don't use Java.", "User's team doesn't use Java."),
+    ("We've migrated to Rust.", "User's team has migrated to Rust."),
+    ("We deployed it last week.", "User's team deployed it last week."),
+])
+def test_we_agreement(sentence, fact):
+    assert ExtractiveSummarizer._to_fact(sentence) == fact
+
+
+@pytest.mark.parametrize("sentence, fact", [
+    ("I'm a data engineer.", "User is a data engineer."),
+    ("I don't like Java.", "User doesn't like Java."),
+    ("I also use Vim daily.", "User also uses Vim daily."),
+    ("I worked at a bank for years.", "User worked at a bank for years."),
+    ("I study chemistry.", "User studies chemistry."),
+])
+def test_i_agreement(sentence, fact):
+    assert ExtractiveSummarizer._to_fact(sentence) == fact